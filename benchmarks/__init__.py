@@ -0,0 +1,8 @@
+"""
+Benchmarks del conversor JSON → CSV de Sales Layer.
+
+- benchmarks.generator: exportaciones sintéticas deterministas.
+- benchmarks.cases: etapas y motores que se miden.
+- python -m benchmarks: ejecuta los casos y guarda filas/s, MB/s y pico de
+  memoria en benchmarks/results/<fecha>.json para comparar ejecuciones.
+"""
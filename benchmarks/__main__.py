@@ -0,0 +1,218 @@
+"""
+Ejecuta los benchmarks y guarda los resultados en JSON.
+
+    python -m benchmarks                       # tamaño por defecto
+    python -m benchmarks --rows 200000 --repeat 5
+    python -m benchmarks --cases saleslayer,simple --compare results/old.json
+
+Cada caso se ejecuta en un proceso nuevo (spawn) para que el pico de memoria
+(RSS) sea solo suyo. Se informa del mejor tiempo de --repeat ejecuciones.
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.cases import CASES, REPO_ROOT, conv, run_case
+from benchmarks.generator import generate_saleslayer_export, generate_simple_export
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+RESULTS_VERSION = 1
+MB = 1024 * 1024
+
+
+def _run_isolated(name, inputs, out_dir):
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=ctx) as pool:
+        return pool.submit(run_case, name, inputs, out_dir).result()
+
+
+def _summary(result):
+    seconds = result["seconds"] or 1e-9
+    rss = result["peak_rss_bytes"]
+    base = result["baseline_rss_bytes"]
+    return dict(
+        result,
+        rows_per_sec=result["rows"] / seconds,
+        mb_per_sec=result["input_bytes"] / MB / seconds,
+        peak_rss_mb=rss / MB if rss is not None else None,
+        baseline_rss_mb=base / MB if base is not None else None,
+    )
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(results):
+    print(
+        f"{'case':<24}{'stage':<8}{'seconds':>9}{'rows/s':>12}"
+        f"{'MB/s':>9}{'peak RSS MB':>13}{'run MB':>9}"
+    )
+    for r in results:
+        rss = grown = "-"
+        if r["peak_rss_mb"] is not None:
+            rss = f"{r['peak_rss_mb']:.1f}"
+            # Memoria de la ejecución, sin los datos preparados por el caso
+            grown = f"{r['peak_rss_mb'] - r['baseline_rss_mb']:.1f}"
+        print(
+            f"{r['case']:<24}{r['stage']:<8}{r['seconds']:>9.3f}"
+            f"{r['rows_per_sec']:>12,.0f}{r['mb_per_sec']:>9.1f}{rss:>13}{grown:>9}"
+        )
+
+
+def _print_comparison(results, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {r["case"]: r for r in json.load(f)["results"]}
+    print(f"\nvs {previous_path} (x > 1 = faster now)")
+    for r in results:
+        old = previous.get(r["case"])
+        if old is None:
+            continue
+        speedup = old["seconds"] / (r["seconds"] or 1e-9)
+        rss = ""
+        if r["peak_rss_mb"] is not None and old.get("peak_rss_mb"):
+            rss = f"  peak RSS {old['peak_rss_mb']:.1f} -> {r['peak_rss_mb']:.1f} MB"
+        print(
+            f"{r['case']:<24}{old['seconds']:>9.3f}s -> {r['seconds']:.3f}s"
+            f"  x{speedup:.2f}{rss}"
+        )
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the Sales Layer JSON → CSV converter.",
+    )
+    parser.add_argument(
+        "--cases",
+        help=f"comma-separated cases (default: all): {', '.join(CASES)}",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=20_000, help="rows per table")
+    parser.add_argument("--columns", type=int, default=16)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--split-rows", type=int, default=200_000)
+    parser.add_argument("--max-mb", type=float, default=conv.DEFAULT_MAX_MB)
+    parser.add_argument(
+        "--workdir", help="folder for generated inputs and outputs (default: temp)"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="results JSON (default: benchmarks/results/<date>.json)",
+    )
+    parser.add_argument("--compare", help="previous results JSON to compare with")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    names = args.cases.split(",") if args.cases else list(CASES)
+    for name in names:
+        if name not in CASES:
+            raise SystemExit(f"unknown case: {name}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sl_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    params = {
+        "seed": args.seed,
+        "tables": args.tables,
+        "rows": args.rows,
+        "columns": args.columns,
+        "products": args.products,
+        "split_rows": args.split_rows,
+        "max_mb": args.max_mb,
+        "repeat": args.repeat,
+    }
+
+    print("Generating inputs…", flush=True)
+    inputs = {
+        "seed": args.seed,
+        "split_rows": args.split_rows,
+        "max_bytes": int(args.max_mb * MB),
+        "saleslayer": generate_saleslayer_export(
+            os.path.join(workdir, "saleslayer.json"),
+            tables=args.tables,
+            rows=args.rows,
+            columns=args.columns,
+            seed=args.seed,
+        ),
+        "simple": generate_simple_export(
+            os.path.join(workdir, "simple.json"),
+            products=args.products,
+            seed=args.seed,
+        ),
+    }
+
+    results = []
+    for name in names:
+        if not CASES[name][2]:
+            print(f"{name}: skipped (optional dependency missing)")
+            continue
+        best = None
+        for _ in range(max(args.repeat, 1)):
+            out_dir = os.path.join(workdir, "out", name)
+            shutil.rmtree(out_dir, ignore_errors=True)
+            os.makedirs(out_dir)
+            result = _run_isolated(name, inputs, out_dir)
+            if best is None or result["seconds"] < best["seconds"]:
+                best = result
+        results.append(_summary(best))
+        print(f"{name}: {best['seconds']:.3f}s", flush=True)
+
+    print()
+    _print_table(results)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "inputs": {
+            kind: {"bytes": inputs[kind]["bytes"], "rows": inputs[kind]["rows"]}
+            for kind in ("saleslayer", "simple")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults: {output}")
+
+    if args.compare:
+        _print_comparison(results, args.compare)
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
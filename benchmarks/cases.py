@@ -0,0 +1,292 @@
+"""
+Casos de benchmark: cada uno prepara sus datos (sin cronometrar) y devuelve
+la función a medir, las filas que procesa y los bytes de entrada.
+
+Etapas sueltas (escape_csv, split_by_size, lectura del JSON) y motores
+completos (process_json_file en modo Sales Layer y simple, con sus
+variantes: csv.writer, procesos, gzip, escritura en segundo plano,
+lista de assets, Parquet).
+"""
+
+import gc
+import importlib.util
+import os
+import random
+import sys
+import time
+
+# El conversor es un script suelto en la raíz del repositorio
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import json_to_csv_saleslayer_gui as conv  # noqa: E402
+
+from benchmarks.generator import MULTIBYTE_WORDS, _Text  # noqa: E402
+
+# Valores de texto del micro-benchmark de escape_csv
+ESCAPE_VALUES = 200_000
+
+
+def reference_escape_csv(value):
+    """escape_csv original (cadena de replace), para comprobar resultados."""
+    if value is None:
+        return '""'
+    s = str(value)
+    s = s.replace("\r\n", " ")
+    s = s.replace("\n", " ")
+    s = s.replace("\r", " ")
+    s = s.replace("\t", " ")
+    s = s.strip()
+    s = s.replace('"', '""')
+    return f'"{s}"'
+
+
+def _escape_values(seed):
+    rng = random.Random(seed)
+    text = _Text(rng)
+    values = []
+    for n in range(ESCAPE_VALUES):
+        kind = n % 10
+        if kind == 0:
+            values.append(None)
+        elif kind == 1:
+            values.append(rng.randint(0, 10**6))
+        elif kind == 2:
+            values.append(round(rng.random() * 1000, 2))
+        else:
+            values.append(text())
+    return values
+
+
+def case_escape_csv(inputs, out_dir):
+    values = _escape_values(inputs["seed"])
+    for value in values:
+        expected = reference_escape_csv(value)
+        if conv.escape_csv(value) != expected:
+            raise AssertionError(f"escape_csv({value!r}) != {expected!r}")
+    input_bytes = sum(len(str(v).encode("utf-8")) for v in values if v is not None)
+
+    def run():
+        escape = conv.escape_csv
+        for value in values:
+            escape(value)
+
+    return run, len(values), input_bytes
+
+
+def reference_split_by_size(
+    base_path,
+    base_name,
+    header,
+    rows,
+    max_bytes,
+    lang,
+    log_fn=None,
+    ui_update_fn=None,
+):
+    """
+    split_by_size original, copiado tal cual para comparar: el fichero se
+    acumula en una cadena con += y cada fila se codifica para medirla y otra
+    vez al guardar el fichero entero.
+    """
+    texts = conv.TEXTS.get(lang, conv.TEXTS["es"])
+    file_index = 1
+    current = header
+    current_bytes = len(current.encode("utf-8"))
+
+    def save_file(index, content):
+        filename = f"{base_name}_{index}.csv"
+        full_path = os.path.join(base_path, filename)
+        with open(full_path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(content)
+        if log_fn:
+            log_fn(texts["log_saving_file"].format(filename=filename))
+
+    for i, row in enumerate(rows, start=1):
+        row_with_newline = row + "\n"
+        row_bytes = len(row_with_newline.encode("utf-8"))
+
+        if current_bytes + row_bytes > max_bytes:
+            # Cerramos fichero actual y empezamos otro
+            save_file(file_index, current)
+            file_index += 1
+            current = header + row_with_newline
+            current_bytes = len(current.encode("utf-8"))
+        else:
+            current += row_with_newline
+            current_bytes += row_bytes
+
+        if ui_update_fn and i % 100 == 0:
+            ui_update_fn()
+
+    if current != header:
+        save_file(file_index, current)
+
+
+def _split_rows(inputs, vocabulary=None):
+    rng = random.Random(inputs["seed"])
+    text = _Text(rng, vocabulary=vocabulary) if vocabulary else _Text(rng)
+    rows = [
+        ",".join(conv.escape_csv(text()) for _ in range(8))
+        for _ in range(inputs["split_rows"])
+    ]
+    return rows, sum(len(row.encode("utf-8")) + 1 for row in rows)
+
+
+def _split_case(vocabulary=None, reference=False):
+    def case(inputs, out_dir):
+        rows, input_bytes = _split_rows(inputs, vocabulary)
+        split = reference_split_by_size if reference else conv.split_by_size
+
+        def run():
+            header = "a,b,c,d,e,f,g,h\n"
+            split(out_dir, "split", header, rows, inputs["max_bytes"], "en")
+
+        return run, len(rows), input_bytes
+
+    return case
+
+
+def case_read_saleslayer(inputs, out_dir):
+    """Solo lectura en streaming: cuánto cuesta el parser de JSON."""
+    path = inputs["saleslayer"]["path"]
+
+    def run():
+        stream = conv.open_json_export(path)
+        for _, rows in stream.iter_tables():
+            for _ in rows or ():
+                pass
+
+    return run, inputs["saleslayer"]["rows"], inputs["saleslayer"]["bytes"]
+
+
+def case_index_saleslayer(inputs, out_dir):
+    """
+    Índice mmap de filas (JsonTableIndex), sin decodificarlas: el coste que
+    se paga antes de repartir las tablas en rangos de filas (--workers).
+    """
+    path = inputs["saleslayer"]["path"]
+
+    def run():
+        with conv.open_json_export(path).index_tables():
+            pass
+
+    return run, inputs["saleslayer"]["rows"], inputs["saleslayer"]["bytes"]
+
+
+def _convert(kind, **options):
+    def case(inputs, out_dir):
+        source = inputs[kind]
+
+        def run():
+            conv.process_json_file(
+                source["path"],
+                max_bytes=inputs["max_bytes"],
+                output_dir=out_dir,
+                lang="en",
+                **options,
+            )
+
+        return run, source["rows"], source["bytes"]
+
+    return case
+
+
+def _has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+# nombre -> (etapa, caso, disponible)
+CASES = {
+    "escape_csv": ("stage", case_escape_csv, True),
+    "split_by_size": ("stage", _split_case(), True),
+    "split_by_size_ref": ("stage", _split_case(reference=True), True),
+    # Catálogo en español / chino: el coste de codificar a UTF-8 pesa más
+    "split_multibyte": ("stage", _split_case(MULTIBYTE_WORDS), True),
+    "split_multibyte_ref": (
+        "stage",
+        _split_case(MULTIBYTE_WORDS, reference=True),
+        True,
+    ),
+    "read_saleslayer": ("stage", case_read_saleslayer, True),
+    "index_saleslayer": ("stage", case_index_saleslayer, True),
+    "saleslayer": ("engine", _convert("saleslayer"), True),
+    "saleslayer_csv_writer": (
+        "engine",
+        _convert("saleslayer", csv_writer=True),
+        True,
+    ),
+    "saleslayer_workers": (
+        "engine",
+        _convert("saleslayer", workers=max(os.cpu_count() or 1, 2)),
+        True,
+    ),
+    "saleslayer_gzip": ("engine", _convert("saleslayer", compression="gzip"), True),
+    "saleslayer_pipelined": (
+        "engine",
+        _convert("saleslayer", pipelined_writes=True),
+        True,
+    ),
+    "saleslayer_assets": (
+        "engine",
+        _convert("saleslayer", assets_manifest=True),
+        True,
+    ),
+    "saleslayer_parquet": (
+        "engine",
+        _convert("saleslayer", output_format="parquet"),
+        _has_module("pyarrow"),
+    ),
+    "simple": ("engine", _convert("simple"), True),
+}
+
+
+def _reset_peak_rss():
+    """
+    Reinicia el pico de RSS del proceso (Linux, VmHWM) para que no cuente
+    la preparación del caso. Devuelve False si el sistema no lo permite.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def run_case(name, inputs, out_dir):
+    """
+    Prepara, cronometra y mide un caso. Se ejecuta en un proceso nuevo
+    (python -m benchmarks), así el pico de RSS es solo del caso.
+    baseline_rss_bytes se mide con los datos del caso ya preparados: la
+    memoria de la ejecución es peak_rss_bytes - baseline_rss_bytes. Donde
+    el pico no se puede reiniciar, baseline incluye el de la preparación.
+    """
+    stage, case, _ = CASES[name]
+    run, rows, input_bytes = case(inputs, out_dir)
+    gc.collect()
+    _reset_peak_rss()
+    baseline_rss = conv.peak_rss_bytes()
+
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    return {
+        "case": name,
+        "stage": stage,
+        "seconds": seconds,
+        "rows": rows,
+        "input_bytes": input_bytes,
+        "output_bytes": _dir_bytes(out_dir),
+        "baseline_rss_bytes": baseline_rss,
+        "peak_rss_bytes": conv.peak_rss_bytes(),
+    }
@@ -0,0 +1,354 @@
+"""
+Generador determinista de exportaciones sintéticas para los benchmarks.
+
+- Sales Layer: data_schema_info + data_schema + data, con N tablas, filas y
+  columnas, mezcla de tipos de campo y campos multi-idioma (_en, _es…).
+- Simple: array de productos tipo BigCommerce con variantes y categorías.
+
+Los JSON se escriben fila a fila, así se pueden generar ficheros de varios
+GB sin tenerlos en memoria. Misma semilla + mismos parámetros -> mismo
+fichero byte a byte.
+
+Uso:
+    python -m benchmarks.generator saleslayer export.json --tables 5 --rows 100000
+    python -m benchmarks.generator simple products.json --products 50000
+"""
+
+import argparse
+import json
+import os
+import random
+
+# Tipos de campo de Sales Layer que entiende el conversor
+FIELD_TYPES = ("string", "numeric", "boolean", "list", "image", "file", "table")
+
+# Peso relativo de cada tipo al elegir las columnas de una tabla
+DEFAULT_TYPE_MIX = {
+    "string": 4,
+    "numeric": 2,
+    "boolean": 1,
+    "list": 1,
+    "image": 1,
+    "file": 1,
+    "table": 1,
+}
+
+DEFAULT_LANGUAGES = ("en", "es")
+
+# Vocabulario con los casos difíciles del CSV: acentos, CJK, comillas,
+# saltos de línea, tabuladores, separadores y HTML
+WORDS = (
+    "lorem", "ipsum", "dolor", "sit", "amet", "mesa", "silla", "niño",
+    "café", "acción", "größe", "价格", "产品", "<b>oferta</b>", "<p>texto</p>",
+    'pulgadas "XL"', "línea\nnueva", "tab\taquí", "fin\r\nde línea",
+    "a,b;c|d", "  espacios  ", "100%", "€", "mm", "kg",
+)
+
+# Vocabulario multibyte (español con tildes y chino) para medir el coste de
+# codificar a UTF-8: catálogos con descripciones largas en estos idiomas
+MULTIBYTE_WORDS = (
+    "canción", "información", "pequeño", "diseño", "señal", "región",
+    "artículo", "descripción", "característica", "tamaño", "añadir", "€",
+    "产品", "价格", "描述", "尺寸", "颜色", "材料", "重量", "高品质", "不锈钢",
+    "防水", "包装", "说明书", "保修", "厘米", "公斤",
+)
+
+HTML_COMMENT = "<!-- comentario -->"
+
+
+def _parse_type_mix(text):
+    """"string=4,numeric=2" -> {"string": 4, "numeric": 2}."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in FIELD_TYPES:
+            raise argparse.ArgumentTypeError(f"unknown field type: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class _Text:
+    """Textos aleatorios de longitud acotada (número de palabras)."""
+
+    def __init__(
+        self, rng, words=(0, 12), html_comment_ratio=0.01, vocabulary=WORDS
+    ):
+        self.rng = rng
+        self.words = words
+        self.html_comment_ratio = html_comment_ratio
+        self.vocabulary = vocabulary
+
+    def __call__(self, words=None):
+        rng = self.rng
+        low, high = words or self.words
+        if rng.random() < self.html_comment_ratio:
+            return HTML_COMMENT
+        vocabulary = self.vocabulary
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(low, high)))
+
+
+def _field_value(rng, text, field_type, row_id):
+    """Valor JSON de una celda con la forma que usa Sales Layer."""
+    if field_type == "numeric":
+        kind = rng.random()
+        if kind < 0.5:
+            return rng.randint(0, 100_000)
+        if kind < 0.8:
+            return round(rng.random() * 1000, 2)
+        if kind < 0.9:
+            return str(rng.randint(0, 999))
+        return None
+    if field_type == "boolean":
+        return rng.choice((True, False, "1", "0", None))
+    if field_type == "list":
+        return [text((1, 2)) for _ in range(rng.randint(0, 4))]
+    if field_type == "image":
+        return [
+            [
+                "U",
+                rng.randint(1, 10**6),
+                f"https://images.example.com/{row_id}/{n}_thm.jpg",
+                f"https://images.example.com/{row_id}/{n}_org.jpg",
+            ]
+            for n in range(rng.randint(0, 3))
+        ]
+    if field_type == "file":
+        return [
+            [
+                "U",
+                rng.randint(1, 10**6),
+                f"https://files.example.com/{row_id}/{n}.pdf",
+            ]
+            for n in range(rng.randint(0, 2))
+        ]
+    if field_type == "table":
+        if rng.random() < 0.5:
+            return None
+        return [
+            {"ref": f"R{row_id}-{n}", "value": text((1, 3))}
+            for n in range(rng.randint(1, 3))
+        ]
+    return text()
+
+
+def saleslayer_schema(
+    tables=5,
+    columns=12,
+    type_mix=None,
+    languages=DEFAULT_LANGUAGES,
+    multilingual_ratio=0.3,
+    seed=1,
+):
+    """
+    Esquema sintético: {tabla: [(nombre_columna, tipo), …]}.
+    La primera columna de cada tabla es ID (numeric). Una parte de los
+    campos string se repite por idioma (name3_en, name3_es…).
+    """
+    rng = random.Random(seed)
+    mix = type_mix or DEFAULT_TYPE_MIX
+    names = [t for t in FIELD_TYPES if mix.get(t)]
+    weights = [mix[t] for t in names]
+
+    schema = {}
+    for t_idx in range(tables):
+        cols = [("ID", "numeric")]
+        n_field = 1
+        while len(cols) < columns:
+            field_type = rng.choices(names, weights)[0]
+            multilingual = languages and rng.random() < multilingual_ratio
+            if field_type == "string" and multilingual:
+                for lang in languages:
+                    cols.append((f"text{n_field}_{lang}", "string"))
+            else:
+                cols.append((f"{field_type}{n_field}", field_type))
+            n_field += 1
+        schema[f"table_{t_idx + 1}"] = cols[:columns]
+    return schema
+
+
+def generate_saleslayer_export(
+    path,
+    tables=5,
+    rows=10_000,
+    columns=12,
+    type_mix=None,
+    languages=DEFAULT_LANGUAGES,
+    multilingual_ratio=0.3,
+    text_words=(0, 12),
+    html_comment_ratio=0.01,
+    seed=1,
+):
+    """
+    Escribe una exportación de Sales Layer con `tables` tablas de `rows`
+    filas y `columns` columnas. Devuelve {"path", "bytes", "rows"}.
+    """
+    schema = saleslayer_schema(
+        tables, columns, type_mix, languages, multilingual_ratio, seed
+    )
+    rng = random.Random(seed + 1)
+    text = _Text(rng, text_words, html_comment_ratio)
+
+    data_schema = {}
+    data_schema_info = {}
+    for table, cols in schema.items():
+        data_schema[table] = [
+            # Las imágenes se declaran con sus tamaños, como en Sales Layer
+            {name: ["THM", "ORG"]} if field_type == "image" else name
+            for name, field_type in cols
+        ]
+        data_schema_info[table] = {
+            name: {"type": field_type} for name, field_type in cols
+        }
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"data_schema_info": ')
+        json.dump(data_schema_info, f, ensure_ascii=False)
+        f.write(', "data_schema": ')
+        json.dump(data_schema, f, ensure_ascii=False)
+        f.write(', "data": {')
+        for t_idx, (table, cols) in enumerate(schema.items()):
+            if t_idx:
+                f.write(", ")
+            f.write(json.dumps(table) + ": [")
+            for row_id in range(1, rows + 1):
+                row = [row_id] + [
+                    _field_value(rng, text, field_type, row_id)
+                    for _, field_type in cols[1:]
+                ]
+                f.write("\n" if row_id == 1 else ",\n")
+                f.write(json.dumps(row, ensure_ascii=False))
+            f.write("]")
+        f.write("}}\n")
+
+    return {"path": path, "bytes": os.path.getsize(path), "rows": tables * rows}
+
+
+def generate_simple_export(
+    path,
+    products=10_000,
+    variants=(0, 4),
+    categories=50,
+    categories_per_product=(0, 3),
+    text_words=(0, 12),
+    html_comment_ratio=0.01,
+    seed=1,
+):
+    """
+    Escribe un array de productos tipo BigCommerce (id, sku, name,
+    description, brand, precios, imágenes, categorías y variantes).
+    Devuelve {"path", "bytes", "rows"} (rows = productos + variantes).
+    """
+    rng = random.Random(seed)
+    text = _Text(rng, text_words, html_comment_ratio)
+    category_names = [f"Categoría {n} {text((1, 2))}" for n in range(categories)]
+    n_rows = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for idx in range(1, products + 1):
+            product = {
+                "id": idx,
+                "sku": text((1, 1)) if rng.random() < 0.02 else f"SKU-{idx:07d}",
+                "name": text((1, 6)),
+                "description": "<p>" + text() + "</p>",
+                "brand": {"name": text((1, 2))} if rng.random() < 0.8 else None,
+                "price": round(rng.random() * 500, 2),
+                "retail_price": rng.choice((None, round(rng.random() * 600, 2))),
+                "sale_price": rng.choice((0, None, round(rng.random() * 400, 2))),
+                "cost_price": round(rng.random() * 300, 2),
+                "weight": rng.randint(0, 50),
+                "width": rng.randint(0, 200),
+                "height": rng.randint(0, 200),
+                "depth": rng.randint(0, 200),
+                "images": [
+                    f"https://images.example.com/p/{idx}/{n}.jpg"
+                    for n in range(rng.randint(0, 4))
+                ],
+                "categories": [
+                    {"name": rng.choice(category_names)}
+                    for _ in range(rng.randint(*categories_per_product))
+                ],
+                "variants": [
+                    {
+                        "id": idx * 100 + n,
+                        "sku": f"SKU-{idx:07d}-{n}",
+                        "price": round(rng.random() * 500, 2),
+                        "weight": rng.randint(0, 50),
+                        "upc": str(rng.randint(10**11, 10**12 - 1)),
+                        "inventory_level": rng.randint(0, 1000),
+                    }
+                    for n in range(rng.randint(*variants))
+                ],
+            }
+            n_rows += 1 + len(product["variants"])
+            f.write("\n" if idx == 1 else ",\n")
+            f.write(json.dumps(product, ensure_ascii=False))
+        f.write("]\n")
+
+    return {"path": path, "bytes": os.path.getsize(path), "rows": n_rows}
+
+
+def _range(text):
+    """"0-4" -> (0, 4); "3" -> (3, 3)."""
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.generator",
+        description="Write a deterministic synthetic Sales Layer / simple export.",
+    )
+    parser.add_argument("kind", choices=["saleslayer", "simple"])
+    parser.add_argument("path")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per table")
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument(
+        "--type-mix",
+        type=_parse_type_mix,
+        help="weights per field type, e.g. 'string=4,numeric=2,image=1'",
+    )
+    parser.add_argument(
+        "--languages",
+        default=",".join(DEFAULT_LANGUAGES),
+        help="language suffixes of multilingual fields (default: en,es)",
+    )
+    parser.add_argument("--multilingual-ratio", type=float, default=0.3)
+    parser.add_argument("--text-words", type=_range, default=(0, 12))
+    parser.add_argument("--html-comment-ratio", type=float, default=0.01)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--variants", type=_range, default=(0, 4))
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.kind == "saleslayer":
+        info = generate_saleslayer_export(
+            args.path,
+            tables=args.tables,
+            rows=args.rows,
+            columns=args.columns,
+            type_mix=args.type_mix,
+            languages=tuple(filter(None, args.languages.split(","))),
+            multilingual_ratio=args.multilingual_ratio,
+            text_words=args.text_words,
+            html_comment_ratio=args.html_comment_ratio,
+            seed=args.seed,
+        )
+    else:
+        info = generate_simple_export(
+            args.path,
+            products=args.products,
+            variants=args.variants,
+            categories=args.categories,
+            text_words=args.text_words,
+            html_comment_ratio=args.html_comment_ratio,
+            seed=args.seed,
+        )
+    print(json.dumps(info))
+
+
+if __name__ == "__main__":
+    main()
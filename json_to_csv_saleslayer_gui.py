@@ -1,12 +1,78 @@
+import argparse
+import array
+import bisect
+import codecs
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import fnmatch
+import functools
+import glob
+import gzip
+import hashlib
+import io
 import json
+import mmap
+import multiprocessing
 import os
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from tkinter import ttk
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+
+# tkinter se importa solo al abrir la interfaz gráfica (ver _load_tk), así la
+# línea de comandos funciona en servidores sin pantalla.
+tk = ttk = filedialog = messagebox = None
+
+# pyarrow (opcional) se importa solo si se pide salida Parquet / Arrow
+# (ver _load_pyarrow).
+pa = pq = None
+
+# zstandard (opcional) solo se importa para la compresión zstd
+zstandard = None
 
 # Valor por defecto en MB para el tamaño máximo de cada CSV
 DEFAULT_MAX_MB = 19
 
+# Tamaño de cada bloque leído del JSON en modo streaming (bytes)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Buffer de escritura de cada CSV (bytes)
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Volcados de WRITE_BUFFER_SIZE en cola por fichero con escritura en
+# segundo plano (PipelinedFileIO): como mucho ~8 MB en memoria por fichero
+WRITE_QUEUE_CHUNKS = 8
+
+# Con varios procesos, las tablas más grandes que 2 bloques se reparten por
+# rangos de filas de este tamaño (bytes del JSON) entre los procesos
+ROW_RANGE_BYTES = 4 * 1024 * 1024
+
+# Compresión opcional de los CSV -> extensión añadida a <nombre>_N.csv
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Nivel de compresión de cada formato (rápido, buena relación)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Margen para el cierre del stream comprimido (trailer gzip / epílogo zstd)
+COMPRESSED_TRAILER_BYTES = 64
+
+# Formatos de salida: CSV dividido (por defecto) o columnares con pyarrow
+OUTPUT_FORMATS = ("csv", "parquet", "arrow")
+
+# Filas por bloque (row group Parquet / record batch Arrow)
+COLUMNAR_BLOCK_ROWS = 50_000
+
+# Campos multi-idioma: columnas tal cual (None), un CSV por idioma ("split")
+# o formato largo ID / campo / idioma / valor ("long")
+LANGUAGE_LAYOUTS = ("split", "long")
+
+# Cada cuánto (ms) la GUI recoge el progreso / log del hilo de conversión
+UI_POLL_MS = 100
+
 # Textos ES / EN
 TEXTS = {
     "es": {
@@ -18,8 +84,23 @@ TEXTS = {
             "(catalogue, products, product_formats, mat_*, etc.)."
         ),
         "button": "Seleccionar JSON y convertir",
+        "cancel_button": "Cancelar",
+        "preview_button": "Vista previa…",
+        "preview_title": "Vista previa: {name}",
+        "preview_columns": ["Tabla", "Columnas", "Filas", "MB (est.)", "Ficheros"],
+        "preview_summary": "{tables} tablas, ~{files} ficheros. Filas con ~: estimadas con una muestra ({seconds:.1f} s).",
         "size_label": "Tamaño máximo por archivo (MB):",
         "delim_label": "Delimitador CSV:",
+        "format_label": "Formato:",
+        "compress_label": "Compresión:",
+        "compressed_limit_label": "Límite sobre tamaño comprimido",
+        "tables_label": "Tablas:",
+        "columns_label": "Columnas:",
+        "languages_label": "Idiomas:",
+        "language_layout_label": "Multi-idioma:",
+        "flatten_tables_label": "Tablas embebidas en CSV aparte",
+        "assets_manifest_label": "Lista de assets (assets_X.csv)",
+        "dedupe_label": "Duplicados:",
         "lang_label": "Idioma:",
         "progress_label": "Progreso:",
         "log_label": "Log:",
@@ -33,6 +114,12 @@ TEXTS = {
             "• Formato simple: la raíz debe ser un array de productos.\n"
             "• Formato Sales Layer: debe contener data_schema + data."
         ),
+        "err_pyarrow_missing": (
+            "La salida Parquet / Arrow necesita pyarrow (pip install pyarrow)."
+        ),
+        "err_zstd_missing": (
+            "La compresión zstd necesita zstandard (pip install zstandard)."
+        ),
 
         "err_convert_title": "Error",
         "err_convert_saved": (
@@ -62,17 +149,45 @@ TEXTS = {
         "log_exporting_tables": "Exportando todas las tablas de Sales Layer (modo genérico)…",
         "log_table_nodata": "Tabla {table}: sin datos, se omite.",
         "log_table_rows": "Tabla {table}: {rows} filas.",
+        "log_indexing_tables": "Localizando las tablas dentro del JSON…",
+        "log_tables_selected": "Tablas seleccionadas: {selected} de {total}.",
+        "log_table_nocolumns": "Tabla {table}: ninguna columna seleccionada, se omite.",
+        "log_parallel_tables": "Exportando {tables} tablas con {workers} procesos…",
+        "log_table_unchanged": "Tabla {table}: sin cambios, se omite.",
+        "log_table_same_rows": "Tabla {table}: JSON reformateado con las mismas filas; ficheros idénticos a los anteriores.",
+        "log_table_delta": "Tabla {table}: {rows} filas nuevas o modificadas (delta).",
+        "log_table_delta_baseline": "Tabla {table}: primera ejecución, sin delta (se guardan las huellas de sus filas).",
+        "log_assets_written": "Assets: {rows} URLs distintas en assets_X.csv.",
+        "log_incremental_summary": "Modo incremental: {changed} tablas con cambios, {skipped} sin cambios.",
+        "log_resume_complete": "Tabla {table}: ya convertida (checkpoint), se omite.",
+        "log_resume_partial": "Tabla {table}: se reanuda en la fila {rows} ({table}_{next}…).",
+        "log_resume_mismatch": "Tabla {table}: {filename} no coincide con el checkpoint, se repite desde ahí.",
         "log_splitting_products": "Dividiendo y guardando products_*.csv…",
         "log_splitting_variants": "Dividiendo y guardando variants_*.csv…",
         "log_splitting_categories": "Dividiendo y guardando categories_*.csv…",
+        "log_dedupe_scan": "Buscando la última aparición de cada referencia…",
+        "log_duplicates_dropped": (
+            "Duplicados descartados (sku/id, se conserva la {policy}): "
+            "{prod} productos, {var} variantes."
+        ),
         "log_saving_file": "Guardado: {filename}",
         "log_finished": "Conversión terminada.",
+        "log_preview": "Vista previa de {path}…",
+        "log_report_saved": "Informe de ejecución: {path}",
+        "log_report_failed": "No se pudo guardar el informe de ejecución: {error}",
+        "log_cancelled": "Conversión cancelada por el usuario.",
         "log_error_read_json": "ERROR al leer JSON: {error}",
         "log_error_format": "ERROR: Formato JSON no reconocido.",
 
         "errfile_header": "=== Sales Layer JSON → CSV Converter ===\nConversión fallida.\n\n",
         "errfile_error_title": "=== Error ===\n",
         "errfile_log_title": "\n=== Log ===\n",
+
+        "cli_failed": "ERROR al convertir {path}: {error}",
+        "cli_summary": "{ok} JSON convertidos, {failed} con errores.",
+        "cli_batch_start": "Convirtiendo {n} JSON, {jobs} a la vez (los más grandes primero)…",
+        "cli_job_crashed": "el proceso de conversión terminó de forma inesperada ({error})",
+        "cli_job_retry": "Un proceso del lote terminó de forma inesperada; se repite {path} por separado.",
     },
     "en": {
         "window_title": "JSON → CSV (split) for Sales Layer",
@@ -83,8 +198,23 @@ TEXTS = {
             "(catalogue, products, product_formats, mat_*, etc.)."
         ),
         "button": "Select JSON and convert",
+        "cancel_button": "Cancel",
+        "preview_button": "Preview…",
+        "preview_title": "Preview: {name}",
+        "preview_columns": ["Table", "Columns", "Rows", "MB (est.)", "Files"],
+        "preview_summary": "{tables} tables, ~{files} files. Rows with ~ are estimated from a sample ({seconds:.1f} s).",
         "size_label": "Max file size (MB):",
         "delim_label": "CSV delimiter:",
+        "format_label": "Format:",
+        "compress_label": "Compression:",
+        "compressed_limit_label": "Limit applies to compressed size",
+        "tables_label": "Tables:",
+        "columns_label": "Columns:",
+        "languages_label": "Languages:",
+        "language_layout_label": "Multilingual:",
+        "flatten_tables_label": "Embedded tables to separate CSVs",
+        "assets_manifest_label": "Asset list (assets_X.csv)",
+        "dedupe_label": "Duplicates:",
         "lang_label": "Language:",
         "progress_label": "Progress:",
         "log_label": "Log:",
@@ -98,6 +228,12 @@ TEXTS = {
             "• Simple format: root must be an array of products.\n"
             "• Sales Layer format: must contain data_schema + data."
         ),
+        "err_pyarrow_missing": (
+            "Parquet / Arrow output requires pyarrow (pip install pyarrow)."
+        ),
+        "err_zstd_missing": (
+            "zstd compression requires zstandard (pip install zstandard)."
+        ),
 
         "err_convert_title": "Error",
         "err_convert_saved": (
@@ -127,21 +263,53 @@ TEXTS = {
         "log_exporting_tables": "Exporting all Sales Layer tables (generic mode)…",
         "log_table_nodata": "Table {table}: no data, skipped.",
         "log_table_rows": "Table {table}: {rows} rows.",
+        "log_indexing_tables": "Locating tables inside the JSON…",
+        "log_tables_selected": "Selected tables: {selected} of {total}.",
+        "log_table_nocolumns": "Table {table}: no columns selected, skipped.",
+        "log_parallel_tables": "Exporting {tables} tables with {workers} processes…",
+        "log_table_unchanged": "Table {table}: unchanged, skipped.",
+        "log_table_same_rows": "Table {table}: reformatted JSON with the same rows; files identical to the previous ones.",
+        "log_table_delta": "Table {table}: {rows} new or changed rows (delta).",
+        "log_table_delta_baseline": "Table {table}: first run, no delta (row digests saved).",
+        "log_assets_written": "Assets: {rows} distinct URLs in assets_X.csv.",
+        "log_incremental_summary": "Incremental mode: {changed} tables changed, {skipped} unchanged.",
+        "log_resume_complete": "Table {table}: already converted (checkpoint), skipped.",
+        "log_resume_partial": "Table {table}: resuming at row {rows} ({table}_{next}…).",
+        "log_resume_mismatch": "Table {table}: {filename} does not match the checkpoint, redone from there.",
         "log_splitting_products": "Splitting and saving products_*.csv…",
         "log_splitting_variants": "Splitting and saving variants_*.csv…",
         "log_splitting_categories": "Splitting and saving categories_*.csv…",
+        "log_dedupe_scan": "Finding the last occurrence of each reference…",
+        "log_duplicates_dropped": (
+            "Duplicates dropped (sku/id, keeping the {policy}): "
+            "{prod} products, {var} variants."
+        ),
         "log_saving_file": "Saved: {filename}",
         "log_finished": "Conversion finished.",
+        "log_preview": "Previewing {path}…",
+        "log_report_saved": "Run report: {path}",
+        "log_report_failed": "Could not save the run report: {error}",
+        "log_cancelled": "Conversion cancelled by the user.",
         "log_error_read_json": "ERROR reading JSON: {error}",
         "log_error_format": "ERROR: JSON format not recognized.",
 
         "errfile_header": "=== Sales Layer JSON → CSV Converter ===\nConversion failed.\n\n",
         "errfile_error_title": "=== Error ===\n",
         "errfile_log_title": "\n=== Log ===\n",
+
+        "cli_failed": "ERROR converting {path}: {error}",
+        "cli_summary": "{ok} JSON converted, {failed} failed.",
+        "cli_batch_start": "Converting {n} JSON files, {jobs} at a time (largest first)…",
+        "cli_job_crashed": "the conversion process ended unexpectedly ({error})",
+        "cli_job_retry": "A batch process ended unexpectedly; converting {path} again on its own.",
     },
 }
 
 
+class ConversionCancelled(Exception):
+    """La conversión se ha detenido a petición del usuario."""
+
+
 def clean_description(html):
     """Elimina comentarios <!-- --> de la descripción y hace trim."""
     if not html:
@@ -159,25 +327,330 @@ def safe_ref(value, fallback):
     return value
 
 
+# Normalización con str.replace y no con una sola pasada de str.translate:
+# replace sin coincidencias no copia la cadena y con ellas recorre el texto
+# en C (memchr), mientras que translate con tabla dict va carácter a
+# carácter en cuanto el texto no es ASCII. Medido en CPython 3.11: translate
+# es 4 veces más lento en textos de catálogo y 10 veces en HTML multilínea
+# con acentos (tests/test_escape_csv.py comprueba el resultado).
+def normalize_csv_text(value):
+    """
+    Normaliza un valor para CSV sin entrecomillar: saltos de línea y
+    tabuladores pasan a espacio y se quitan los espacios extremos.
+    """
+    if value is None:
+        return ""
+    if type(value) is int or type(value) is float:
+        return str(value)
+    s = str(value)
+
+    # str.replace sin coincidencias no copia la cadena: "\r\n" solo se busca
+    # si hay algún "\r" y el resto de pasadas son gratis en textos limpios
+    if "\r" in s:
+        s = s.replace("\r\n", " ").replace("\r", " ")
+    return s.replace("\n", " ").replace("\t", " ").strip()
+
+
 def escape_csv(value):
     """Escapa un valor para CSV, eliminando saltos de línea y tabuladores."""
     if value is None:
         return '""'
+    # Los números nunca llevan comillas, saltos ni espacios extremos
+    if type(value) is int or type(value) is float:
+        return f'"{value}"'
     s = str(value)
 
     # Normalizar saltos de línea y tabuladores
-    s = s.replace("\r\n", " ")
-    s = s.replace("\n", " ")
-    s = s.replace("\r", " ")
-    s = s.replace("\t", " ")
+    if "\r" in s:
+        s = s.replace("\r\n", " ").replace("\r", " ")
+    s = s.replace("\n", " ").replace("\t", " ")
+
+    # Limpiar espacios extremos y escapar comillas dobles
+    return '"' + s.strip().replace('"', '""') + '"'
+
+
+def open_compressor(compression, raw, filename, lang="es"):
+    """Stream binario que comprime (gzip / zstd) hacia el fichero raw."""
+    global zstandard
+    if compression == "gzip":
+        # mtime=0: mismo contenido -> mismo .gz
+        return gzip.GzipFile(
+            filename=filename,
+            mode="wb",
+            compresslevel=GZIP_LEVEL,
+            fileobj=raw,
+            mtime=0,
+        )
+    if zstandard is None:
+        try:
+            import zstandard
+        except ImportError:
+            texts = TEXTS.get(lang, TEXTS["es"])
+            raise Exception(texts["err_zstd_missing"])
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw)
+
+
+# Escrituras a disco simultáneas (conversión por lotes, ver run_batch):
+# semáforo compartido entre procesos o None (sin límite)
+_output_slots = None
+
+
+class _ThrottledFileIO(io.FileIO):
+    """FileIO cuyas escrituras esperan un hueco libre en _output_slots."""
+
+    def write(self, data):
+        with _output_slots:
+            return super().write(data)
+
+
+class PipelinedFileIO(io.RawIOBase):
+    """
+    Fichero de salida escrito por un hilo propio: write() deja cada bloque
+    (un volcado del buffer, ~1 MB) en una cola de WRITE_QUEUE_CHUNKS y
+    vuelve enseguida, así la conversión de filas sigue mientras el hilo
+    espera al disco (shares de red). Con la cola llena write() espera, de
+    modo que la memoria queda acotada. Los errores de escritura del hilo
+    se relanzan en el siguiente write() o en close().
+    """
+
+    def __init__(self, full_path):
+        super().__init__()
+        file_class = io.FileIO if _output_slots is None else _ThrottledFileIO
+        self._file = file_class(full_path, "wb")
+        self._queue = queue.Queue(WRITE_QUEUE_CHUNKS)
+        self._error = None
+        self._position = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def writable(self):
+        return True
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                view = memoryview(chunk)
+                while view:
+                    view = view[self._file.write(view) :]
+            except BaseException as e:
+                self._error = e
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        # BufferedWriter reutiliza su buffer: el hilo recibe una copia
+        chunk = bytes(data)
+        self._queue.put(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self):
+        """Bytes entregados (escritos o aún en la cola)."""
+        return self._position
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._queue.put(None)
+            self._thread.join()
+            self._file.close()
+        finally:
+            super().close()
+        if self._error is not None:
+            raise self._error
+
+
+def open_output(full_path, pipelined=False):
+    """
+    Fichero binario de salida con buffer de WRITE_BUFFER_SIZE. Con
+    _output_slots cada volcado del buffer (~1 MB) ocupa un hueco.
+    pipelined=True: los volcados los escribe un hilo (PipelinedFileIO).
+    """
+    if pipelined:
+        return io.BufferedWriter(PipelinedFileIO(full_path), WRITE_BUFFER_SIZE)
+    if _output_slots is None:
+        return open(full_path, "wb", buffering=WRITE_BUFFER_SIZE)
+    return io.BufferedWriter(_ThrottledFileIO(full_path, "wb"), WRITE_BUFFER_SIZE)
+
+
+class RollingCsvSink:
+    """
+    Escritor CSV incremental: recibe las filas según se generan, las escribe
+    con un fichero con buffer y rota a <base_name>_<n+1>.csv cuando la
+    siguiente fila superaría max_bytes. Produce exactamente los mismos
+    ficheros que el antiguo split_by_size en memoria.
+    Cada fila se codifica a UTF-8 una sola vez: su tamaño es el del bytes y
+    esos mismos bytes van al fichero binario (el BOM se escribe a mano).
+    compression "gzip" / "zstd" comprime en la misma pasada a
+    <base_name>_<n>.csv.gz / .csv.zst. Con compressed_limit=True max_bytes
+    limita los bytes comprimidos en disco en lugar de los del CSV.
+    pipelined_writes=True escribe a disco desde un hilo por fichero
+    mientras se siguen formateando filas (ver PipelinedFileIO).
+    first_index: número del primer fichero (al reanudar una tabla).
+    on_file_closed(filename, rows_written) se llama al cerrar cada fichero
+    completo (al rotar o en close(); no en discard()).
+    """
+
+    def __init__(
+        self,
+        base_path,
+        base_name,
+        header,
+        max_bytes,
+        lang,
+        log_fn=None,
+        compression=None,
+        compressed_limit=False,
+        pipelined_writes=False,
+        first_index=1,
+        on_file_closed=None,
+    ):
+        self.lang = lang
+        self.texts = TEXTS.get(lang, TEXTS["es"])
+        self.base_path = base_path
+        self.base_name = base_name
+        self.header = header
+        self._header = codecs.BOM_UTF8 + header.encode("utf-8")
+        self.header_bytes = len(self._header) - len(codecs.BOM_UTF8)
+        self.max_bytes = max_bytes
+        self.log_fn = log_fn
+        self.on_file_closed = on_file_closed
+        self.file_index = first_index
+        self.rows_written = 0
+        self.files = []
+        # Tiempo dentro del sink: codificar, comprimir y escribir a disco
+        self.write_seconds = 0.0
+        self.compression = compression
+        self.compressed_limit = bool(compression) and compressed_limit
+        self.pipelined_writes = pipelined_writes
+        self._f = None
+        self._raw = None
+        self._codec = None
+        self._filename = None
+        self._bytes = 0
+        # Límite comprimido: bytes ya comprimidos en disco (exactos tras cada
+        # _sync) y bytes de CSV escritos desde entonces
+        self._flushed = 0
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self):
+        self._filename = f"{self.base_name}_{self.file_index}.csv"
+        full_path = os.path.join(self.base_path, self._filename)
+        if self.compression:
+            self._filename += COMPRESSIONS[self.compression]
+            full_path += COMPRESSIONS[self.compression]
+            self._raw = open_output(full_path, self.pipelined_writes)
+            self._codec = open_compressor(
+                self.compression, self._raw, self._filename, self.lang
+            )
+            self._f = io.BufferedWriter(self._codec, WRITE_BUFFER_SIZE)
+        else:
+            self._f = open_output(full_path, self.pipelined_writes)
+        self._f.write(self._header)
+        self._bytes = self.header_bytes
+        self._flushed = 0
+        self._pending = len(self._header)
+
+    def _sync(self):
+        """Vacía el compresor (sync flush) para conocer los bytes en disco."""
+        self._f.flush()
+        self._codec.flush()
+        self._flushed = self._raw.tell()
+        self._pending = 0
+
+    def _fits_compressed(self, row_bytes):
+        """
+        ¿Cabe la fila sin superar max_bytes comprimidos? Cota segura: los
+        bytes aún no vaciados ocupan como mucho su tamaño + 1 % comprimidos.
+        Solo se vacía el compresor cuando la cota deja de cumplirse.
+        """
+
+        def bound(pending):
+            return self._flushed + pending + pending // 100 + COMPRESSED_TRAILER_BYTES
+
+        if bound(self._pending + row_bytes) <= self.max_bytes:
+            return True
+        self._sync()
+        return bound(row_bytes) <= self.max_bytes
+
+    def _close_current(self):
+        self._f.close()
+        if self._raw is not None and not self._raw.closed:
+            # GzipFile no cierra el fileobj recibido
+            self._raw.close()
+        self._f = self._raw = self._codec = None
+        self.files.append(self._filename)
+        if self.log_fn:
+            self.log_fn(self.texts["log_saving_file"].format(filename=self._filename))
+        if self.on_file_closed:
+            self.on_file_closed(self._filename, self.rows_written)
+
+    def write_row(self, row):
+        """Añade una fila (SIN \n); abre el primer fichero al llegar la primera."""
+        self.write_bytes((row + "\n").encode("utf-8"))
+
+    def write(self, row_with_newline):
+        """Añade una fila ya terminada en \n (interfaz de fichero para csv.writer)."""
+        self.write_bytes(row_with_newline.encode("utf-8"))
+
+    def write_bytes(self, data):
+        """Añade una fila ya codificada en UTF-8 y terminada en \n."""
+        started = time.perf_counter()
+        row_bytes = len(data)
 
-    # Limpiar espacios extremos
-    s = s.strip()
+        if self._f is None:
+            self._open()
+        if self.compressed_limit:
+            full = not self._fits_compressed(row_bytes)
+        else:
+            full = self._bytes + row_bytes > self.max_bytes
+        if full:
+            # Cerramos fichero actual y empezamos otro
+            self._close_current()
+            self.file_index += 1
+            self._open()
 
-    # Escapar comillas dobles
-    s = s.replace('"', '""')
+        self._f.write(data)
+        self._bytes += row_bytes
+        self._pending += row_bytes
+        self.rows_written += 1
+        self.write_seconds += time.perf_counter() - started
 
-    return f'"{s}"'
+    def close(self):
+        if self._f is not None:
+            started = time.perf_counter()
+            self._close_current()
+            self.write_seconds += time.perf_counter() - started
+
+    def discard(self):
+        """
+        Cierre tras un error a mitad de fichero: el fichero en curso se
+        borra sin pasar por files ni on_file_closed (un checkpoint solo
+        registra ficheros completos). Los ya rotados se quedan.
+        """
+        if self._f is None:
+            return
+        # El error que cuenta es el que cortó la tabla, no el del cierre
+        with contextlib.suppress(Exception):
+            self._f.close()
+        if self._raw is not None:
+            with contextlib.suppress(Exception):
+                self._raw.close()
+        self._f = self._raw = self._codec = None
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(self.base_path, self._filename))
 
 
 def split_by_size(
@@ -189,53 +662,43 @@ def split_by_size(
     lang,
     log_fn=None,
     ui_update_fn=None,
+    compression=None,
+    compressed_limit=False,
 ):
     """
     Divide las filas en varios CSV de tamaño < max_bytes.
     base_path: ruta donde se guardan los ficheros
     base_name: nombre base de archivo (sin _n y sin .csv)
     header: string con la cabecera (terminado en \n)
-    rows: lista de strings (cada row SIN \n)
+    rows: iterable de strings (cada row SIN \n)
+    compression / compressed_limit: ver RollingCsvSink.
     """
-    texts = TEXTS.get(lang, TEXTS["es"])
-    file_index = 1
-    current = header
-    current_bytes = len(current.encode("utf-8"))
-
-    def save_file(index, content):
-        filename = f"{base_name}_{index}.csv"
-        full_path = os.path.join(base_path, filename)
-        with open(full_path, "w", encoding="utf-8-sig", newline="") as f:
-            f.write(content)
-        if log_fn:
-            log_fn(texts["log_saving_file"].format(filename=filename))
-
-    for i, row in enumerate(rows, start=1):
-        row_with_newline = row + "\n"
-        row_bytes = len(row_with_newline.encode("utf-8"))
-
-        if current_bytes + row_bytes > max_bytes:
-            # Cerramos fichero actual y empezamos otro
-            save_file(file_index, current)
-            file_index += 1
-            current = header + row_with_newline
-            current_bytes = len(current.encode("utf-8"))
-        else:
-            current += row_with_newline
-            current_bytes += row_bytes
-
-        if ui_update_fn and i % 100 == 0:
-            ui_update_fn()
+    with RollingCsvSink(
+        base_path,
+        base_name,
+        header,
+        max_bytes,
+        lang,
+        log_fn,
+        compression=compression,
+        compressed_limit=compressed_limit,
+    ) as sink:
+        for i, row in enumerate(rows, start=1):
+            sink.write_row(row)
 
-    if current != header:
-        save_file(file_index, current)
+            if ui_update_fn and i % 100 == 0:
+                ui_update_fn()
 
 
-def save_error_log(log_text, error_message, json_path, lang="es"):
-    """Guarda el log y el error en un archivo .txt al lado del JSON."""
+def save_error_log(log_text, error_message, json_path, lang="es", base_path=None):
+    """
+    Guarda el log y el error en un archivo .txt al lado del JSON
+    (o en base_path si se indica).
+    """
     texts = TEXTS.get(lang, TEXTS["es"])
     try:
-        base_path = os.path.dirname(json_path) or "."
+        base_path = base_path or os.path.dirname(json_path) or "."
+        os.makedirs(base_path, exist_ok=True)
         filename = "conversion_error_log.txt"
         full_path = os.path.join(base_path, filename)
 
@@ -252,395 +715,3843 @@ def save_error_log(log_text, error_message, json_path, lang="es"):
 
 
 # ------------------------------------------------------------
-#  MODO 1: JSON simple (array de productos tipo BigCommerce)
+#  LECTURA INCREMENTAL DEL JSON (streaming)
 # ------------------------------------------------------------
-def generate_csv_from_products(
-    products,
-    base_path,
-    max_bytes,
-    delimiter,
-    lang,
-    log_fn=None,
-    ui_update_fn=None,
-    progress_set_total=None,
-    progress_step=None,
-):
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_NUM_TAIL_RE = re.compile(r"[0-9.eE+\-]*")
+
+
+class JsonStreamReader:
     """
-    Motor original: array de objetos con campos id/name/sku/variants/categories…
-    Genera products_X.csv, variants_X.csv, categories_X.csv.
+    Lector incremental de JSON sobre un fichero binario.
+    Recorre la estructura (objetos / arrays) por eventos y decodifica cada
+    valor hoja con el decoder en C de json, así que la memoria queda
+    limitada al elemento que se está leyendo y no al tamaño del fichero.
+    Los errores indican la línea, columna y carácter dentro del fichero
+    (como json.load); si la lectura empezó a mitad de fichero, el byte.
     """
-    texts = TEXTS.get(lang, TEXTS["es"])
 
-    # Pre-cálculo de unidades de trabajo: productos + variantes + categorías
-    num_products = len(products)
-    num_variants = 0
-    category_set_pre = set()
+    def __init__(self, fileobj, chunk_size=STREAM_CHUNK_SIZE):
+        self._f = fileobj
+        self._chunk_size = chunk_size
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._start = fileobj.tell()
+        self.bytes_read = 0
+        # Texto ya descartado del buffer: caracteres, saltos de línea y
+        # carácter (absoluto) en que empieza la línea actual
+        self._chars_done = 0
+        self._lines_done = 0
+        self._line_start = 0
 
-    for item in products:
-        variants = item.get("variants", []) or []
-        num_variants += len(variants)
+    def tell(self):
+        """Posición en bytes (dentro del fichero) del cursor de lectura."""
+        pending = len(self._text.getstate()[0])
+        unread = len(self._buf[self._pos:].encode("utf-8"))
+        return self._start + self.bytes_read - pending - unread
 
-        categories = item.get("categories", []) or []
-        for c in categories:
-            if isinstance(c, dict):
-                name_cat = (c.get("name") or "").strip()
-            else:
-                name_cat = str(c).strip()
-            if name_cat:
-                category_set_pre.add(name_cat)
+    def _fill(self, min_chars=0):
+        """Lee otro bloque del fichero descartando lo ya consumido."""
+        if self._pos:
+            lines = self._buf.count("\n", 0, self._pos)
+            if lines:
+                self._lines_done += lines
+                self._line_start = (
+                    self._chars_done + self._buf.rindex("\n", 0, self._pos) + 1
+                )
+            self._chars_done += self._pos
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        data = self._f.read(max(self._chunk_size, min_chars))
+        self.bytes_read += len(data)
+        if not data:
+            self._eof = True
+        self._buf += self._text.decode(data, final=not data)
 
-    num_categories = len(category_set_pre)
-    total_units = num_products + num_variants + num_categories
+    def _error(self, msg, pos=None):
+        """JSONDecodeError en buffer[pos] (por defecto el cursor)."""
+        pos = self._pos if pos is None else pos
+        error = json.JSONDecodeError(msg, self._buf, pos)
+        if self._start:
+            # Sin las líneas anteriores a start: posición en bytes
+            pending = len(self._text.getstate()[0])
+            unread = len(self._buf[pos:].encode("utf-8"))
+            error.pos = self._start + self.bytes_read - pending - unread
+            error.lineno = error.colno = None
+            error.args = (f"{msg}: byte {error.pos}",)
+            return error
+        lines = self._buf.count("\n", 0, pos)
+        line_start = self._line_start
+        if lines:
+            line_start = self._chars_done + self._buf.rindex("\n", 0, pos) + 1
+        error.pos = self._chars_done + pos
+        error.lineno = self._lines_done + lines + 1
+        error.colno = error.pos - line_start + 1
+        error.args = (
+            f"{msg}: line {error.lineno} column {error.colno} (char {error.pos})",
+        )
+        return error
 
-    if progress_set_total and total_units > 0:
-        progress_set_total(total_units)
+    def peek(self):
+        """Salta espacios y devuelve el siguiente carácter ('' al final)."""
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                return ""
+            self._fill()
 
-    product_rows = []
-    variant_rows = []
-    category_set = set()
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
 
-    product_header = (
-        delimiter.join(
-            [
-                "reference",
-                "name",
-                "description",
-                "brand",
-                "price",
-                "retail_price",
-                "sale_price",
-                "cost_price",
-                "weight",
-                "width",
-                "height",
-                "depth",
-                "images",
-                "category_references",
-            ]
-        )
-        + "\n"
-    )
+    def read_value(self):
+        """Decodifica el siguiente valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise self._error(e.msg, e.pos) from None
+                # Valor incompleto: ampliamos el buffer (crecimiento geométrico)
+                self._fill(len(self._buf) - self._pos)
+                continue
+            # Un número al final del buffer puede estar cortado ("12" de "123")
+            if (
+                not self._eof
+                and isinstance(value, (int, float))
+                and _NUM_TAIL_RE.match(self._buf, end).end() == len(self._buf)
+            ):
+                self._fill(len(self._buf) - self._pos)
+                continue
+            self._pos = end
+            return value
 
-    variant_header = (
-        delimiter.join(
-            [
-                "variant_reference",
-                "product_reference",
-                "price",
-                "retail_price",
-                "sale_price",
-                "cost_price",
-                "weight",
-                "width",
-                "height",
-                "depth",
-                "upc",
-                "inventory_level",
-            ]
-        )
-        + "\n"
-    )
+    def expect_end(self):
+        """Tras el valor raíz solo pueden quedar espacios (como json.load)."""
+        if self.peek() != "":
+            raise self._error("Extra data")
 
-    category_header = (
-        delimiter.join(
-            [
-                "category_reference",
-                "category_name",
-                "parent_reference",
-            ]
-        )
-        + "\n"
-    )
+    def skip_value(self):
+        """Salta el siguiente valor sin cargarlo entero en memoria."""
+        char = self.peek()
+        if char == "[":
+            for _ in self.iter_array():
+                pass
+        elif char == "{":
+            for _ in self.iter_object():
+                self.skip_value()
+        else:
+            self.read_value()
 
-    total_items = len(products)
-    if log_fn:
-        log_fn(texts["log_processing_products"].format(total=total_items))
-
-    for idx, item in enumerate(products, start=1):
-        ref = safe_ref(item.get("sku"), item.get("id"))
-        name = safe_ref(item.get("name"), ref)
-        desc = clean_description(item.get("description"))
-        brand = (item.get("brand") or {}).get("name", "")
-        images = ",".join(item.get("images", []))
-
-        # categorías
-        categories = item.get("categories", []) or []
-        cat_refs = []
-        for c in categories:
-            if isinstance(c, dict):
-                name_cat = (c.get("name") or "").strip()
-            else:
-                name_cat = str(c).strip()
-            if not name_cat:
-                continue
-            category_set.add(name_cat)
-            cat_refs.append(name_cat.replace(" ", "_"))
-        cats_str = ",".join(cat_refs)
+    def iter_array(self, inside=False):
+        """
+        Devuelve los elementos de un array uno a uno. inside=True: el cursor
+        ya está dentro del array, al principio de un elemento (o en el ]).
+        """
+        if not inside:
+            self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
 
-        product_row = delimiter.join(
-            [
-                escape_csv(ref),
-                escape_csv(name),
-                escape_csv(desc),
-                escape_csv(brand),
-                str(item.get("price", "") or ""),
-                str(item.get("retail_price", "") or ""),
-                str(item.get("sale_price", "") or ""),
-                str(item.get("cost_price", "") or ""),
-                str(item.get("weight", "") or ""),
-                str(item.get("width", "") or ""),
-                str(item.get("height", "") or ""),
-                str(item.get("depth", "") or ""),
-                escape_csv(images),
-                escape_csv(cats_str),
-            ]
-        )
-        product_rows.append(product_row)
+    def iter_object(self):
+        """
+        Devuelve las claves de un objeto una a una.
+        Quien itera debe consumir el valor (read_value / skip_value / iter_*)
+        antes de pedir la siguiente clave.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("Expecting property name enclosed in double quotes")
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self._pos -= 1
+                raise self._error("Expecting ',' delimiter")
 
-        if progress_step:
-            progress_step(1)
 
-        # Variantes
-        variants = item.get("variants", []) or []
-        for v in variants:
-            variant_row = delimiter.join(
-                [
-                    escape_csv(v.get("sku") or v.get("id") or ""),
-                    escape_csv(ref),
-                    str(v.get("price", "") or ""),
-                    str(v.get("retail_price", "") or ""),
-                    str(v.get("sale_price", "") or ""),
-                    str(v.get("cost_price", "") or ""),
-                    str(v.get("weight", "") or ""),
-                    str(v.get("width", "") or ""),
-                    str(v.get("height", "") or ""),
-                    escape_csv(v.get("upc") or ""),
-                    str(v.get("inventory_level", "") or ""),
-                ]
-            )
-            variant_rows.append(variant_row)
+class ProductArrayStream:
+    """Array simple de productos leído elemento a elemento (re-iterable)."""
 
-            if progress_step:
-                progress_step(1)
+    def __init__(self, json_path):
+        self.path = json_path
+        self.size = os.path.getsize(json_path)
+        self._reader = None
 
-        if ui_update_fn and idx % 50 == 0:
-            ui_update_fn()
-            if log_fn:
-                log_fn(
-                    texts["log_processed_products"].format(
-                        idx=idx, total=total_items
-                    )
-                )
+    @property
+    def bytes_read(self):
+        return self._reader.bytes_read if self._reader else 0
 
-    if log_fn:
-        log_fn(
-            texts["log_products_summary"].format(
-                prod=len(product_rows),
-                var=len(variant_rows),
-                cats=len(category_set),
-            )
-        )
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            self._reader = JsonStreamReader(f)
+            yield from self._reader.iter_array()
+            self._reader.expect_end()
 
-    # Categorías (usamos category_set_pre para no perder ninguna)
-    category_rows = []
-    for cat in sorted(category_set_pre):
-        ref_cat = cat.strip().replace(" ", "_")
-        category_rows.append(
-            delimiter.join([escape_csv(ref_cat), escape_csv(cat), ""])
-        )
 
-        if progress_step:
-            progress_step(1)
+class SalesLayerJsonStream:
+    """
+    Exportación de Sales Layer leída en streaming.
+    data_schema / data_schema_info (y el resto de claves de la raíz salvo
+    data) se cargan al abrir; las filas de cada data[tabla] se leen una a
+    una con iter_tables().
+    """
 
-    if log_fn:
-        log_fn(texts["log_splitting_products"])
-    split_by_size(
-        base_path,
-        "products",
-        product_header,
-        product_rows,
-        max_bytes,
-        lang,
-        log_fn,
-        ui_update_fn,
-    )
+    def __init__(self, json_path, meta):
+        self.path = json_path
+        self.size = os.path.getsize(json_path)
+        self.meta = meta
+        self.data_schema = meta.get("data_schema") or {}
+        self.data_schema_info = meta.get("data_schema_info") or {}
+        self._reader = None
 
-    if log_fn:
-        log_fn(texts["log_splitting_variants"])
-    split_by_size(
-        base_path,
-        "variants",
-        variant_header,
-        variant_rows,
-        max_bytes,
-        lang,
-        log_fn,
-        ui_update_fn,
-    )
+    @property
+    def bytes_read(self):
+        return self._reader.bytes_read if self._reader else 0
 
-    if log_fn:
-        log_fn(texts["log_splitting_categories"])
-    split_by_size(
-        base_path,
-        "categories",
-        category_header,
-        category_rows,
-        max_bytes,
-        lang,
-        log_fn,
-        ui_update_fn,
-    )
+    def tell(self):
+        """Posición exacta (bytes) del lector dentro del fichero."""
+        return self._reader.tell() if self._reader else 0
 
+    def iter_tables(self):
+        """
+        Genera (tabla, filas) en el orden del fichero.
+        filas es un iterador de filas, o None si data[tabla] no es un array.
+        Si el consumidor no agota las filas, se saltan al pedir la siguiente.
+        """
+        with open(self.path, "rb") as f:
+            self._reader = reader = JsonStreamReader(f)
+            for key in reader.iter_object():
+                if key != "data" or reader.peek() != "{":
+                    reader.skip_value()
+                    continue
+                for table_name in reader.iter_object():
+                    if reader.peek() != "[":
+                        reader.skip_value()
+                        yield table_name, None
+                        continue
+                    rows = reader.iter_array()
+                    yield table_name, rows
+                    for _ in rows:
+                        pass
+            reader.expect_end()
 
-# ------------------------------------------------------------
-#  MODO 2: JSON Sales Layer genérico (todas las tablas)
-# ------------------------------------------------------------
-def export_saleslayer_tables(
-    raw,
-    base_path,
-    max_bytes,
-    delimiter,
-    lang,
-    log_fn=None,
-    ui_update_fn=None,
-    progress_set_total=None,
-    progress_step=None,
-):
-    """
-    Recorre data_schema + data y crea un CSV por tabla:
-    catalogue_X.csv, products_X.csv, product_formats_X.csv, mat_tabla_test_X.csv, etc.
-    Usa TODOS los campos definidos en data_schema[tabla].
-    """
-    texts = TEXTS.get(lang, TEXTS["es"])
-    data_schema = raw.get("data_schema", {})
-    data = raw.get("data", {})
-    schema_info = raw.get("data_schema_info", {})
+    def index_tables(self):
+        """
+        Índice de data sobre el fichero mapeado en memoria (JsonTableIndex):
+        posición en bytes de cada array data[tabla] y de cada una de sus filas.
+        """
+        return JsonTableIndex(self.path)
 
-    if log_fn:
-        log_fn(texts["log_exporting_tables"])
 
-    # Calcular total de filas (todas las tablas) para la barra de progreso
-    total_rows = 0
-    for table_name, schema_list in data_schema.items():
-        rows = data.get(table_name)
-        if isinstance(rows, list):
-            total_rows += len(rows)
+# Índice estructural sobre bytes UTF-8 (ningún byte de un carácter multibyte
+# es ASCII, así que comillas y corchetes se reconocen sin decodificar)
+_B_WS_RE = re.compile(rb"[ \t\n\r]*")
+_B_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_B_STRING_RE = re.compile(_B_STRING)
+_B_SCALAR_RE = re.compile(rb"[^,\]}\s]*")
+# Siguiente corchete / llave fuera de cadenas
+_B_BRACKET_RE = re.compile(
+    rb'[^"\[\]{}]*(?:' + _B_STRING + rb'[^"\[\]{}]*)*([\[\]{}])'
+)
 
-    if progress_set_total and total_rows > 0:
-        progress_set_total(total_rows)
 
-    for table_name, schema_list in data_schema.items():
-        rows = data.get(table_name)
-        if not isinstance(rows, list) or not rows:
-            if log_fn:
-                log_fn(texts["log_table_nodata"].format(table=table_name))
-            continue
+def _nested_container_re(depth):
+    """Un array / objeto completo con hasta depth niveles de anidación."""
+    plain = rb'[^"\[\]{}]*'
+    items = plain + rb"(?:" + _B_STRING + plain + rb")*"
+    for _ in range(depth):
+        container = rb"(?:\[" + items + rb"\]|\{" + items + rb"\})"
+        value = rb"(?:" + _B_STRING + rb"|" + container + rb")"
+        items = plain + rb"(?:" + value + plain + rb")*"
+    return container
 
-        if log_fn:
-            log_fn(
-                texts["log_table_rows"].format(
-                    table=table_name, rows=len(rows)
-                )
-            )
 
-        table_info = schema_info.get(table_name, {})
-        headers = []
-        col_meta = []
-        used_headers = set()  # por compatibilidad, aunque ahora no lo necesitamos
-
-        # Construimos cabeceras usando SIEMPRE el nombre original del campo
-        for col in schema_list:
-            if isinstance(col, str):
-                key = col
-            elif isinstance(col, dict):
-                # { "images": [ ... ] } -> "images"
-                key = list(col.keys())[0]
-            else:
-                key = "col"
+# Una fila (con su coma y los espacios que la siguen) en una sola búsqueda
+# del motor de regex; las filas con más anidación se recorren corchete a
+# corchete (_container_end)
+_B_ROW_RE = re.compile(
+    rb"(" + _nested_container_re(6) + rb")[ \t\n\r]*(?:,[ \t\n\r]*)?"
+)
 
-            info = table_info.get(key, {})
-            col_type = info.get("type")  # string, list, image, file, table, numeric…
 
-            header_name = key  # siempre el nombre original
-            used_headers.add(header_name)
+def _json_error(msg, pos):
+    """JSONDecodeError en la posición pos (bytes) del fichero mapeado."""
+    error = json.JSONDecodeError(msg, "", pos)
+    error.lineno = error.colno = None
+    error.args = (f"{msg}: byte {pos}",)
+    return error
 
-            headers.append(escape_csv(header_name))
-            col_meta.append((key, col_type))
 
-        header_line = delimiter.join(headers) + "\n"
+def _map_json_file(f):
+    """
+    Mapea en memoria (solo lectura) el fichero abierto f. mmap no admite
+    ficheros vacíos: se da el mismo error que json.load.
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        raise json.JSONDecodeError("Expecting value", "", 0)
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-        # Función para transformar valor según tipo
-        def transform_value(val, ctype):
-            # Imagen: lista de [STATUS, ID, ORG]
-            if ctype == "image":
-                if isinstance(val, list):
-                    urls = []
-                    for elem in val:
-                        if isinstance(elem, list) and len(elem) >= 3:
-                            urls.append(str(elem[2]))
-                    return " | ".join(urls)
-                return ""
-            # Ficheros: lista de [STATUS, ID, FILE]
-            if ctype == "file":
-                if isinstance(val, list):
-                    files = []
-                    for elem in val:
-                        if isinstance(elem, list) and len(elem) >= 3:
-                            files.append(str(elem[2]))
-                    return " | ".join(files)
-                return ""
-            # Listas (tags, colecciones, etc.)
-            if ctype == "list":
-                if isinstance(val, list):
-                    return ", ".join(str(v) for v in val)
-                return str(val) if val not in (None, "") else ""
-            # Tablas embebidas (ej: Equivalencias)
-            if ctype == "table":
-                try:
-                    return json.dumps(val, ensure_ascii=False)
-                except Exception:
-                    return str(val)
-            # Cualquier otra cosa -> texto plano
-            return "" if val is None else str(val)
 
-        # Construimos filas
-        row_strings = []
-        table_total_rows = len(rows)
+def _container_end(buf, pos):
+    """buf[pos] abre un array / objeto: posición justo después de su cierre."""
+    depth = 0
+    for match in _B_BRACKET_RE.finditer(buf, pos):
+        if buf[match.end() - 1] in b"[{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise _json_error("Unterminated array or object", pos)
 
-        for r_idx, row in enumerate(rows, start=1):
-            out_vals = []
-            for i, (key, ctype) in enumerate(col_meta):
-                val = row[i] if i < len(row) else None
-                out_vals.append(escape_csv(transform_value(val, ctype)))
-            row_strings.append(delimiter.join(out_vals))
 
-            if progress_step:
-                progress_step(1)
+def _value_end(buf, pos):
+    """Posición justo después del valor JSON que empieza en buf[pos]."""
+    char = buf[pos : pos + 1]
+    if char in (b"[", b"{"):
+        match = _B_ROW_RE.match(buf, pos)
+        return match.end(1) if match else _container_end(buf, pos)
+    if char == b'"':
+        match = _B_STRING_RE.match(buf, pos)
+        if not match:
+            raise _json_error("Unterminated string", pos)
+        return match.end()
+    end = _B_SCALAR_RE.match(buf, pos).end()
+    if end == pos:
+        raise _json_error("Expecting value", pos)
+    return end
 
-            if ui_update_fn and r_idx % 100 == 0:
-                ui_update_fn()
-                if log_fn:
-                    log_fn(
-                        f"{table_name}: {r_idx}/{table_total_rows} rows processed…"
-                    )
 
-        # Guardar/splitear CSV de esta tabla
-        split_by_size(
-            base_path,
-            table_name,
-            header_line,
-            row_strings,
-            max_bytes,
-            lang,
-            log_fn,
-            ui_update_fn,
-        )
+class JsonTableIndex:
+    """
+    Exportación de Sales Layer mapeada en memoria (mmap) e indexada en un
+    solo recorrido estructural: posición en bytes de cada array data[tabla]
+    y de cada una de sus filas, sin decodificarlas. Sirve para repartir una
+    tabla en rangos de filas (row_ranges), reanudarla en una fila
+    (row_starts) y contar filas exactas; las filas las decodifica después
+    el proceso que convierte cada rango.
+    """
 
+    def __init__(self, json_path):
+        self.path = json_path
+        self.spans = {}
+        self._starts = {}
+        self._ends = {}
+        with open(json_path, "rb") as f:
+            self._map = _map_json_file(f)
+        try:
+            self._scan()
+        except BaseException:
+            self.close()
+            raise
 
-# ------------------------------------------------------------
-#  DETECCIÓN DE FORMATO + LÓGICA PRINCIPAL
-# ------------------------------------------------------------
-def process_json_file(
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def _skip_ws(self, pos):
+        return _B_WS_RE.match(self._map, pos).end()
+
+    def _expect(self, pos, char):
+        pos = self._skip_ws(pos)
+        if self._map[pos : pos + 1] != char:
+            raise _json_error(f"Expecting '{char.decode()}'", pos)
+        return pos + 1
+
+    def _scan_object(self, pos, scan_value):
+        """
+        Recorre el objeto que empieza en pos. scan_value(clave, inicio)
+        devuelve dónde acaba el valor de cada clave. Devuelve el fin del objeto.
+        """
+        buf = self._map
+        pos = self._skip_ws(self._expect(pos, b"{"))
+        if buf[pos : pos + 1] == b"}":
+            return pos + 1
+        while True:
+            match = _B_STRING_RE.match(buf, pos)
+            if not match:
+                raise _json_error(
+                    "Expecting property name enclosed in double quotes", pos
+                )
+            pos = self._skip_ws(self._expect(match.end(), b":"))
+            pos = self._skip_ws(scan_value(json.loads(match.group()), pos))
+            char = buf[pos : pos + 1]
+            if char == b"}":
+                return pos + 1
+            if char != b",":
+                raise _json_error("Expecting ',' delimiter", pos)
+            pos = self._skip_ws(pos + 1)
+
+    def _scan(self):
+        buf = self._map
+
+        def scan_table(table_name, pos):
+            if buf[pos : pos + 1] == b"[":
+                return self._scan_rows(table_name, pos)
+            return _value_end(buf, pos)
+
+        def scan_root(key, pos):
+            if key == "data" and buf[pos : pos + 1] == b"{":
+                return self._scan_object(pos, scan_table)
+            return _value_end(buf, pos)
+
+        end = self._skip_ws(
+            self._scan_object(3 if buf[:3] == codecs.BOM_UTF8 else 0, scan_root)
+        )
+        if end != len(buf):
+            raise _json_error("Extra data", end)
+
+    def _scan_rows(self, table_name, pos):
+        """Indexa las filas del array que empieza en pos; devuelve su fin."""
+        buf = self._map
+        start = pos
+        starts = array.array("Q")
+        ends = array.array("Q")
+        row_re = _B_ROW_RE.match
+        pos = self._skip_ws(pos + 1)
+        while buf[pos : pos + 1] != b"]":
+            match = row_re(buf, pos)
+            if match:
+                starts.append(pos)
+                ends.append(match.end(1))
+                pos = match.end()
+                continue
+            # Fila escalar o con más anidación de la prevista
+            end = _value_end(buf, pos)
+            starts.append(pos)
+            ends.append(end)
+            pos = self._skip_ws(end)
+            char = buf[pos : pos + 1]
+            if char == b",":
+                pos += 1
+            elif char != b"]":
+                raise _json_error("Expecting ',' delimiter", pos)
+            pos = self._skip_ws(pos)
+        self.spans[table_name] = (start, pos + 1)
+        self._starts[table_name] = starts
+        self._ends[table_name] = ends
+        return pos + 1
+
+    def row_count(self, table_name):
+        return len(self._starts[table_name])
+
+    def row_starts(self, table_name):
+        """Posición en bytes del principio de cada fila (array('Q'))."""
+        return self._starts[table_name]
+
+    def row_ranges(self, table_name, max_bytes):
+        """
+        Parte las filas de una tabla en rangos consecutivos de hasta
+        max_bytes (al menos una fila cada uno).
+        Devuelve [(primera_fila, fin_fila, inicio_bytes, fin_bytes), …];
+        buf[inicio_bytes:fin_bytes] son filas completas separadas por comas.
+        """
+        starts = self._starts[table_name]
+        ends = self._ends[table_name]
+        ranges = []
+        first = 0
+        while first < len(starts):
+            # Última fila que acaba dentro de max_bytes desde la primera
+            stop = bisect.bisect_right(ends, starts[first] + max_bytes, lo=first + 1)
+            stop = max(stop, first + 1)
+            ranges.append((first, stop, starts[first], ends[stop - 1]))
+            first = stop
+        return ranges
+
+
+def open_json_export(json_path):
+    """
+    Detecta el formato del JSON sin cargarlo entero.
+    Devuelve ProductArrayStream (array en la raíz), SalesLayerJsonStream
+    (data_schema + data) o None si el formato no se reconoce.
+    """
+    with open(json_path, "rb") as f:
+        reader = JsonStreamReader(f)
+        first = reader.peek()
+        if first == "[":
+            return ProductArrayStream(json_path)
+        if first != "{":
+            reader.read_value()
+            reader.expect_end()
+            return None
+
+        meta = {}
+        has_data = False
+        for key in reader.iter_object():
+            if key != "data":
+                meta[key] = reader.read_value()
+                continue
+            has_data = True
+            if "data_schema" in meta and "data_schema_info" in meta:
+                # Cabecera completa antes de data: no hace falta recorrerla
+                break
+            # data_schema detrás de data: saltamos las filas sin guardarlas
+            reader.skip_value()
+        else:
+            reader.expect_end()
+
+    if has_data and "data_schema" in meta:
+        return SalesLayerJsonStream(json_path, meta)
+    return None
+
+
+# ------------------------------------------------------------
+#  SALIDA COLUMNAR (Parquet / Arrow IPC con pyarrow)
+# ------------------------------------------------------------
+# Tipo de columna -> nombre del tipo de pyarrow
+ARROW_TYPE_NAMES = {"string": "string", "float": "float64", "bool": "bool_"}
+
+TRUE_VALUES = {"1", "true", "yes", "y", "si", "sí", "on"}
+FALSE_VALUES = {"0", "false", "no", "n", "off"}
+
+
+def _load_pyarrow(lang="es"):
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            texts = TEXTS.get(lang, TEXTS["es"])
+            raise Exception(texts["err_pyarrow_missing"])
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+def columnar_number(val):
+    """numeric -> float (None si está vacío o no es un número)."""
+    if type(val) is int or type(val) is float or type(val) is bool:
+        return float(val)
+    if val is None or val == "":
+        return None
+    try:
+        return float(str(val).strip())
+    except ValueError:
+        return None
+
+
+def columnar_bool(val):
+    """boolean -> True / False (None si está vacío o no se reconoce)."""
+    if type(val) is bool:
+        return val
+    if type(val) is int or type(val) is float:
+        return val != 0
+    if val is None:
+        return None
+    text = str(val).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return None
+
+
+class ColumnarSink:
+    """
+    Escritor Parquet / Arrow IPC con la misma rotación que RollingCsvSink:
+    acumula filas (listas de valores ya convertidos), las escribe en bloques
+    de COLUMNAR_BLOCK_ROWS y empieza <base_name>_<n+1> cuando el siguiente
+    bloque superaría max_bytes. Los bytes de cada bloque en disco se estiman
+    con la compresión obtenida en los anteriores y se reserva sitio para el
+    pie del fichero, así que el límite es aproximado.
+    columns: lista de (nombre, tipo) con tipo "string", "float" o "bool".
+    """
+
+    def __init__(
+        self,
+        base_path,
+        base_name,
+        columns,
+        max_bytes,
+        output_format,
+        lang,
+        log_fn=None,
+        block_rows=COLUMNAR_BLOCK_ROWS,
+    ):
+        _load_pyarrow(lang)
+        self.texts = TEXTS.get(lang, TEXTS["es"])
+        self.base_path = base_path
+        self.base_name = base_name
+        self.schema = pa.schema(
+            [(name, getattr(pa, ARROW_TYPE_NAMES[kind])()) for name, kind in columns]
+        )
+        self.max_bytes = max_bytes
+        self.output_format = output_format
+        self.log_fn = log_fn
+        self.block_rows = block_rows
+        self.file_index = 1
+        self.rows_written = 0
+        self.files = []
+        self.write_seconds = 0.0
+        self._records = []
+        self._out = None
+        self._writer = None
+        self._filename = None
+        self._file_rows = 0
+        # Bytes en disco / bytes en memoria de los bloques ya escritos
+        self._ratio = 1.0
+        # Sitio para metadatos por bloque y pie del fichero
+        self._reserve = 4096 + 256 * len(columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self):
+        self._filename = f"{self.base_name}_{self.file_index}.{self.output_format}"
+        self._out = pa.OSFile(os.path.join(self.base_path, self._filename), "wb")
+        if self.output_format == "parquet":
+            self._writer = pq.ParquetWriter(self._out, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(self._out, self.schema)
+        self._file_rows = 0
+
+    def _close_current(self):
+        self._writer.close()
+        self._out.close()
+        self._writer = self._out = None
+        self.files.append(self._filename)
+        if self.log_fn:
+            self.log_fn(self.texts["log_saving_file"].format(filename=self._filename))
+
+    def write_record(self, values):
+        """Añade una fila (valores en el orden de columns)."""
+        self._records.append(values)
+        self.rows_written += 1
+        if len(self._records) >= self.block_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._records:
+            return
+        started = time.perf_counter()
+        # Trasponer filas -> columnas
+        table = pa.Table.from_arrays(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(zip(*self._records), self.schema)
+            ],
+            schema=self.schema,
+        )
+        self._records = []
+
+        offset = 0
+        while offset < table.num_rows:
+            if self._writer is None:
+                self._open()
+            block = table.slice(offset)
+            row_bytes = block.nbytes * self._ratio / block.num_rows
+            room = self.max_bytes - self._reserve - self._out.tell()
+            take = block.num_rows
+            if row_bytes > 0:
+                take = min(take, int(room // row_bytes))
+            if take <= 0:
+                if self._file_rows:
+                    # Cerramos fichero actual y empezamos otro
+                    self._close_current()
+                    self.file_index += 1
+                    continue
+                # Una fila mayor que max_bytes va sola en su fichero (como en CSV)
+                take = 1
+            block = block.slice(0, take)
+            before = self._out.tell()
+            self._writer.write_table(block)
+            if block.nbytes:
+                self._ratio = max((self._out.tell() - before) / block.nbytes, 0.01)
+            self._file_rows += take
+            offset += take
+        self.write_seconds += time.perf_counter() - started
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            started = time.perf_counter()
+            self._close_current()
+            self.write_seconds += time.perf_counter() - started
+
+
+def open_table_sink(
+    output_format,
+    base_path,
+    base_name,
+    header,
+    columns,
+    max_bytes,
+    lang,
+    log_fn=None,
+    compression=None,
+    compressed_limit=False,
+    **csv_options,
+):
+    """
+    RollingCsvSink (header) o ColumnarSink (columns) según output_format.
+    La compresión solo se aplica al CSV (Parquet ya va comprimido).
+    csv_options (pipelined_writes / first_index / on_file_closed) van al
+    RollingCsvSink.
+    """
+    if output_format == "csv":
+        return RollingCsvSink(
+            base_path,
+            base_name,
+            header,
+            max_bytes,
+            lang,
+            log_fn,
+            compression=compression,
+            compressed_limit=compressed_limit,
+            **csv_options,
+        )
+    return ColumnarSink(
+        base_path, base_name, columns, max_bytes, output_format, lang, log_fn
+    )
+
+
+# ------------------------------------------------------------
+#  INFORME DE EJECUCIÓN (tiempos, memoria y ficheros)
+# ------------------------------------------------------------
+RUN_REPORT_NAME = "conversion_report.json"
+RUN_REPORT_VERSION = 1
+
+
+def _windows_peak_rss():
+    """PeakWorkingSetSize del proceso (Windows no tiene el módulo resource)."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [
+            wintypes.HANDLE,
+            ctypes.POINTER(ProcessMemoryCounters),
+            wintypes.DWORD,
+        ]
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if psapi.GetProcessMemoryInfo(
+            kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        ):
+            return counters.PeakWorkingSetSize
+    except Exception:
+        pass
+    return None
+
+
+def peak_rss_bytes():
+    """Pico de memoria (RSS) del proceso y de sus procesos hijos terminados."""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss()
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux da KB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cpu_seconds():
+    """CPU del proceso más la de los procesos hijos ya terminados (pool)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def table_stats(base_path, sinks, started, cpu_started, parse_seconds):
+    """
+    Tiempos y bytes de una tabla: lectura del JSON (parse), conversión de
+    celdas (convert, lo que queda) y escritura en los sinks (write).
+    """
+    wall = time.perf_counter() - started
+    write = sum(sink.write_seconds for sink in sinks)
+    return {
+        "wall_seconds": wall,
+        "cpu_seconds": time.process_time() - cpu_started,
+        "parse_seconds": parse_seconds,
+        "convert_seconds": max(wall - parse_seconds - write, 0.0),
+        "write_seconds": write,
+        "output_bytes": sum(
+            _file_size(os.path.join(base_path, filename))
+            for sink in sinks
+            for filename in sink.files
+        ),
+    }
+
+
+class RunReport:
+    """
+    Informe de una conversión: tiempo real y de CPU de cada fase, filas,
+    bytes y tiempos de cada tabla, pico de memoria y ficheros escritos.
+    process_json_file lo devuelve y lo guarda como conversion_report.json
+    junto a la salida.
+    """
+
+    def __init__(self, json_path, base_path, options):
+        self.base_path = base_path
+        self.phases = {}
+        self.tables = []
+        self._started = time.perf_counter()
+        self._cpu_started = _cpu_seconds()
+        self.data = {
+            "version": RUN_REPORT_VERSION,
+            "input": os.path.abspath(json_path),
+            "input_bytes": _file_size(json_path),
+            "output_dir": os.path.abspath(base_path),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "format": None,
+            "options": options,
+        }
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall, cpu = time.perf_counter(), _cpu_seconds()
+        try:
+            yield
+        finally:
+            phase = self.phases.setdefault(
+                name, {"wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            phase["wall_seconds"] += time.perf_counter() - wall
+            phase["cpu_seconds"] += _cpu_seconds() - cpu
+
+    def add_tables(self, results):
+        for result in results or ():
+            # Las huellas del modo delta no pintan nada en el informe
+            self.tables.append({k: v for k, v in result.items() if k != "digests"})
+
+    def finish(self, status="ok", error=None):
+        wall = time.perf_counter() - self._started
+        rows = sum(t["rows"] for t in self.tables)
+        input_mb = self.data["input_bytes"] / (1024 * 1024)
+        self.data.update(
+            status=status,
+            error=error,
+            wall_seconds=wall,
+            cpu_seconds=_cpu_seconds() - self._cpu_started,
+            peak_rss_bytes=peak_rss_bytes(),
+            rows=rows,
+            rows_per_sec=rows / wall if wall else None,
+            mb_per_sec=input_mb / wall if wall else None,
+            output_bytes=sum(t.get("output_bytes", 0) for t in self.tables),
+            files=sum(
+                len(t["files"]) + len(t.get("delta_files", ())) for t in self.tables
+            ),
+            phases=self.phases,
+            stages={
+                stage: sum(t.get(f"{stage}_seconds", 0.0) for t in self.tables)
+                for stage in ("parse", "convert", "write", "wait")
+            },
+            tables=self.tables,
+        )
+        return self.data
+
+    def save(self):
+        full_path = os.path.join(self.base_path, RUN_REPORT_NAME)
+        with open(full_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=1)
+        os.replace(full_path + ".tmp", full_path)
+        return full_path
+
+
+def _phase(report, name):
+    return report.phase(name) if report else contextlib.nullcontext()
+
+
+# ------------------------------------------------------------
+#  MODO 1: JSON simple (array de productos tipo BigCommerce)
+# ------------------------------------------------------------
+PRODUCT_COLUMNS = [
+    ("reference", "string"),
+    ("name", "string"),
+    ("description", "string"),
+    ("brand", "string"),
+    ("price", "float"),
+    ("retail_price", "float"),
+    ("sale_price", "float"),
+    ("cost_price", "float"),
+    ("weight", "float"),
+    ("width", "float"),
+    ("height", "float"),
+    ("depth", "float"),
+    ("images", "string"),
+    ("category_references", "string"),
+]
+
+VARIANT_COLUMNS = [
+    ("variant_reference", "string"),
+    ("product_reference", "string"),
+    ("price", "float"),
+    ("retail_price", "float"),
+    ("sale_price", "float"),
+    ("cost_price", "float"),
+    ("weight", "float"),
+    ("width", "float"),
+    ("height", "float"),
+    ("depth", "float"),
+    ("upc", "string"),
+    ("inventory_level", "float"),
+]
+
+CATEGORY_COLUMNS = [
+    ("category_reference", "string"),
+    ("category_name", "string"),
+    ("parent_reference", "string"),
+]
+
+# Deduplicación por referencia: conservar la primera o la última aparición
+DEDUPE_POLICIES = ("first", "last")
+
+
+class RefIndex:
+    """
+    Conjunto (o diccionario ref -> entero) compacto de referencias.
+    Cada clave se guarda como su huella de 8 bytes (row_digest) en una tabla
+    hash de direccionamiento abierto sobre array('Q'): 8-16 bytes por hueco
+    en lugar de un objeto str por clave, así caben decenas de millones.
+    Dos referencias distintas con la misma huella (probabilidad ~n²/2^65)
+    contarían como duplicadas.
+    """
+
+    MAX_LOAD = 0.7
+
+    def __init__(self, values=False, capacity=1 << 16):
+        self._keys = array.array("Q", bytes(8 * capacity))
+        self._values = array.array("Q", bytes(8 * capacity)) if values else None
+        self._mask = capacity - 1
+        self._limit = int(capacity * self.MAX_LOAD)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, digest):
+        keys, mask = self._keys, self._mask
+        i = digest & mask
+        while True:
+            key = keys[i]
+            if key == digest or not key:
+                return i
+            i = (i + 1) & mask
+
+    def _grow(self):
+        old_keys, old_values = self._keys, self._values
+        capacity = len(old_keys) * 2
+        self._keys = array.array("Q", bytes(8 * capacity))
+        if old_values is not None:
+            self._values = array.array("Q", bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._limit = int(capacity * self.MAX_LOAD)
+        for j, digest in enumerate(old_keys):
+            if digest:
+                i = self._slot(digest)
+                self._keys[i] = digest
+                if old_values is not None:
+                    self._values[i] = old_values[j]
+
+    def _find(self, ref):
+        # 0 marca un hueco libre: esa huella se guarda como 1
+        digest = row_digest(str(ref)) or 1
+        return digest, self._slot(digest)
+
+    def add(self, ref, value=0):
+        """Guarda ref (-> value). Devuelve True si la referencia es nueva."""
+        digest, i = self._find(ref)
+        new = not self._keys[i]
+        if new:
+            self._keys[i] = digest
+            self.count += 1
+        if self._values is not None:
+            self._values[i] = value
+        if new and self.count > self._limit:
+            self._grow()
+        return new
+
+    def __contains__(self, ref):
+        return bool(self._keys[self._find(ref)[1]])
+
+    def get(self, ref, default=None):
+        _, i = self._find(ref)
+        if not self._keys[i]:
+            return default
+        return self._values[i] if self._values is not None else 0
+
+
+class Deduplicator:
+    """
+    Filtro de filas repetidas por referencia (RefIndex).
+    policy "first": se conserva la primera aparición (una sola pasada).
+    policy "last": se conserva la última; scan() recorre antes las
+    referencias y guarda la posición de la última aparición de cada una.
+    Las filas sin referencia (sin sku ni id) no se comparan: se escriben
+    siempre. dropped cuenta las filas descartadas.
+    """
+
+    def __init__(self, policy):
+        if policy not in DEDUPE_POLICIES:
+            raise ValueError(f"dedupe policy must be one of {DEDUPE_POLICIES}")
+        self.policy = policy
+        self.index = RefIndex(values=policy == "last")
+        self.dropped = 0
+
+    def scan(self, refs):
+        """Pasada previa de "last": refs en el mismo orden que keep()."""
+        add = self.index.add
+        for pos, ref in enumerate(refs, start=1):
+            if ref is not None and ref != "":
+                add(ref, pos)
+
+    def keep(self, pos, ref):
+        """True si la fila pos (1, 2…) con esta referencia se escribe."""
+        if ref is None or ref == "":
+            return True
+        if self.policy == "first":
+            kept = self.index.add(ref)
+        else:
+            kept = self.index.get(ref) == pos
+        if not kept:
+            self.dropped += 1
+        return kept
+
+
+def generate_csv_from_products(
+    products,
+    base_path,
+    max_bytes,
+    delimiter,
+    lang,
+    log_fn=None,
+    ui_update_fn=None,
+    progress_set_total=None,
+    progress_step=None,
+    output_format="csv",
+    compression=None,
+    compressed_limit=False,
+    pipelined_writes=False,
+    dedupe=None,
+):
+    """
+    Motor original: array de objetos con campos id/name/sku/variants/categories…
+    Genera products_X.csv, variants_X.csv, categories_X.csv.
+    products puede ser una lista o un ProductArrayStream. Se recorre una sola
+    vez: productos y variantes van directos a sus CSV mientras se construye
+    el índice de categorías. Con un stream el progreso se mide en bytes.
+    output_format "parquet" / "arrow" escribe los mismos ficheros en formato
+    columnar (precios y medidas como float64).
+    compression / compressed_limit / pipelined_writes: ver RollingCsvSink.
+    dedupe "first" / "last": productos con la misma referencia (sku / id,
+    ver safe_ref) se escriben una sola vez, la primera o la última
+    aparición (con "last" el JSON se recorre dos veces); las variantes del
+    producto descartado se descartan con él y las variantes repetidas por
+    sku / id se escriben solo la primera vez (ver Deduplicator).
+    Devuelve el resumen (filas, ficheros, tiempos) de products + variants y
+    de categories para el informe de ejecución.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+    clock = time.perf_counter
+    started = clock()
+    cpu_started = time.process_time()
+    parse_seconds = 0.0
+
+    streaming = isinstance(products, ProductArrayStream)
+    if streaming:
+        total_items = None
+        total_units = products.size
+    else:
+        total_items = total_units = len(products)
+
+    if progress_set_total and total_units > 0:
+        progress_set_total(total_units)
+
+    bytes_done = 0
+
+    def advance_bytes():
+        nonlocal bytes_done
+        if progress_step and products.bytes_read > bytes_done:
+            progress_step(products.bytes_read - bytes_done)
+            bytes_done = products.bytes_read
+
+    category_set = set()
+
+    products_dedupe = variants_dedupe = None
+    if dedupe:
+        products_dedupe = Deduplicator(dedupe)
+        variants_dedupe = Deduplicator("first")
+        if dedupe == "last":
+            if log_fn:
+                log_fn(texts["log_dedupe_scan"])
+            mark = clock()
+
+            def refs():
+                for idx, item in enumerate(products, start=1):
+                    if ui_update_fn and idx % 50 == 0:
+                        ui_update_fn()
+                    yield safe_ref(item.get("sku"), item.get("id"))
+
+            products_dedupe.scan(refs())
+            parse_seconds += clock() - mark
+
+    columnar = output_format != "csv"
+    product_header = delimiter.join([name for name, _ in PRODUCT_COLUMNS]) + "\n"
+    variant_header = delimiter.join([name for name, _ in VARIANT_COLUMNS]) + "\n"
+    category_header = delimiter.join([name for name, _ in CATEGORY_COLUMNS]) + "\n"
+
+    if log_fn:
+        log_fn(
+            texts["log_processing_products"].format(
+                total="?" if total_items is None else total_items
+            )
+        )
+
+    # Los CSV se escriben según se generan las filas (sin listas intermedias)
+    if log_fn:
+        log_fn(texts["log_splitting_products"])
+        log_fn(texts["log_splitting_variants"])
+    product_sink = open_table_sink(
+        output_format,
+        base_path,
+        "products",
+        product_header,
+        PRODUCT_COLUMNS,
+        max_bytes,
+        lang,
+        log_fn,
+        compression=compression,
+        compressed_limit=compressed_limit,
+        pipelined_writes=pipelined_writes,
+    )
+    variant_sink = open_table_sink(
+        output_format,
+        base_path,
+        "variants",
+        variant_header,
+        VARIANT_COLUMNS,
+        max_bytes,
+        lang,
+        log_fn,
+        compression=compression,
+        compressed_limit=compressed_limit,
+        pipelined_writes=pipelined_writes,
+    )
+
+    mark = clock()
+    with product_sink, variant_sink:
+        for idx, item in enumerate(products, start=1):
+            now = clock()
+            parse_seconds += now - mark
+            ref = safe_ref(item.get("sku"), item.get("id"))
+            if products_dedupe and not products_dedupe.keep(idx, ref):
+                if progress_step and not streaming:
+                    progress_step(1)
+                mark = clock()
+                continue
+            name = safe_ref(item.get("name"), ref)
+            desc = clean_description(item.get("description"))
+            brand = (item.get("brand") or {}).get("name", "")
+            images = ",".join(item.get("images", []))
+
+            # categorías
+            categories = item.get("categories", []) or []
+            cat_refs = []
+            for c in categories:
+                if isinstance(c, dict):
+                    name_cat = (c.get("name") or "").strip()
+                else:
+                    name_cat = str(c).strip()
+                if not name_cat:
+                    continue
+                category_set.add(name_cat)
+                cat_refs.append(name_cat.replace(" ", "_"))
+            cats_str = ",".join(cat_refs)
+
+            if columnar:
+                product_sink.write_record(
+                    [
+                        normalize_csv_text(ref),
+                        normalize_csv_text(name),
+                        normalize_csv_text(desc),
+                        normalize_csv_text(brand),
+                        columnar_number(item.get("price")),
+                        columnar_number(item.get("retail_price")),
+                        columnar_number(item.get("sale_price")),
+                        columnar_number(item.get("cost_price")),
+                        columnar_number(item.get("weight")),
+                        columnar_number(item.get("width")),
+                        columnar_number(item.get("height")),
+                        columnar_number(item.get("depth")),
+                        normalize_csv_text(images),
+                        normalize_csv_text(cats_str),
+                    ]
+                )
+            else:
+                product_row = delimiter.join(
+                    [
+                        escape_csv(ref),
+                        escape_csv(name),
+                        escape_csv(desc),
+                        escape_csv(brand),
+                        str(item.get("price", "") or ""),
+                        str(item.get("retail_price", "") or ""),
+                        str(item.get("sale_price", "") or ""),
+                        str(item.get("cost_price", "") or ""),
+                        str(item.get("weight", "") or ""),
+                        str(item.get("width", "") or ""),
+                        str(item.get("height", "") or ""),
+                        str(item.get("depth", "") or ""),
+                        escape_csv(images),
+                        escape_csv(cats_str),
+                    ]
+                )
+                product_sink.write_row(product_row)
+
+            if progress_step and not streaming:
+                progress_step(1)
+
+            # Variantes
+            variants = item.get("variants", []) or []
+            for v in variants:
+                if variants_dedupe and not variants_dedupe.keep(
+                    0, safe_ref(v.get("sku"), v.get("id"))
+                ):
+                    continue
+                if columnar:
+                    variant_sink.write_record(
+                        [
+                            normalize_csv_text(v.get("sku") or v.get("id") or ""),
+                            normalize_csv_text(ref),
+                            columnar_number(v.get("price")),
+                            columnar_number(v.get("retail_price")),
+                            columnar_number(v.get("sale_price")),
+                            columnar_number(v.get("cost_price")),
+                            columnar_number(v.get("weight")),
+                            columnar_number(v.get("width")),
+                            columnar_number(v.get("height")),
+                            columnar_number(v.get("depth")),
+                            normalize_csv_text(v.get("upc") or ""),
+                            columnar_number(v.get("inventory_level")),
+                        ]
+                    )
+                    continue
+                variant_row = delimiter.join(
+                    [
+                        escape_csv(v.get("sku") or v.get("id") or ""),
+                        escape_csv(ref),
+                        str(v.get("price", "") or ""),
+                        str(v.get("retail_price", "") or ""),
+                        str(v.get("sale_price", "") or ""),
+                        str(v.get("cost_price", "") or ""),
+                        str(v.get("weight", "") or ""),
+                        str(v.get("width", "") or ""),
+                        str(v.get("height", "") or ""),
+                        escape_csv(v.get("upc") or ""),
+                        str(v.get("inventory_level", "") or ""),
+                    ]
+                )
+                variant_sink.write_row(variant_row)
+
+            if idx % 50 == 0:
+                if streaming:
+                    advance_bytes()
+                if ui_update_fn:
+                    ui_update_fn()
+                    if log_fn:
+                        log_fn(
+                            texts["log_processed_products"].format(
+                                idx=idx,
+                                total="?" if total_items is None else total_items,
+                            )
+                        )
+            mark = clock()
+
+    if streaming:
+        advance_bytes()
+
+    results = [
+        dict(
+            table_stats(
+                base_path,
+                (product_sink, variant_sink),
+                started,
+                cpu_started,
+                parse_seconds,
+            ),
+            table="products",
+            rows=product_sink.rows_written + variant_sink.rows_written,
+            products=product_sink.rows_written,
+            variants=variant_sink.rows_written,
+            files=product_sink.files + variant_sink.files,
+            input_bytes=products.size if streaming else None,
+        )
+    ]
+    if dedupe:
+        results[0].update(
+            duplicates=products_dedupe.dropped,
+            variant_duplicates=variants_dedupe.dropped,
+        )
+        if log_fn:
+            log_fn(
+                texts["log_duplicates_dropped"].format(
+                    policy=dedupe,
+                    prod=products_dedupe.dropped,
+                    var=variants_dedupe.dropped,
+                )
+            )
+
+    if log_fn:
+        log_fn(
+            texts["log_products_summary"].format(
+                prod=product_sink.rows_written,
+                var=variant_sink.rows_written,
+                cats=len(category_set),
+            )
+        )
+
+    # Categorías (índice construido durante la pasada de productos)
+    if log_fn:
+        log_fn(texts["log_splitting_categories"])
+    started = clock()
+    cpu_started = time.process_time()
+    with open_table_sink(
+        output_format,
+        base_path,
+        "categories",
+        category_header,
+        CATEGORY_COLUMNS,
+        max_bytes,
+        lang,
+        log_fn,
+        compression=compression,
+        compressed_limit=compressed_limit,
+        pipelined_writes=pipelined_writes,
+    ) as category_sink:
+        for cat in sorted(category_set):
+            ref_cat = cat.strip().replace(" ", "_")
+            if columnar:
+                category_sink.write_record([ref_cat, cat, None])
+            else:
+                category_sink.write_row(
+                    delimiter.join([escape_csv(ref_cat), escape_csv(cat), ""])
+                )
+
+    results.append(
+        dict(
+            table_stats(base_path, (category_sink,), started, cpu_started, 0.0),
+            table="categories",
+            rows=category_sink.rows_written,
+            files=category_sink.files,
+            input_bytes=None,
+        )
+    )
+    return results
+
+
+# ------------------------------------------------------------
+#  CONVERSIÓN INCREMENTAL (manifiesto de huellas por tabla)
+# ------------------------------------------------------------
+MANIFEST_NAME = "conversion_manifest.json"
+MANIFEST_DIGESTS_DIR = "conversion_manifest_digests"
+MANIFEST_VERSION = 1
+
+
+def fingerprint(*parts):
+    """Huella estable (sha1) de cualquier estructura JSON."""
+    text = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_span_fingerprint(path, start, end):
+    """Huella de los bytes [inicio, fin) del fichero, sin decodificar JSON."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def rows_fingerprint(rows):
+    """
+    Huella (sha1) de las filas ya decodificadas, en JSON canónico: no cambia
+    si solo cambia el formato del fichero (espacios, saltos de línea,
+    escapes \\uXXXX, orden de las claves de los objetos).
+    """
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(
+            json.dumps(
+                row, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+            ).encode("utf-8")
+        )
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def row_digest(row_text):
+    """Huella de 8 bytes de una fila ya formateada (texto o bytes UTF-8)."""
+    if isinstance(row_text, str):
+        row_text = row_text.encode("utf-8")
+    digest = hashlib.blake2b(row_text, digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+def digest_in(sorted_digests, digest):
+    i = bisect.bisect_left(sorted_digests, digest)
+    return i < len(sorted_digests) and sorted_digests[i] == digest
+
+
+def row_digests_path(base_path, table_name):
+    return os.path.join(base_path, MANIFEST_DIGESTS_DIR, f"{table_name}.bin")
+
+
+def load_row_digests(path):
+    """Huellas ordenadas (array de enteros de 8 bytes) guardadas en disco."""
+    digests = array.array("Q")
+    try:
+        with open(path, "rb") as f:
+            digests.frombytes(f.read())
+    except OSError:
+        pass
+    return digests
+
+
+def save_row_digests(path, digests):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        digests.tofile(f)
+    os.replace(path + ".tmp", path)
+
+
+def table_assets_path(base_path, table_name):
+    return os.path.join(base_path, MANIFEST_DIGESTS_DIR, f"{table_name}.assets.json")
+
+
+def load_table_assets(base_path, table_name):
+    """Assets guardados de una tabla ([[URL, ID, STATUS], …]) o []."""
+    try:
+        with open(table_assets_path(base_path, table_name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_table_assets(base_path, table_name, assets):
+    path = table_assets_path(base_path, table_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(assets, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def load_manifest(base_path):
+    try:
+        with open(os.path.join(base_path, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(base_path, manifest):
+    full_path = os.path.join(base_path, MANIFEST_NAME)
+    with open(full_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(full_path + ".tmp", full_path)
+
+
+class RowDigestTee:
+    """
+    Pasa cada fila al sink de la tabla y guarda su huella; las filas cuya
+    huella no estaba en la ejecución anterior van también al sink delta.
+    Sin delta_sink (primera ejecución) solo se guardan las huellas.
+    """
+
+    def __init__(self, sink, delta_sink, previous=None):
+        self.sink = sink
+        self.delta_sink = delta_sink
+        self.previous = previous if previous is not None else array.array("Q")
+        self.digests = array.array("Q")
+
+    def write_row(self, row):
+        self.write(row + "\n")
+
+    def write(self, row_with_newline):
+        self.write_bytes(row_with_newline.encode("utf-8"))
+
+    def write_bytes(self, data):
+        self.sink.write_bytes(data)
+        if self._is_new(data) and self.delta_sink is not None:
+            self.delta_sink.write_bytes(data)
+
+    def write_record(self, values):
+        """Fila de ColumnarSink: la huella se calcula sobre su repr."""
+        self.sink.write_record(values)
+        if self._is_new(repr(values)) and self.delta_sink is not None:
+            self.delta_sink.write_record(values)
+
+    def _is_new(self, text):
+        digest = row_digest(text)
+        self.digests.append(digest)
+        return not digest_in(self.previous, digest)
+
+    def sorted_digests(self):
+        return array.array("Q", sorted(self.digests))
+
+    def content_fingerprint(self):
+        """Huella (sha1) de las filas en orden: cambia si cambia alguna."""
+        return hashlib.sha1(self.digests.tobytes()).hexdigest()
+
+
+def _remove_files(base_path, filenames):
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(base_path, filename))
+        except OSError:
+            pass
+
+
+def _remove_table_sidecars(base_path, table_name):
+    """Huellas de filas y assets guardados de una tabla."""
+    for path in (
+        row_digests_path(base_path, table_name),
+        table_assets_path(base_path, table_name),
+    ):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def plan_incremental_tasks(tasks, base_path, options, delta, lang, log_fn=None):
+    """
+    Compara la huella de esquema y contenido de cada tabla con el manifiesto
+    anterior. Devuelve (tareas que hay que exportar, nuevo manifiesto con
+    las tablas que se omiten).
+    Una tabla del fichero se omite si sus bytes son los mismos (huella
+    "raw", sin decodificar); si no, se exporta una sola vez y la huella de
+    sus filas ("content") sale de esa misma pasada (task["fingerprint_rows"],
+    ver run_table_task): con un JSON solo reformateado la tabla queda
+    marcada unchanged y sus ficheros no cambian. Las tablas ya cargadas en
+    memoria se comparan con rows_fingerprint antes de exportarlas.
+    Con otras opciones todas las tablas se exportan de nuevo; los ficheros
+    de la ejecución anterior que ya no se generan se borran al terminar
+    (ver update_manifest) y los de tablas que ya no se exportan, aquí.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+    previous = load_manifest(base_path) or {}
+    old_tables = previous.get("tables", {})
+
+    # Los delta de la ejecución anterior dejan de ser válidos
+    for entry in old_tables.values():
+        _remove_files(base_path, entry.get("delta_files", []))
+    # Tablas que esta ejecución ya no exporta (excluidas o sin filas)
+    current = {task["table"] for task in tasks}
+    for table_name, entry in old_tables.items():
+        if table_name not in current:
+            _remove_files(base_path, entry.get("files", []))
+            _remove_table_sidecars(base_path, table_name)
+    same_options = previous.get("options") == options
+
+    manifest = {"version": MANIFEST_VERSION, "options": options, "tables": {}}
+    pending = []
+    for task in tasks:
+        table_name = task["table"]
+        source = task["source"]
+        schema = (task["schema_list"], task["table_info"])
+        if task.get("columns") is not None:
+            schema += (task["columns"],)
+        entry = old_tables.get(table_name)
+        fp = {"schema": fingerprint(*schema)}
+        if isinstance(source, list):
+            fp["content"] = rows_fingerprint(source)
+            same = entry and entry.get("content") == fp["content"]
+        else:
+            fp["raw"] = file_span_fingerprint(*source)
+            same = entry and entry.get("raw") == fp["raw"]
+        same_schema = same_options and entry and entry.get("schema") == fp["schema"]
+        if (
+            same_schema
+            and same
+            and all(
+                os.path.exists(os.path.join(base_path, filename))
+                for filename in entry.get("files", [])
+            )
+        ):
+            if log_fn:
+                log_fn(texts["log_table_unchanged"].format(table=table_name))
+            manifest["tables"][table_name] = dict(entry, **fp, delta_files=[])
+            continue
+
+        task["fingerprint"] = fp
+        if not isinstance(source, list):
+            task["fingerprint_rows"] = True
+            if same_schema and entry.get("content"):
+                task["content_previous"] = entry["content"]
+        task["stale_files"] = entry.get("files", []) if entry else []
+        if delta and same_options and entry and entry.get("digests"):
+            task["delta_previous"] = row_digests_path(base_path, table_name)
+        pending.append(task)
+
+    if log_fn:
+        log_fn(
+            texts["log_incremental_summary"].format(
+                changed=len(pending), skipped=len(manifest["tables"])
+            )
+        )
+    return pending, manifest
+
+
+def update_manifest(base_path, manifest, tasks, results):
+    """Registra las tablas exportadas y borra sus ficheros que ya sobran."""
+    tasks_by_table = {task["table"]: task for task in tasks}
+    for result in results:
+        table_name = result["table"]
+        task = tasks_by_table[table_name]
+        _remove_files(
+            base_path,
+            [f for f in task["stale_files"] if f not in result["files"]],
+        )
+        entry = dict(task["fingerprint"])
+        if task.get("fingerprint_rows"):
+            entry["content"] = result.get("content")
+        entry["rows"] = result["rows"]
+        entry["files"] = result["files"]
+        entry["delta_files"] = result.get("delta_files", [])
+        entry["digests"] = "digests" in result
+        if entry["digests"]:
+            save_row_digests(
+                row_digests_path(base_path, table_name), result["digests"]
+            )
+        else:
+            _remove_table_sidecars(base_path, table_name)
+        # Assets de la tabla para el assets_X.csv de las siguientes ejecuciones
+        entry["assets"] = "assets" in result
+        if entry["assets"]:
+            save_table_assets(base_path, table_name, result["assets"])
+        manifest["tables"][table_name] = entry
+    save_manifest(base_path, manifest)
+
+
+# ------------------------------------------------------------
+#  CONVERSIÓN REANUDABLE (checkpoint por tabla)
+# ------------------------------------------------------------
+CHECKPOINT_DIR = "conversion_checkpoint"
+CHECKPOINT_VERSION = 1
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def checkpoint_path(base_path, table_name):
+    return os.path.join(base_path, CHECKPOINT_DIR, f"{table_name}.json")
+
+
+def load_checkpoint(base_path, table_name, key):
+    """Checkpoint de la tabla o None si no hay o es de otra entrada / opciones."""
+    try:
+        with open(checkpoint_path(base_path, table_name), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(entry, dict)
+        or entry.get("version") != CHECKPOINT_VERSION
+        or entry.get("key") != key
+    ):
+        return None
+    return entry
+
+
+def save_checkpoint(base_path, table_name, entry):
+    full_path = checkpoint_path(base_path, table_name)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False, indent=1)
+    os.replace(full_path + ".tmp", full_path)
+
+
+def verified_files(base_path, files):
+    """Cuántos ficheros del principio de la lista siguen con su sha1."""
+    for n, entry in enumerate(files):
+        full_path = os.path.join(base_path, entry["name"])
+        try:
+            if file_sha1(full_path) != entry["sha1"]:
+                return n
+        except OSError:
+            return n
+    return len(files)
+
+
+class TableCheckpoint:
+    """
+    Checkpoint de una tabla en conversion_checkpoint/<tabla>.json: al cerrar
+    cada <tabla>_X.csv guarda su sha1 y las filas escritas hasta él, así
+    una conversión cortada sigue en la fila y el fichero siguientes.
+    Al terminar la tabla se marca completa con el resumen de export_table.
+    files / rows: lo ya escrito al reanudar (ver prepare_checkpoint).
+    """
+
+    def __init__(self, base_path, table_name, key, files=(), rows=0):
+        self.base_path = base_path
+        self.table = table_name
+        self.key = key
+        self.files = list(files)
+        self.first_row = rows
+        self.next_file = len(self.files) + 1
+
+    def file_closed(self, filename, rows):
+        """Callback de RollingCsvSink (rows: filas escritas en esta ejecución)."""
+        self.files.append(
+            {
+                "name": filename,
+                "sha1": file_sha1(os.path.join(self.base_path, filename)),
+                "rows": self.first_row + rows,
+            }
+        )
+        self._save(complete=False)
+
+    def finish(self, result):
+        """Tabla terminada: sha1 de todos sus ficheros y su resumen."""
+        known = {entry["name"] for entry in self.files}
+        for filename in result["files"] + result.get("delta_files", []):
+            if filename not in known:
+                self.files.append(
+                    {
+                        "name": filename,
+                        "sha1": file_sha1(os.path.join(self.base_path, filename)),
+                        "rows": None,
+                    }
+                )
+        self._save(
+            complete=True,
+            result={k: v for k, v in result.items() if k != "digests"},
+        )
+
+    def _save(self, complete, result=None):
+        save_checkpoint(
+            self.base_path,
+            self.table,
+            {
+                "version": CHECKPOINT_VERSION,
+                "key": self.key,
+                "complete": complete,
+                "files": self.files,
+                "result": result,
+            },
+        )
+
+
+def source_identity(source):
+    """Identifica las filas de una tarea sin leerlas (fichero, fecha y posición)."""
+    if isinstance(source, list):
+        return fingerprint(source)
+    json_path, start, end = source
+    stat = os.stat(json_path)
+    return [os.path.abspath(json_path), stat.st_size, stat.st_mtime_ns, start, end]
+
+
+def prepare_checkpoint(
+    task, base_path, options, resume=False, row_starts=None, lang="es", log_fn=None
+):
+    """
+    Prepara el checkpoint de una tarea de tabla (task["checkpoint"]). Con
+    resume=True comprueba los ficheros del checkpoint anterior: si la tabla
+    estaba completa la marca con task["done"] (su resumen); si no, mueve
+    source / ranges a la primera fila que falta (row_starts: posición de
+    cada fila en el JSON, ver JsonTableIndex) y sigue desde ese fichero.
+    Un fichero que no coincide con su sha1 se repite desde él.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+    table_name = task["table"]
+    schema = (task["schema_list"], task["table_info"], task.get("columns"))
+    key = fingerprint(options, source_identity(task["source"]), *schema)
+    task["checkpoint"] = {"key": key, "files": [], "rows": 0}
+    entry = load_checkpoint(base_path, table_name, key) if resume else None
+    if entry is None:
+        return task
+
+    files = entry.get("files", [])
+    verified = verified_files(base_path, files)
+    if entry.get("complete") and verified == len(files) and entry.get("result"):
+        if log_fn:
+            log_fn(texts["log_resume_complete"].format(table=table_name))
+        task["done"] = entry["result"]
+        return task
+    if verified < len(files) and log_fn:
+        log_fn(
+            texts["log_resume_mismatch"].format(
+                table=table_name, filename=files[verified]["name"]
+            )
+        )
+    # Solo cuentan los ficheros que cerró la tabla por su cuenta (con filas)
+    files = [entry for entry in files[:verified] if entry.get("rows") is not None]
+    if not files:
+        return task
+
+    rows = files[-1]["rows"]
+    task["checkpoint"] = {"key": key, "files": files, "rows": rows}
+    task["first_row"] = rows
+    source = task["source"]
+    if isinstance(source, list):
+        task["source"] = source[rows:]
+        task["weight"] = len(task["source"])
+    else:
+        json_path, start, end = source
+        # Tras la última fila: solo queda el ] del array
+        start = row_starts[rows] if rows < len(row_starts) else end - 1
+        task["source"] = (json_path, start, end)
+        task["weight"] = end - start
+        if task.get("ranges"):
+            task["ranges"] = [
+                (max(first, rows), stop, max(byte_start, start), byte_end)
+                for first, stop, byte_start, byte_end in task["ranges"]
+                if stop > rows
+            ] or None
+    if log_fn:
+        log_fn(
+            texts["log_resume_partial"].format(
+                table=table_name, rows=rows, next=len(files) + 1
+            )
+        )
+    return task
+
+
+# ------------------------------------------------------------
+#  MODO 2: JSON Sales Layer genérico (todas las tablas)
+# ------------------------------------------------------------
+# Conversores por tipo de campo: valor JSON -> celda CSV ya escapada.
+# Se eligen una vez por columna (TablePlan) en lugar de comparar el tipo
+# en cada celda.
+# finish es escape_csv (celda entrecomillada) o normalize_csv_text (backend
+# csv.writer, que se encarga de las comillas).
+def convert_assets(val, finish=escape_csv):
+    """Imagen / fichero: lista de [STATUS, ID, URL…] -> URLs separadas por |."""
+    if isinstance(val, list):
+        return finish(
+            " | ".join(
+                [
+                    str(elem[2])
+                    for elem in val
+                    if isinstance(elem, list) and len(elem) >= 3
+                ]
+            )
+        )
+    return finish("")
+
+
+def convert_list(val, finish=escape_csv):
+    """Listas (tags, colecciones, etc.)."""
+    if isinstance(val, list):
+        return finish(", ".join([str(v) for v in val]))
+    return finish(str(val) if val not in (None, "") else "")
+
+
+def convert_table(val, finish=escape_csv):
+    """Tablas embebidas (ej: Equivalencias) -> JSON."""
+    try:
+        return finish(json.dumps(val, ensure_ascii=False))
+    except Exception:
+        return finish(str(val))
+
+
+def convert_number(val):
+    """Numéricos: int/float no necesitan escapado."""
+    if type(val) is int or type(val) is float:
+        return f'"{val}"'
+    return escape_csv(val)
+
+
+COLUMN_CONVERTERS = {
+    "image": convert_assets,
+    "file": convert_assets,
+    "list": convert_list,
+    "table": convert_table,
+    "numeric": convert_number,
+}
+
+
+# Celdas image / file recientes que se guardan ya convertidas por columna:
+# las mismas listas de fotos / fichas se repiten en cientos de filas
+# (formatos de un mismo producto)
+ASSET_CACHE_SIZE = 4096
+# Si de las primeras ASSET_CACHE_PROBE listas de una columna se repiten
+# menos de ASSET_CACHE_MIN_HITS, la columna sigue sin caché (con URLs
+# únicas por fila guardarlas solo costaría)
+ASSET_CACHE_PROBE = 4096
+ASSET_CACHE_MIN_HITS = 0.5
+
+
+class AssetExtractor:
+    """
+    Conversión de las columnas image / file de una tabla: cada conversor
+    (converter(), uno por columna) une las URLs (elem[2] de cada [STATUS,
+    ID, URL…]) como convert_assets y guarda las últimas ASSET_CACHE_SIZE
+    celdas por su tupla de URLs (LRU), así una lista repetida no se vuelve
+    a unir, escapar ni anotar.
+    Con collect=True anota además cada asset distinto de la tabla en assets
+    (URL -> [ID, STATUS] de su primera aparición) para assets_X.csv.
+    """
+
+    def __init__(self, finish=escape_csv, collect=False, size=ASSET_CACHE_SIZE):
+        self.finish = finish
+        self.assets = {} if collect else None
+        self.size = size
+
+    def converter(self):
+        finish = self.finish
+        assets = self.assets
+        size = self.size
+        empty = finish("")
+        cache = collections.OrderedDict()
+        probe = ASSET_CACHE_PROBE
+        hits = 0
+
+        def urls_of(val):
+            # Cada URL se pasa a texto aquí y solo aquí: clave de la caché,
+            # celda y assets coinciden (5 y "5" son el mismo asset, 1 y True no)
+            return [
+                str(elem[2])
+                for elem in val
+                if isinstance(elem, list) and len(elem) >= 3
+            ]
+
+        def note(val, urls):
+            elems = [elem for elem in val if isinstance(elem, list) and len(elem) >= 3]
+            for url, elem in zip(urls, elems):
+                assets.setdefault(url, [elem[1], elem[0]])
+
+        def convert_uncached(val):
+            if not isinstance(val, list):
+                return empty
+            urls = urls_of(val)
+            if assets is not None:
+                note(val, urls)
+            return finish(" | ".join(urls))
+
+        def convert(val):
+            nonlocal cache, probe, hits
+            if cache is None or not isinstance(val, list):
+                return convert_uncached(val)
+            urls = tuple(urls_of(val))
+            if not urls:
+                return empty
+            if probe:
+                probe -= 1
+                if not probe and hits < ASSET_CACHE_MIN_HITS * ASSET_CACHE_PROBE:
+                    # Casi sin repeticiones: el resto de la columna sin caché
+                    cache = None
+                    return convert_uncached(val)
+            cell = cache.get(urls)
+            if cell is not None:
+                cache.move_to_end(urls)
+                hits += 1
+                return cell
+            cell = finish(" | ".join(urls))
+            if assets is not None:
+                note(val, urls)
+            cache[urls] = cell
+            if len(cache) > size:
+                cache.popitem(last=False)
+            return cell
+
+        return convert
+
+    def asset_list(self):
+        """[[URL, ID, STATUS], …] en orden de aparición."""
+        return [[url, *info] for url, info in (self.assets or {}).items()]
+
+
+# En salida columnar numeric y boolean conservan su tipo
+COLUMNAR_CONVERTERS = {
+    "numeric": ("float", columnar_number),
+    "boolean": ("bool", columnar_bool),
+}
+
+
+def schema_keys(schema_list):
+    """Nombre original de cada campo de data_schema[tabla]."""
+    keys = []
+    for col in schema_list:
+        if isinstance(col, str):
+            keys.append(col)
+        elif isinstance(col, dict):
+            # { "images": [ ... ] } -> "images"
+            keys.append(list(col.keys())[0])
+        else:
+            keys.append("col")
+    return keys
+
+
+# ------------------------------------------------------------
+#  SELECCIÓN DE TABLAS Y COLUMNAS
+# ------------------------------------------------------------
+# Campos multi-idioma de Sales Layer: <nombre>_<idioma> (name_en, name_es…)
+_LANG_SUFFIX_RE = re.compile(r"^(.+)_([A-Za-z]{2})$")
+# Códigos ISO 639-1: sin ellos size_xl / size_xs pasarían por idiomas
+ISO_LANGUAGE_CODES = frozenset(
+    """
+    aa ab ae af ak am an ar as av ay az ba be bg bh bi bm bn bo br bs ca ce
+    ch co cr cs cu cv cy da de dv dz ee el en eo es et eu fa ff fi fj fo fr
+    fy ga gd gl gn gu gv ha he hi ho hr ht hu hy hz ia id ie ig ii ik io is
+    it iu ja jv ka kg ki kj kk kl km kn ko kr ks ku kv kw ky la lb lg li ln
+    lo lt lu lv mg mh mi mk ml mn mr ms mt my na nb nd ne ng nl nn no nr nv
+    ny oc oj om or os pa pi pl ps pt qu rm rn ro ru rw sa sc sd se sg si sk
+    sl sm sn so sq sr ss st su sv sw ta te tg th ti tk tl tn to tr ts tt tw
+    ty ug uk ur uz ve vi vo wa wo xh yi yo za zh zu
+    """.split()
+)
+
+
+def parse_patterns(text):
+    """
+    "products, mat_*, !mat_tmp" -> (["products", "mat_*"], ["mat_tmp"]):
+    patrones a incluir y, con !, a excluir (campos de texto de la GUI).
+    """
+    include, exclude = [], []
+    for part in (text or "").split(","):
+        part = part.strip()
+        if part.startswith("!"):
+            if part[1:].strip():
+                exclude.append(part[1:].strip())
+        elif part:
+            include.append(part)
+    return include, exclude
+
+
+def matches_any(name, patterns):
+    """¿name encaja con algún patrón glob (*, ?, [abc])? Distingue mayúsculas."""
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def select_tables(names, include=None, exclude=None):
+    """Tablas que encajan con include (todas si está vacío) y no con exclude."""
+    return [
+        name
+        for name in names
+        if (not include or matches_any(name, include))
+        and not (exclude and matches_any(name, exclude))
+    ]
+
+
+def column_languages(keys, table_info):
+    """
+    Idioma de cada campo multi-idioma: {campo: idioma}.
+    Se usa language_code de data_schema_info si viene; si no, el sufijo _xx
+    cuando el mismo nombre base aparece con otro idioma (name_en + name_es).
+    Solo cuentan como idioma los sufijos declarados con language_code en la
+    tabla o, si no declara ninguno, los códigos ISO 639-1.
+    """
+    languages = {}
+    for key in keys:
+        code = table_info.get(key, {}).get("language_code")
+        if code:
+            languages[key] = str(code).lower()
+    known = set(languages.values()) or ISO_LANGUAGE_CODES
+    by_base = {}
+    for key in keys:
+        if key in languages:
+            continue
+        match = _LANG_SUFFIX_RE.match(key)
+        if match and match.group(2).lower() in known:
+            by_base.setdefault(match.group(1), []).append(key)
+    for variants in by_base.values():
+        if len(variants) > 1:
+            for key in variants:
+                languages[key] = key[-2:].lower()
+    return languages
+
+
+def select_columns(
+    table_name, keys, table_info, include=None, exclude=None, languages=None
+):
+    """
+    Índices de las columnas de la tabla que se exportan, en el orden de
+    data_schema, o None si se exportan todas.
+    Los patrones se comparan con el nombre del campo y con "tabla.campo".
+    languages: idiomas que se conservan de los campos multi-idioma (los
+    campos sin idioma se conservan siempre).
+    """
+    if not (include or exclude or languages):
+        return None
+    wanted = {code.lower() for code in languages or ()}
+    field_languages = column_languages(keys, table_info) if wanted else {}
+    indices = []
+    for idx, key in enumerate(keys):
+        names = (key, f"{table_name}.{key}")
+        if include and not any(matches_any(name, include) for name in names):
+            continue
+        if exclude and any(matches_any(name, exclude) for name in names):
+            continue
+        if key in field_languages and field_languages[key] not in wanted:
+            continue
+        indices.append(idx)
+    return None if len(indices) == len(keys) else indices
+
+
+def language_groups(keys, table_info, schema_keys=None):
+    """
+    Agrupa las columnas de una tabla por idioma, una vez por tabla.
+    Devuelve (posiciones comunes, {idioma: [(posición, nombre base), …]});
+    el nombre base es el del campo sin el sufijo (name_en -> name).
+    schema_keys: todos los campos del esquema, para reconocer los idiomas
+    aunque la selección de columnas haya dejado uno solo.
+    """
+    field_languages = column_languages(schema_keys or keys, table_info)
+    common = []
+    by_language = {}
+    for pos, key in enumerate(keys):
+        code = field_languages.get(key)
+        if code is None:
+            common.append(pos)
+            continue
+        base = key[: -len(code) - 1] if key.lower().endswith("_" + code) else key
+        by_language.setdefault(code, []).append((pos, base))
+    return common, by_language
+
+
+class TablePlan:
+    """
+    Esquema de una tabla compilado una sola vez: nombre, tipo y conversor
+    de cada columna, en el orden de data_schema[tabla].
+    Con quote=False los conversores solo normalizan (para csv.writer).
+    Con columnar=True (implica quote=False) numeric y boolean dan float / bool
+    y kinds indica el tipo de cada columna para ColumnarSink.
+    columns: índices de las columnas que se exportan (select_columns); las
+    demás no se convierten. width es el número de campos del esquema.
+    Los conversores de las columnas image / file salen de un AssetExtractor
+    (assets); con collect_assets=True este anota los assets de la tabla.
+    """
+
+    def __init__(
+        self,
+        schema_list,
+        table_info,
+        quote=True,
+        columnar=False,
+        columns=None,
+        collect_assets=False,
+    ):
+        self.keys = []
+        self.types = []
+        self.kinds = []
+        self.converters = []
+        self.indices = columns
+        self.width = len(schema_list)
+        self.assets = AssetExtractor(
+            escape_csv if quote and not columnar else normalize_csv_text,
+            collect=collect_assets,
+        )
+
+        # Cabeceras usando SIEMPRE el nombre original del campo
+        keys = schema_keys(schema_list)
+        for key in keys if columns is None else [keys[idx] for idx in columns]:
+            info = table_info.get(key, {})
+            col_type = info.get("type")  # string, list, image, file, table, numeric…
+
+            self.keys.append(key)
+            self.types.append(col_type)
+            kind = "string"
+            # Cualquier otro tipo -> texto plano
+            converter = COLUMN_CONVERTERS.get(col_type)
+            if columnar and col_type in COLUMNAR_CONVERTERS:
+                kind, converter = COLUMNAR_CONVERTERS[col_type]
+            elif converter is convert_assets:
+                converter = self.assets.converter()
+            elif quote and not columnar:
+                converter = converter or escape_csv
+            elif converter is None or converter is convert_number:
+                converter = normalize_csv_text
+            else:
+                converter = functools.partial(converter, finish=normalize_csv_text)
+            self.kinds.append(kind)
+            self.converters.append(converter)
+
+    @property
+    def columns(self):
+        return list(zip(self.keys, self.kinds))
+
+    def header_line(self, delimiter):
+        return delimiter.join([escape_csv(key) for key in self.keys]) + "\n"
+
+
+def _row_emitter(sink, delimiter, csv_writer=False, columnar=False):
+    """Función que escribe una lista de celdas ya convertidas en sink."""
+    if columnar:
+        return sink.write_record
+    if csv_writer:
+        return csv.writer(
+            sink, delimiter=delimiter, quoting=csv.QUOTE_ALL, lineterminator="\n"
+        ).writerow
+    write_row = sink.write_row
+    return lambda cells: write_row(delimiter.join(cells))
+
+
+class LanguageSinks:
+    """
+    Reparte las filas convertidas de una tabla con campos multi-idioma:
+    - "split": <tabla>_<idioma>_X.csv por idioma, con las columnas comunes
+      y las de ese idioma (cabecera con el nombre base: name_en -> name).
+    - "long": <tabla>_X.csv con las columnas comunes y
+      <tabla>_languages_X.csv con una fila ID, field, language, value por
+      cada campo multi-idioma no vacío.
+    Las columnas de cada salida se eligen una vez (language_groups). Tiene
+    la interfaz de los sinks (write_record, close, rows_written, files).
+    open_sink(nombre, [(columna, tipo), …]) abre el sink de cada salida.
+    """
+
+    def __init__(
+        self,
+        layout,
+        plan,
+        table_name,
+        groups,
+        open_sink,
+        delimiter,
+        csv_writer=False,
+        columnar=False,
+    ):
+        self.rows_written = 0
+        self._sinks = []
+        self._outputs = []
+        self._long = None
+        common, by_language = groups
+        common_columns = [(plan.keys[pos], plan.kinds[pos]) for pos in common]
+
+        def add_output(name, columns, positions=None):
+            sink = open_sink(name, columns)
+            self._sinks.append(sink)
+            emit = _row_emitter(sink, delimiter, csv_writer, columnar)
+            if positions is not None:
+                self._outputs.append((emit, positions))
+            return emit
+
+        if layout == "split":
+            taken = {key for key, _ in common_columns}
+            for code, fields in by_language.items():
+                names = {pos: plan.keys[pos] for pos in common}
+                for pos, base in fields:
+                    # Si el nombre base ya existe se deja el original
+                    names[pos] = base if base not in taken else plan.keys[pos]
+                # Mismo orden de columnas que en data_schema
+                positions = sorted(names)
+                columns = [(names[pos], plan.kinds[pos]) for pos in positions]
+                add_output(f"{table_name}_{code}", columns, positions)
+            return
+
+        add_output(table_name, common_columns, common)
+        # Referencia de cada fila: la columna ID o, si no hay, la primera
+        keys = [key for key, _ in common_columns]
+        ref = common[keys.index("ID")] if "ID" in keys else 0
+        if not columnar and not csv_writer:
+            text = escape_csv
+        else:
+            text = str
+        long_columns = [
+            (plan.keys[ref], plan.kinds[ref]),
+            ("field", "string"),
+            ("language", "string"),
+            ("value", "string"),
+        ]
+        self._long = (
+            add_output(f"{table_name}_languages", long_columns),
+            ref,
+            [
+                (pos, text(base), text(code), plan.kinds[pos] != "string")
+                for code, fields in by_language.items()
+                for pos, base in fields
+            ],
+            # Celda vacía ya convertida
+            '""' if text is escape_csv else "",
+        )
+
+    @property
+    def files(self):
+        return [filename for sink in self._sinks for filename in sink.files]
+
+    @property
+    def write_seconds(self):
+        return sum(sink.write_seconds for sink in self._sinks)
+
+    def write_record(self, cells):
+        self.rows_written += 1
+        for emit, positions in self._outputs:
+            emit([cells[pos] for pos in positions])
+        if self._long is None:
+            return
+        emit, ref, fields, empty = self._long
+        ref_cell = cells[ref]
+        for pos, field, code, to_text in fields:
+            value = cells[pos]
+            if value is None or value == empty:
+                continue
+            if to_text:
+                # numeric / boolean en salida columnar: la columna value es texto
+                value = str(value)
+            emit([ref_cell, field, code, value])
+
+    def close(self):
+        for sink in self._sinks:
+            sink.close()
+
+
+def embedded_table_fields(schema_list, table_info, columns=None):
+    """Posiciones de los campos de tipo table (entre las columnas elegidas)."""
+    keys = schema_keys(schema_list)
+    return [
+        idx
+        for idx in (range(len(keys)) if columns is None else columns)
+        if table_info.get(keys[idx], {}).get("type") == "table"
+    ]
+
+
+class EmbeddedTableSink:
+    """
+    Filas de un campo de tipo table (tabla embebida) -> <tabla>__<campo>_X.csv
+    por el mismo sink que la tabla principal: parent_<ID> (referencia a la
+    fila padre), position (1, 2…) y una columna por subcampo.
+    Los subcampos vienen de data_schema ({"campo": ["a", "b"]}) o, si no,
+    de la primera fila con datos; los que aparezcan después (y elementos
+    que no son objetos) van en JSON a la columna _extra.
+    """
+
+    def __init__(
+        self,
+        table_name,
+        schema_list,
+        field_idx,
+        open_sink,
+        delimiter,
+        csv_writer=False,
+        columnar=False,
+    ):
+        keys = schema_keys(schema_list)
+        col = schema_list[field_idx]
+        self.name = f"{table_name}__{keys[field_idx]}"
+        self.field_idx = field_idx
+        # Referencia a la fila padre: la columna ID o, si no hay, la primera
+        self.ref_key = "ID" if "ID" in keys else keys[0]
+        self.ref_idx = keys.index(self.ref_key)
+        self.subfields = None
+        if isinstance(col, dict) and isinstance(col[keys[field_idx]], list):
+            self.subfields = [str(name) for name in col[keys[field_idx]]]
+        self.rows_written = 0
+        self._open_sink = open_sink
+        self._delimiter = delimiter
+        self._csv_writer = csv_writer
+        self._columnar = columnar
+        self._text = escape_csv if not (csv_writer or columnar) else normalize_csv_text
+        self._sink = None
+        self._emit = None
+
+    @property
+    def files(self):
+        return self._sink.files if self._sink else []
+
+    @property
+    def write_seconds(self):
+        return self._sink.write_seconds if self._sink else 0.0
+
+    def _open(self, items):
+        if self.subfields is None:
+            self.subfields = []
+            for item in items:
+                if isinstance(item, dict):
+                    self.subfields += [k for k in item if k not in self.subfields]
+        self._known = set(self.subfields)
+        columns = [
+            (f"parent_{self.ref_key}", "string"),
+            ("position", "string"),
+        ]
+        columns += [(name, "string") for name in self.subfields]
+        columns.append(("_extra", "string"))
+        self._sink = self._open_sink(self.name, columns)
+        self._emit = _row_emitter(
+            self._sink, self._delimiter, self._csv_writer, self._columnar
+        )
+
+    def _cell(self, value):
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False)
+        return self._text(value)
+
+    def write(self, row):
+        """row: fila completa del padre (en el orden de data_schema)."""
+        items = row[self.field_idx]
+        if not items:
+            return
+        if not isinstance(items, list):
+            items = [items]
+        if self._sink is None:
+            self._open(items)
+        cell = self._cell
+        ref = cell(row[self.ref_idx])
+        for position, item in enumerate(items, start=1):
+            if isinstance(item, dict):
+                cells = [cell(item.get(name)) for name in self.subfields]
+                extra = {k: v for k, v in item.items() if k not in self._known}
+            else:
+                cells = [cell(None)] * len(self.subfields)
+                extra = item
+            self._emit(
+                [ref, cell(position)] + cells + [cell(extra if extra else None)]
+            )
+            self.rows_written += 1
+
+    def close(self):
+        if self._sink:
+            self._sink.close()
+
+
+def export_table(
+    table_name,
+    schema_list,
+    table_info,
+    rows,
+    base_path,
+    max_bytes,
+    delimiter,
+    lang,
+    log_fn=None,
+    ui_update_fn=None,
+    progress_fn=None,
+    total_rows=None,
+    csv_writer=False,
+    delta=False,
+    delta_previous=None,
+    output_format="csv",
+    compression=None,
+    compressed_limit=False,
+    pipelined_writes=False,
+    converted=False,
+    columns=None,
+    language_layout=None,
+    flatten_tables=False,
+    checkpoint=None,
+    assets=False,
+    fingerprint_rows=False,
+):
+    """
+    Exporta una tabla de Sales Layer a <tabla>_X.csv.
+    rows: iterable de filas (listas en el orden de data_schema[tabla]).
+    columns: índices de las columnas que se exportan (select_columns);
+    None = todas.
+    language_layout "split" / "long": campos multi-idioma en un fichero por
+    idioma o en formato largo (ver LanguageSinks).
+    flatten_tables=True saca los campos de tipo table de la tabla y escribe
+    cada uno en <tabla>__<campo>_X.csv (ver EmbeddedTableSink).
+    progress_fn(n) se llama cada 100 filas (y al final) con las filas nuevas.
+    csv_writer=True entrecomilla y une cada fila con el csv.writer en C
+    (mismo resultado byte a byte).
+    delta=True escribe además <tabla>_delta_X.csv con las filas cuya huella
+    no está en delta_previous (huellas ordenadas de la ejecución anterior);
+    sin delta_previous (primera ejecución) solo se calculan las huellas: un
+    delta con la tabla entera no serviría de nada.
+    output_format "parquet" / "arrow" escribe <tabla>_X.parquet / .arrow con
+    el tipo de cada columna tomado de data_schema_info.
+    compression / compressed_limit / pipelined_writes: ver RollingCsvSink.
+    converted=True: rows ya vienen convertidas por convert_row_range
+    (líneas CSV en bytes terminadas en \n o registros de celdas).
+    checkpoint (TableCheckpoint): en tablas CSV de un solo fichero por fila
+    (sin delta, multi-idioma ni tablas embebidas) registra cada fichero
+    completo y numera los nuevos desde checkpoint.next_file; si la tabla se
+    corta, el fichero a medias se borra (RollingCsvSink.discard).
+    assets=True anota los assets distintos de las columnas image / file
+    (ver AssetExtractor) y los devuelve en result["assets"].
+    fingerprint_rows=True devuelve en result["content"] la huella de las
+    filas tal como se escriben (RowDigestTee.content_fingerprint), calculada
+    en esta misma pasada; None si no cubre la tabla entera (tabla reanudada
+    o con tablas embebidas, que salen de columnas que no se escriben aquí).
+    Devuelve un resumen: filas, ficheros escritos, tiempos de lectura /
+    conversión / escritura (ver table_stats) y huellas si delta.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+    clock = time.perf_counter
+    started = clock()
+    cpu_started = time.process_time()
+    parse_seconds = 0.0
+    columnar = output_format != "csv"
+    embedded = []
+    if flatten_tables:
+        embedded = embedded_table_fields(schema_list, table_info, columns)
+        if embedded:
+            # Las tablas embebidas salen de la tabla principal
+            columns = [
+                idx
+                for idx in (range(len(schema_list)) if columns is None else columns)
+                if idx not in embedded
+            ]
+    plan = TablePlan(
+        schema_list,
+        table_info,
+        quote=not csv_writer,
+        columnar=columnar,
+        columns=columns,
+        collect_assets=assets,
+    )
+    groups = None
+    if language_layout:
+        groups = language_groups(plan.keys, table_info, schema_keys(schema_list))
+        if not groups[1]:
+            # Tabla sin campos multi-idioma: salida normal
+            groups = None
+
+    def open_sink(name, columns=None, **csv_options):
+        if columns is None:
+            columns = plan.columns
+            header = plan.header_line(delimiter)
+        else:
+            header = delimiter.join([escape_csv(key) for key, _ in columns]) + "\n"
+        return open_table_sink(
+            output_format,
+            base_path,
+            name,
+            header,
+            columns,
+            max_bytes,
+            lang,
+            log_fn,
+            compression=compression,
+            compressed_limit=compressed_limit,
+            pipelined_writes=pipelined_writes,
+            **csv_options,
+        )
+
+    def open_output(name):
+        if groups is None:
+            return open_sink(name)
+        return LanguageSinks(
+            language_layout,
+            plan,
+            name,
+            groups,
+            open_sink,
+            delimiter,
+            csv_writer=csv_writer,
+            columnar=columnar,
+        )
+
+    # Construimos filas y las vamos guardando/spliteando según salen
+    # (con assets la tabla se reanuda entera: faltarían los de las filas
+    # ya escritas)
+    resumable = (
+        checkpoint is not None
+        and output_format == "csv"
+        and not delta
+        and groups is None
+        and not embedded
+        and not assets
+    )
+    if resumable:
+        sink = open_sink(
+            table_name,
+            first_index=checkpoint.next_file,
+            on_file_closed=checkpoint.file_closed,
+        )
+    else:
+        sink = open_output(table_name)
+    out = sink
+    delta_sink = None
+    if delta or fingerprint_rows:
+        if delta and delta_previous is not None:
+            delta_sink = open_output(f"{table_name}_delta")
+        out = RowDigestTee(sink, delta_sink, delta_previous)
+    # Salidas que reciben la lista de celdas (columnar / multi-idioma)
+    records = columnar or groups is not None
+    children = [
+        EmbeddedTableSink(
+            table_name,
+            schema_list,
+            idx,
+            open_sink,
+            delimiter,
+            csv_writer=csv_writer,
+            columnar=columnar,
+        )
+        for idx in embedded
+    ]
+    reported = 0
+
+    converters = plan.converters
+    indices = plan.indices
+    width = plan.width
+    padding = [None] * width
+    writer = None
+    if csv_writer and not records:
+        writer = csv.writer(
+            out, delimiter=delimiter, quoting=csv.QUOTE_ALL, lineterminator="\n"
+        )
+    write_converted = out.write_record if records else out.write_bytes
+
+    mark = clock()
+    finished = False
+    try:
+        for r_idx, row in enumerate(rows, start=1):
+            now = clock()
+            parse_seconds += now - mark
+            if converted:
+                write_converted(row)
+            else:
+                if len(row) < width:
+                    # Filas cortas: las columnas que faltan van vacías
+                    row = list(row) + padding[len(row):]
+                for child in children:
+                    child.write(row)
+                if indices is not None:
+                    # Solo las columnas seleccionadas se convierten
+                    row = [row[idx] for idx in indices]
+                cells = [conv(val) for conv, val in zip(converters, row)]
+                if writer:
+                    writer.writerow(cells)
+                elif records:
+                    out.write_record(cells)
+                else:
+                    out.write_row(delimiter.join(cells))
+
+            if r_idx % 100 == 0:
+                if progress_fn:
+                    progress_fn(r_idx - reported)
+                    reported = r_idx
+                if ui_update_fn:
+                    ui_update_fn()
+                    if log_fn:
+                        log_fn(
+                            f"{table_name}: {r_idx}/{'?' if total_rows is None else total_rows} rows processed…"
+                        )
+            mark = clock()
+        finished = True
+    finally:
+        if finished or not resumable:
+            sink.close()
+        else:
+            # Error o cancelación: el fichero a medias no entra en el
+            # checkpoint y al reanudar se escribe de nuevo desde su inicio
+            sink.discard()
+        if delta_sink:
+            delta_sink.close()
+        for child in children:
+            child.close()
+
+    if progress_fn and sink.rows_written > reported:
+        progress_fn(sink.rows_written - reported)
+
+    if log_fn:
+        if sink.rows_written:
+            log_fn(
+                texts["log_table_rows"].format(
+                    table=table_name, rows=sink.rows_written
+                )
+            )
+        else:
+            log_fn(texts["log_table_nodata"].format(table=table_name))
+        for child in children:
+            if child.rows_written:
+                log_fn(
+                    texts["log_table_rows"].format(
+                        table=child.name, rows=child.rows_written
+                    )
+                )
+
+    sinks = [sink, delta_sink] if delta_sink else [sink]
+    result = table_stats(
+        base_path, sinks + children, started, cpu_started, parse_seconds
+    )
+    result.update(
+        table=table_name,
+        rows=sink.rows_written,
+        files=sink.files + [f for child in children for f in child.files],
+    )
+    if children:
+        result["embedded_rows"] = {child.name: child.rows_written for child in children}
+    if assets:
+        result["assets"] = plan.assets.asset_list()
+    if fingerprint_rows:
+        whole = not children and not (checkpoint is not None and checkpoint.first_row)
+        result["content"] = out.content_fingerprint() if whole else None
+    if delta:
+        result["digests"] = out.sorted_digests()
+        result["delta_rows"] = delta_sink.rows_written if delta_sink else None
+        result["delta_files"] = delta_sink.files if delta_sink else []
+        if log_fn and delta_sink:
+            log_fn(
+                texts["log_table_delta"].format(
+                    table=table_name, rows=delta_sink.rows_written
+                )
+            )
+        elif log_fn:
+            log_fn(texts["log_table_delta_baseline"].format(table=table_name))
+    return result
+
+
+# Cola de eventos (progreso / log) de los procesos del pool hacia el principal
+# y aviso de cancelación en sentido contrario
+_worker_events = None
+_worker_cancel = None
+
+
+def _init_export_worker(events, cancel, output_slots=None):
+    global _worker_events, _worker_cancel, _output_slots
+    _worker_events = events
+    _worker_cancel = cancel
+    _output_slots = output_slots
+
+
+def _worker_progress(n):
+    if _worker_cancel.is_set():
+        raise ConversionCancelled()
+    _worker_events.put(("progress", n))
+
+
+def run_table_task(
+    task,
+    log_fn=None,
+    ui_update_fn=None,
+    progress_step=None,
+    converted_rows=None,
+    converted_assets=None,
+    converted_stages=None,
+):
+    """
+    Ejecuta una tarea de exportación de tabla (en este proceso o en el pool).
+    task["source"] es la lista de filas (dict ya cargado) o (json_path,
+    inicio, fin): posición en bytes del array data[tabla] dentro del fichero.
+    progress_step recibe las mismas unidades que task["weight"] (filas o bytes).
+    task["fingerprint_rows"]: huella del contenido en la misma pasada
+    (result["content"], ver export_table); si coincide con
+    task["content_previous"] la tabla se marca con result["unchanged"].
+    converted_rows: filas de la tabla ya convertidas por el pool (ver
+    _export_table_ranges, que informa él mismo del progreso);
+    converted_assets: dict que va reuniendo sus assets (task["assets"]);
+    converted_stages: segundos de lectura / conversión / CPU que van sumando
+    los procesos del pool. Sustituyen a los de este proceso, que solo espera
+    a los rangos: esa espera queda en result["wait_seconds"].
+    """
+    source = task["source"]
+    delta_previous = None
+    if task.get("delta_previous"):
+        delta_previous = load_row_digests(task["delta_previous"])
+
+    args = (
+        task["table"],
+        task["schema_list"],
+        task["table_info"],
+    )
+    checkpoint = None
+    if task.get("checkpoint"):
+        state = task["checkpoint"]
+        checkpoint = TableCheckpoint(
+            task["base_path"], task["table"], state["key"], state["files"], state["rows"]
+        )
+
+    kwargs = dict(
+        base_path=task["base_path"],
+        max_bytes=task["max_bytes"],
+        delimiter=task["delimiter"],
+        lang=task["lang"],
+        log_fn=log_fn,
+        ui_update_fn=ui_update_fn,
+        csv_writer=task["csv_writer"],
+        delta=task.get("delta", False),
+        delta_previous=delta_previous,
+        output_format=task.get("output_format", "csv"),
+        compression=task.get("compression"),
+        compressed_limit=task.get("compressed_limit", False),
+        pipelined_writes=task.get("pipelined_writes", False),
+        columns=task.get("columns"),
+        language_layout=task.get("language_layout"),
+        flatten_tables=task.get("flatten_tables", False),
+        checkpoint=checkpoint,
+        assets=task.get("assets", False),
+        fingerprint_rows=bool(task.get("fingerprint_rows")),
+    )
+
+    if isinstance(source, list):
+        result = export_table(
+            *args,
+            source,
+            progress_fn=progress_step,
+            total_rows=len(source),
+            **kwargs,
+        )
+        return _finish_checkpoint(checkpoint, result)
+
+    json_path, start, end = source
+    if converted_rows is not None:
+        result = export_table(*args, converted_rows, converted=True, **kwargs)
+        if converted_assets is not None:
+            result["assets"] = [[url, *info] for url, info in converted_assets.items()]
+        if converted_stages is not None:
+            # Sumados entre procesos: pueden superar el tiempo real de la tabla
+            result["wait_seconds"] = result["parse_seconds"]
+            result["parse_seconds"] = converted_stages["parse"]
+            result["convert_seconds"] = converted_stages["convert"]
+            result["cpu_seconds"] += converted_stages["cpu"]
+    else:
+        reported = 0
+        with open(json_path, "rb") as f:
+            f.seek(start)
+            reader = JsonStreamReader(f)
+
+            def progress(n):
+                # Bytes leídos dentro del array de la tabla
+                nonlocal reported
+                done = min(reader.bytes_read, end - start)
+                if progress_step and done > reported:
+                    progress_step(done - reported)
+                    reported = done
+
+            # Tabla reanudada: start apunta a la primera fila que falta
+            rows = reader.iter_array(inside=bool(task.get("first_row")))
+            result = export_table(*args, rows, progress_fn=progress, **kwargs)
+        if progress_step and end - start > reported:
+            progress_step(end - start - reported)
+    result["input_bytes"] = end - start
+    if task.get("content_previous") and (
+        result.get("content") == task["content_previous"]
+    ):
+        # Bytes distintos pero las mismas filas (JSON reformateado): los
+        # ficheros que se acaban de escribir son los de la vez anterior
+        result["unchanged"] = True
+        if log_fn:
+            texts = TEXTS.get(task["lang"], TEXTS["es"])
+            log_fn(texts["log_table_same_rows"].format(table=task["table"]))
+    return _finish_checkpoint(checkpoint, result)
+
+
+def _finish_checkpoint(checkpoint, result):
+    """Suma lo escrito antes de reanudar y marca la tabla como completa."""
+    if checkpoint is None:
+        return result
+    if checkpoint.first_row:
+        result["resumed_rows"] = checkpoint.first_row
+        result["rows"] += checkpoint.first_row
+        earlier = [entry["name"] for entry in checkpoint.files[: checkpoint.next_file - 1]]
+        result["files"] = earlier + result["files"]
+    checkpoint.finish(result)
+    return result
+
+
+def _export_table_task(task):
+    """Punto de entrada de run_table_task en los procesos del pool."""
+    return run_table_task(
+        task,
+        log_fn=lambda msg: _worker_events.put(("log", msg)),
+        progress_step=_worker_progress,
+    )
+
+
+class _LineCollector(list):
+    """Lista con write(): recoge las líneas que escribe csv.writer."""
+
+    write = list.append
+
+
+def convert_row_range(job, start, end):
+    """
+    Convierte en un proceso del pool las filas de data[tabla] que ocupan los
+    bytes [start, end) del JSON (filas completas separadas por comas, ver
+    JsonTableIndex.row_ranges). Devuelve, en orden, las líneas CSV (bytes
+    UTF-8 con \n, así también la codificación sale del proceso principal) o
+    las celdas de cada fila (salida columnar o multi-idioma) para que el
+    proceso principal las escriba, los assets del rango (job["assets"],
+    ver AssetExtractor.asset_list) o None y los tiempos de este proceso
+    (lectura del JSON, conversión, CPU): el proceso principal solo espera.
+    """
+    if _worker_cancel is not None and _worker_cancel.is_set():
+        raise ConversionCancelled()
+    clock = time.perf_counter
+    started = clock()
+    cpu_started = time.process_time()
+    with open(job["path"], "rb") as f:
+        f.seek(start)
+        rows = json.loads(b"[" + f.read(end - start) + b"]")
+    parsed = clock()
+
+    delimiter = job["delimiter"]
+    csv_writer = job["csv_writer"]
+    columnar = job["output_format"] != "csv"
+    records = columnar or job["records"]
+    plan = TablePlan(
+        job["schema_list"],
+        job["table_info"],
+        quote=not csv_writer,
+        columnar=columnar,
+        columns=job["columns"],
+        collect_assets=job["assets"],
+    )
+    converters = plan.converters
+    indices = plan.indices
+    width = plan.width
+    padding = [None] * width
+    items = _LineCollector()
+    writer = None
+    if csv_writer and not records:
+        writer = csv.writer(
+            items, delimiter=delimiter, quoting=csv.QUOTE_ALL, lineterminator="\n"
+        )
+
+    for row in rows:
+        if len(row) < width:
+            row = list(row) + padding[len(row):]
+        if indices is not None:
+            row = [row[idx] for idx in indices]
+        cells = [conv(val) for conv, val in zip(converters, row)]
+        if writer:
+            writer.writerow(cells)
+        elif records:
+            items.append(cells)
+        else:
+            items.append((delimiter.join(cells) + "\n").encode("utf-8"))
+    assets = plan.assets.asset_list() if job["assets"] else None
+    if writer:
+        items = [line.encode("utf-8") for line in items]
+    stages = (parsed - started, clock() - parsed, time.process_time() - cpu_started)
+    return list(items), assets, stages
+
+
+def _export_table_ranges(
+    pool,
+    task,
+    window,
+    idle,
+    log_fn=None,
+    ui_update_fn=None,
+    progress_step=None,
+    on_submitted=None,
+):
+    """
+    Exporta una tabla grande repartiendo sus rangos de filas (task["ranges"])
+    entre los procesos del pool, con hasta window rangos en vuelo. Este
+    proceso escribe las filas convertidas en el orden del fichero, así los
+    <tabla>_X.csv son los mismos que sin rangos. idle() se llama mientras se
+    espera a un rango (reenvía el progreso / log de los demás procesos).
+    on_submitted() se llama en cuanto el último rango está en la cola del
+    pool, para que detrás vayan las tablas más pequeñas.
+    Los tiempos de lectura y conversión son los de los procesos del pool
+    (ver run_table_task).
+    """
+    json_path, start, end = task["source"]
+    job = {
+        "path": json_path,
+        "schema_list": task["schema_list"],
+        "table_info": task["table_info"],
+        "delimiter": task["delimiter"],
+        "csv_writer": task["csv_writer"],
+        "output_format": task.get("output_format", "csv"),
+        "columns": task.get("columns"),
+        "records": False,
+        "assets": task.get("assets", False),
+    }
+    if task.get("language_layout"):
+        # Con campos multi-idioma que repartir, export_table recibe celdas
+        all_keys = keys = schema_keys(task["schema_list"])
+        if task.get("columns") is not None:
+            keys = [keys[idx] for idx in task["columns"]]
+        groups = language_groups(keys, task["table_info"], all_keys)
+        job["records"] = bool(groups[1])
+
+    # Assets de los rangos en orden de fichero, como sin rangos
+    assets = {} if job["assets"] else None
+    stages = {"parse": 0.0, "convert": 0.0, "cpu": 0.0}
+
+    def converted_rows():
+        reported = 0
+        ranges = collections.deque(task["ranges"])
+        in_flight = collections.deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < window:
+                _, _, byte_start, byte_end = ranges.popleft()
+                future = pool.submit(convert_row_range, job, byte_start, byte_end)
+                in_flight.append((future, byte_end))
+                if not ranges and on_submitted:
+                    on_submitted()
+            future, byte_end = in_flight.popleft()
+            while True:
+                try:
+                    items, range_assets, range_stages = future.result(timeout=0.1)
+                    break
+                except concurrent.futures.TimeoutError:
+                    idle()
+            for stage, seconds in zip(("parse", "convert", "cpu"), range_stages):
+                stages[stage] += seconds
+            if range_assets:
+                for url, *info in range_assets:
+                    assets.setdefault(url, info)
+            yield from items
+            if progress_step:
+                progress_step(byte_end - start - reported)
+                reported = byte_end - start
+        if progress_step and end - start > reported:
+            progress_step(end - start - reported)
+
+    return run_table_task(
+        task,
+        log_fn,
+        ui_update_fn,
+        converted_rows=converted_rows(),
+        converted_assets=assets,
+        converted_stages=stages,
+    )
+
+
+def _export_tables_parallel(
+    tasks,
+    workers,
+    log_fn=None,
+    ui_update_fn=None,
+    progress_step=None,
+):
+    """
+    Reparte las tablas entre un pool de procesos (las más grandes primero) y
+    reenvía su progreso / log al llamador desde este proceso.
+    Las tablas con task["ranges"] se convierten por rangos de filas en el
+    pool y se escriben desde este proceso (_export_table_ranges). La cola
+    del pool sigue el orden por peso: las tablas enteras más pequeñas que
+    una tabla por rangos se envían cuando ya están en cola todos sus rangos,
+    así la tabla más grande no espera detrás de las pequeñas.
+    Si ui_update_fn lanza ConversionCancelled se avisa a los procesos.
+    Devuelve los resúmenes de export_table de cada tabla.
+    """
+    events = multiprocessing.Queue()
+    cancel = multiprocessing.Event()
+
+    def drain():
+        while True:
+            try:
+                kind, value = events.get_nowait()
+            except queue.Empty:
+                return
+            if kind == "log" and log_fn:
+                log_fn(value)
+            elif kind == "progress" and progress_step:
+                progress_step(value)
+
+    def idle():
+        drain()
+        if ui_update_fn:
+            ui_update_fn()
+
+    tasks = sorted(tasks, key=lambda t: t["weight"], reverse=True)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_export_worker,
+        initargs=(events, cancel, _output_slots),
+    ) as pool:
+        waiting = collections.deque(tasks)
+        pending = set()
+
+        def submit_whole_tables():
+            # Tablas enteras hasta la siguiente que va por rangos
+            while waiting and not waiting[0].get("ranges"):
+                pending.add(pool.submit(_export_table_task, waiting.popleft()))
+
+        results = []
+        try:
+            submit_whole_tables()
+            while waiting:
+                results.append(
+                    _export_table_ranges(
+                        pool,
+                        waiting.popleft(),
+                        2 * workers,
+                        idle,
+                        log_fn,
+                        ui_update_fn,
+                        progress_step,
+                        on_submitted=submit_whole_tables,
+                    )
+                )
+                submit_whole_tables()
+            while pending:
+                done, pending = concurrent.futures.wait(pending, timeout=0.1)
+                drain()
+                for future in done:
+                    results.append(future.result())
+                if ui_update_fn:
+                    ui_update_fn()
+        except BaseException:
+            cancel.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    # Eventos enviados justo antes de terminar cada proceso
+    drain()
+    return results
+
+
+ASSETS_NAME = "assets"
+ASSETS_COLUMNS = ["asset_id", "status", "url", "tables"]
+
+
+def write_assets_manifest(
+    base_path,
+    table_assets,
+    max_bytes,
+    delimiter,
+    lang,
+    log_fn=None,
+    compression=None,
+    compressed_limit=False,
+    pipelined_writes=False,
+):
+    """
+    Escribe assets_X.csv: una fila por URL distinta de las columnas image /
+    file de todas las tablas, con el ID y STATUS de su primera aparición y
+    las tablas que la usan (separadas por comas).
+    table_assets: [(tabla, [[URL, ID, STATUS], …]), …] en el orden de
+    data_schema. Devuelve el resumen del fichero como el de una tabla.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    merged = {}
+    for table_name, assets in table_assets:
+        for url, asset_id, status in assets:
+            entry = merged.get(url)
+            if entry is None:
+                merged[url] = [asset_id, status, [table_name]]
+            elif entry[2][-1] != table_name:
+                entry[2].append(table_name)
+
+    header = delimiter.join([escape_csv(key) for key in ASSETS_COLUMNS]) + "\n"
+    with RollingCsvSink(
+        base_path,
+        ASSETS_NAME,
+        header,
+        max_bytes,
+        lang,
+        log_fn,
+        compression=compression,
+        compressed_limit=compressed_limit,
+        pipelined_writes=pipelined_writes,
+    ) as sink:
+        for url, (asset_id, status, tables) in merged.items():
+            sink.write_row(
+                delimiter.join(
+                    [
+                        escape_csv(asset_id),
+                        escape_csv(status),
+                        escape_csv(url),
+                        escape_csv(",".join(tables)),
+                    ]
+                )
+            )
+    if log_fn:
+        log_fn(texts["log_assets_written"].format(rows=sink.rows_written))
+    result = table_stats(base_path, [sink], started, cpu_started, 0.0)
+    result.update(table=ASSETS_NAME, rows=sink.rows_written, files=sink.files)
+    return result
+
+
+def export_saleslayer_tables(
+    raw,
+    base_path,
+    max_bytes,
+    delimiter,
+    lang,
+    log_fn=None,
+    ui_update_fn=None,
+    progress_set_total=None,
+    progress_step=None,
+    workers=1,
+    csv_writer=False,
+    incremental=False,
+    delta=False,
+    output_format="csv",
+    compression=None,
+    compressed_limit=False,
+    pipelined_writes=False,
+    tables=None,
+    exclude_tables=None,
+    columns=None,
+    exclude_columns=None,
+    languages=None,
+    language_layout=None,
+    flatten_tables=False,
+    checkpoint=False,
+    resume=False,
+    assets_manifest=False,
+    report=None,
+):
+    """
+    Recorre data_schema + data y crea un CSV por tabla:
+    catalogue_X.csv, products_X.csv, product_formats_X.csv, mat_tabla_test_X.csv, etc.
+    Usa TODOS los campos definidos en data_schema[tabla].
+    raw puede ser el dict ya cargado o un SalesLayerJsonStream; en ese caso
+    las filas se leen una a una y el progreso se mide en bytes leídos.
+    Con workers > 1 cada tabla se exporta en un proceso distinto; las tablas
+    de más de 2 * ROW_RANGE_BYTES se reparten además por rangos de filas
+    (índice mmap, ver JsonTableIndex).
+    csv_writer=True usa el csv.writer en C para unir y entrecomillar filas.
+    incremental=True guarda un manifiesto con la huella de cada tabla en
+    base_path y omite las tablas que no han cambiado desde la última vez;
+    delta=True escribe además <tabla>_delta_X.csv con las filas nuevas o
+    modificadas (no en la primera ejecución, que solo guarda las huellas).
+    output_format "parquet" / "arrow": un fichero columnar por tabla (pyarrow).
+    compression / compressed_limit: CSV comprimidos, ver RollingCsvSink.
+    pipelined_writes=True: escritura a disco en hilos aparte (PipelinedFileIO).
+    tables / exclude_tables: patrones glob de las tablas que se exportan /
+    omiten; las omitidas no llegan a decodificarse (se saltan con el índice).
+    columns / exclude_columns / languages: columnas que se exportan, ver
+    select_columns; las demás no se convierten ni se escapan.
+    language_layout "split" / "long": campos multi-idioma en un CSV por
+    idioma (<tabla>_en_X.csv…) o en formato largo (ver LanguageSinks).
+    flatten_tables=True: campos de tipo table en <tabla>__<campo>_X.csv
+    con referencia a la fila padre, en lugar de JSON dentro de la celda.
+    checkpoint=True guarda en base_path/conversion_checkpoint el avance de
+    cada tabla (ver TableCheckpoint); resume=True (implica checkpoint)
+    omite las tablas ya completas y sigue las demás desde su último fichero
+    cerrado, tras comprobar su sha1. No se combina con delta.
+    assets_manifest=True escribe además assets_X.csv con los assets
+    distintos de todas las tablas (ver write_assets_manifest), reunidos en
+    la misma pasada; su resumen va al final de la lista devuelta.
+    report (RunReport) recibe el tiempo de las fases de índice / manifiesto.
+    Devuelve el resumen de export_table de cada tabla exportada.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+
+    if log_fn:
+        log_fn(texts["log_exporting_tables"])
+
+    streaming = not isinstance(raw, dict)
+    if streaming:
+        data_schema = raw.data_schema
+        schema_info = raw.data_schema_info
+    else:
+        data_schema = raw.get("data_schema", {})
+        data = raw.get("data", {})
+        schema_info = raw.get("data_schema_info", {})
+
+    selected = select_tables(data_schema, tables, exclude_tables)
+    if len(selected) < len(data_schema) and log_fn:
+        log_fn(
+            texts["log_tables_selected"].format(
+                selected=len(selected), total=len(data_schema)
+            )
+        )
+    column_indices = {}
+    for table_name in list(selected):
+        indices = select_columns(
+            table_name,
+            schema_keys(data_schema[table_name]),
+            schema_info.get(table_name, {}),
+            columns,
+            exclude_columns,
+            languages,
+        )
+        if indices == []:
+            if log_fn:
+                log_fn(texts["log_table_nocolumns"].format(table=table_name))
+            selected.remove(table_name)
+        column_indices[table_name] = indices
+
+    def add_assets_manifest(results, stored=None):
+        """Añade a results el resumen de assets_X.csv (stored: tabla -> assets)."""
+        if not assets_manifest:
+            return results
+        by_table = dict(stored or {})
+        for result in results:
+            if "assets" in result:
+                by_table[result["table"]] = result["assets"]
+                # En el informe basta con el número de assets de la tabla
+                result["assets"] = len(result["assets"])
+        results.append(
+            write_assets_manifest(
+                base_path,
+                [(name, by_table[name]) for name in selected if name in by_table],
+                max_bytes,
+                delimiter,
+                lang,
+                log_fn,
+                compression=None if output_format != "csv" else compression,
+                compressed_limit=compressed_limit,
+                pipelined_writes=pipelined_writes,
+            )
+        )
+        return results
+
+    incremental = incremental or delta
+    # Las huellas de delta cubren la tabla entera: sin checkpoints
+    checkpoint = (checkpoint or resume) and not delta
+    # Con tablas omitidas se usa el índice: las filas que no se exportan se
+    # saltan sin decodificarlas
+    skips_tables = len(selected) < len(data_schema)
+    if workers > 1 or incremental or checkpoint or (streaming and skips_tables):
+        tasks = []
+        row_starts = {}
+        if streaming:
+            if log_fn:
+                log_fn(texts["log_indexing_tables"])
+            with _phase(report, "index"), raw.index_tables() as index:
+                sources = {
+                    name: ((raw.path, start, end), end - start)
+                    for name, (start, end) in index.spans.items()
+                }
+                ranges = {
+                    name: index.row_ranges(name, ROW_RANGE_BYTES)
+                    for name, (start, end) in index.spans.items()
+                    if workers > 1 and end - start > 2 * ROW_RANGE_BYTES
+                }
+                if resume:
+                    row_starts = {
+                        name: index.row_starts(name) for name in index.spans
+                    }
+        else:
+            sources = {
+                name: (rows, len(rows))
+                for name, rows in data.items()
+                if isinstance(rows, list)
+            }
+            ranges = {}
+
+        for table_name in selected:
+            schema_list = data_schema[table_name]
+            source, weight = sources.get(table_name, (None, 0))
+            if source is None:
+                if log_fn:
+                    log_fn(texts["log_table_nodata"].format(table=table_name))
+                continue
+            table_ranges = ranges.get(table_name)
+            if table_ranges and flatten_tables:
+                # Las tablas embebidas se escriben desde la fila completa:
+                # esas tablas se exportan enteras en un proceso
+                embedded = embedded_table_fields(
+                    schema_list,
+                    schema_info.get(table_name, {}),
+                    column_indices[table_name],
+                )
+                if embedded:
+                    table_ranges = None
+            tasks.append(
+                {
+                    "table": table_name,
+                    "schema_list": schema_list,
+                    "table_info": schema_info.get(table_name, {}),
+                    "source": source,
+                    "weight": weight,
+                    "base_path": base_path,
+                    "max_bytes": max_bytes,
+                    "delimiter": delimiter,
+                    "lang": lang,
+                    "csv_writer": csv_writer,
+                    "delta": delta,
+                    "output_format": output_format,
+                    "compression": compression,
+                    "compressed_limit": compressed_limit,
+                    "pipelined_writes": pipelined_writes,
+                    "ranges": table_ranges,
+                    "columns": column_indices[table_name],
+                    "language_layout": language_layout,
+                    "flatten_tables": flatten_tables,
+                    "assets": assets_manifest,
+                }
+            )
+
+        options = [
+            delimiter,
+            max_bytes,
+            csv_writer,
+            output_format,
+            compression,
+            compressed_limit,
+        ]
+        if language_layout:
+            options.append(language_layout)
+        if flatten_tables:
+            options.append("flatten_tables")
+        if assets_manifest:
+            options.append("assets")
+        options = fingerprint(*options)
+        if incremental:
+            with _phase(report, "fingerprint"):
+                tasks, manifest = plan_incremental_tasks(
+                    tasks, base_path, options, delta, lang, log_fn
+                )
+
+        pending_tasks = tasks
+        results = []
+        if checkpoint:
+            with _phase(report, "checkpoint"):
+                for task in tasks:
+                    prepare_checkpoint(
+                        task,
+                        base_path,
+                        options,
+                        resume,
+                        row_starts.get(task["table"]),
+                        lang,
+                        log_fn,
+                    )
+            pending_tasks = [task for task in tasks if "done" not in task]
+            results = [task["done"] for task in tasks if "done" in task]
+
+        total = sum(task["weight"] for task in pending_tasks)
+        if progress_set_total and total > 0:
+            progress_set_total(total)
+        if workers > 1:
+            if log_fn:
+                log_fn(
+                    texts["log_parallel_tables"].format(
+                        tables=len(pending_tasks), workers=workers
+                    )
+                )
+            results += _export_tables_parallel(
+                pending_tasks, workers, log_fn, ui_update_fn, progress_step
+            )
+        else:
+            results += [
+                run_table_task(task, log_fn, ui_update_fn, progress_step)
+                for task in pending_tasks
+            ]
+
+        stored = {}
+        if incremental:
+            update_manifest(base_path, manifest, tasks, results)
+            if assets_manifest:
+                # Tablas sin cambios: sus assets de la ejecución anterior
+                exported = {result["table"] for result in results}
+                stored = {
+                    name: load_table_assets(base_path, name)
+                    for name, entry in manifest["tables"].items()
+                    if entry.get("assets") and name not in exported
+                }
+        return add_assets_manifest(results, stored)
+
+    if streaming:
+        tables = raw.iter_tables()
+
+        if progress_set_total and raw.size > 0:
+            progress_set_total(raw.size)
+    else:
+        tables = (
+            (name, rows if isinstance(rows, list) else None)
+            for name, rows in ((name, data.get(name)) for name in selected)
+        )
+
+        # Calcular total de filas (todas las tablas) para la barra de progreso
+        total_rows = 0
+        for table_name in selected:
+            rows = data.get(table_name)
+            if isinstance(rows, list):
+                total_rows += len(rows)
+
+        if progress_set_total and total_rows > 0:
+            progress_set_total(total_rows)
+
+    bytes_done = 0
+
+    def advance(n_rows):
+        nonlocal bytes_done
+        if not progress_step:
+            return
+        if not streaming:
+            progress_step(n_rows)
+        elif raw.bytes_read > bytes_done:
+            progress_step(raw.bytes_read - bytes_done)
+            bytes_done = raw.bytes_read
+
+    pending = set(selected)
+    results = []
+
+    for table_name, rows in tables:
+        # Solo exportamos tablas definidas en data_schema (una vez cada una)
+        if table_name not in pending:
+            continue
+        pending.discard(table_name)
+
+        offset = raw.tell() if streaming else None
+        result = export_table(
+            table_name,
+            data_schema[table_name],
+            schema_info.get(table_name, {}),
+            rows or (),
+            base_path,
+            max_bytes,
+            delimiter,
+            lang,
+            log_fn,
+            ui_update_fn,
+            progress_fn=advance,
+            total_rows=None if streaming else len(rows or ()),
+            csv_writer=csv_writer,
+            output_format=output_format,
+            compression=compression,
+            compressed_limit=compressed_limit,
+            pipelined_writes=pipelined_writes,
+            columns=column_indices[table_name],
+            language_layout=language_layout,
+            flatten_tables=flatten_tables,
+            assets=assets_manifest,
+        )
+        if streaming:
+            result["input_bytes"] = raw.tell() - offset
+        results.append(result)
+
+    # Tablas del esquema que no aparecen en data
+    for table_name in selected:
+        if table_name in pending and log_fn:
+            log_fn(texts["log_table_nodata"].format(table=table_name))
+    return add_assets_manifest(results)
+
+
+# ------------------------------------------------------------
+#  VISTA PREVIA (tablas, filas y tamaño estimados sin convertir)
+# ------------------------------------------------------------
+# Filas que se leen y convierten de cada tabla para estimar su tamaño
+PREVIEW_SAMPLE_ROWS = 300
+
+
+def _sample_array(path, start, n):
+    """
+    Lee las n primeras filas del array que empieza en start.
+    Devuelve (filas, bytes del JSON que ocupan, ¿se acabó el array?).
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        reader = JsonStreamReader(f)
+        rows = []
+        for row in reader.iter_array():
+            rows.append(row)
+            if len(rows) == n:
+                return rows, reader.tell() - start, reader.peek() == "]"
+        return rows, reader.tell() - start, True
+
+
+def locate_tables(json_path, names):
+    """
+    Posición aproximada de cada array data[tabla] sin recorrer las filas:
+    busca "tabla": [ en el fichero mapeado, a partir de la clave data.
+    Devuelve {tabla: (inicio, fin)}; fin es el inicio de la tabla siguiente
+    (o el final del fichero). Una fila con un objeto cuya clave coincida con
+    el nombre de una tabla posterior puede adelantar su posición: para
+    contar exacto, ver JsonTableIndex.
+    """
+    with open(json_path, "rb") as f:
+        buf = _map_json_file(f)
+        try:
+            reader = JsonStreamReader(f)
+            data_start = None
+            for key in reader.iter_object():
+                if key == "data":
+                    data_start = reader.tell()
+                    break
+                reader.skip_value()
+        except BaseException:
+            buf.close()
+            raise
+    if data_start is None:
+        buf.close()
+        return {}
+    try:
+        found = {}
+        pos = data_start
+        for name in names:
+            pattern = json.dumps(name, ensure_ascii=False).encode("utf-8")
+            # Normalmente en el orden de data_schema; si no, desde el principio
+            for origin in (pos, data_start):
+                at = buf.find(pattern, origin)
+                while at != -1:
+                    colon = _B_WS_RE.match(buf, at + len(pattern)).end()
+                    if buf[colon : colon + 1] == b":":
+                        value = _B_WS_RE.match(buf, colon + 1).end()
+                        if buf[value : value + 1] == b"[":
+                            break
+                    at = buf.find(pattern, at + 1)
+                if at != -1:
+                    found[name] = (at, value)
+                    pos = value
+                    break
+        size = len(buf)
+    finally:
+        buf.close()
+
+    spans = {}
+    ordered = sorted(found.items(), key=lambda item: item[1][0])
+    for i, (name, (_, value)) in enumerate(ordered):
+        end = ordered[i + 1][1][0] if i + 1 < len(ordered) else size
+        spans[name] = (value, end)
+    return spans
+
+
+def estimate_splits(rows, row_bytes, header_bytes, max_bytes):
+    """
+    Bytes y número de ficheros _N.csv para rows filas de row_bytes de media
+    (mismo criterio que RollingCsvSink: cabecera + filas <= max_bytes).
+    """
+    if not rows:
+        return 0, 0
+    per_file = max(1, int((max_bytes - header_bytes) // max(row_bytes, 1)))
+    files = -(-rows // per_file)
+    output = int(rows * row_bytes) + files * (header_bytes + len(codecs.BOM_UTF8))
+    return output, files
+
+
+def preview_json_file(
+    json_path,
+    max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+    delimiter=",",
+    sample_rows=PREVIEW_SAMPLE_ROWS,
+    exact=False,
+    tables=None,
+    exclude_tables=None,
+    columns=None,
+    exclude_columns=None,
+    languages=None,
+    lang="es",
+):
+    """
+    Vista previa de la conversión sin escribir nada: tablas, columnas, filas
+    y bytes / ficheros _N.csv estimados de cada tabla.
+    Solo se leen data_schema / data_schema_info y las sample_rows primeras
+    filas de cada tabla, que se convierten para medir el tamaño medio de
+    una fila CSV; las filas se estiman con los bytes de la tabla en el JSON
+    (ver locate_tables). exact=True cuenta las filas con el índice completo
+    (JsonTableIndex, recorre todo el fichero).
+    Las estimaciones son de CSV sin comprimir y sin multi-idioma / tablas
+    embebidas. Devuelve un dict serializable a JSON.
+    """
+    texts = TEXTS.get(lang, TEXTS["es"])
+    started = time.perf_counter()
+    preview = {
+        "input": os.path.abspath(json_path),
+        "input_bytes": _file_size(json_path),
+        "format": None,
+        "exact": exact,
+        "max_bytes": max_bytes,
+        "sample_rows": sample_rows,
+        "tables": [],
+    }
+    try:
+        raw = open_json_export(json_path)
+    except Exception as e:
+        raise Exception(texts["err_json_invalid"].format(error=e))
+
+    if isinstance(raw, ProductArrayStream):
+        preview["format"] = "simple"
+        preview["tables"] = _preview_products(raw, max_bytes, delimiter, sample_rows)
+    elif isinstance(raw, SalesLayerJsonStream):
+        preview["format"] = "saleslayer"
+        preview["tables"] = _preview_saleslayer(
+            raw,
+            max_bytes,
+            delimiter,
+            sample_rows,
+            exact,
+            tables,
+            exclude_tables,
+            columns,
+            exclude_columns,
+            languages,
+        )
+    else:
+        raise Exception(texts["err_json_format"])
+    preview["seconds"] = time.perf_counter() - started
+    return preview
+
+
+def _preview_saleslayer(
+    raw,
+    max_bytes,
+    delimiter,
+    sample_rows,
+    exact,
+    tables,
+    exclude_tables,
+    columns,
+    exclude_columns,
+    languages,
+):
+    data_schema = raw.data_schema
+    schema_info = raw.data_schema_info
+    selected = select_tables(data_schema, tables, exclude_tables)
+    counts = {}
+    if exact:
+        with raw.index_tables() as index:
+            spans = dict(index.spans)
+            counts = {name: index.row_count(name) for name in spans}
+    else:
+        spans = locate_tables(raw.path, list(data_schema))
+
+    results = []
+    for table_name in selected:
+        schema_list = data_schema[table_name]
+        table_info = schema_info.get(table_name, {})
+        indices = select_columns(
+            table_name,
+            schema_keys(schema_list),
+            table_info,
+            columns,
+            exclude_columns,
+            languages,
+        )
+        if indices == []:
+            continue
+        plan = TablePlan(schema_list, table_info, columns=indices)
+        entry = {
+            "table": table_name,
+            "columns": len(plan.keys),
+            "rows": 0,
+            "rows_exact": True,
+            "sampled_rows": 0,
+            "row_bytes": None,
+            "output_bytes": 0,
+            "files": 0,
+        }
+        results.append(entry)
+        if table_name not in spans:
+            continue
+
+        start, end = spans[table_name]
+        rows, sample_bytes, ended = _sample_array(raw.path, start, sample_rows)
+        if not rows:
+            continue
+        padding = [None] * plan.width
+        csv_bytes = 0
+        for row in rows:
+            if len(row) < plan.width:
+                row = list(row) + padding[len(row):]
+            if indices is not None:
+                row = [row[idx] for idx in indices]
+            cells = [conv(val) for conv, val in zip(plan.converters, row)]
+            csv_bytes += len((delimiter.join(cells) + "\n").encode("utf-8"))
+
+        if table_name in counts:
+            total = counts[table_name]
+        elif ended:
+            total = len(rows)
+        else:
+            total = max(len(rows), round(len(rows) * (end - start) / sample_bytes))
+            entry["rows_exact"] = False
+        row_bytes = csv_bytes / len(rows)
+        header_bytes = len(plan.header_line(delimiter).encode("utf-8"))
+        output, files = estimate_splits(total, row_bytes, header_bytes, max_bytes)
+        entry.update(
+            rows=total,
+            sampled_rows=len(rows),
+            row_bytes=round(row_bytes, 1),
+            output_bytes=output,
+            files=files,
+        )
+    return results
+
+
+def _preview_products(raw, max_bytes, delimiter, sample_rows):
+    """
+    products / variants / categories de un array simple: los sample_rows
+    primeros productos se convierten con generate_csv_from_products en una
+    carpeta temporal. categories solo cuenta las categorías de la muestra.
+    """
+    products, sample_bytes, ended = _sample_array(raw.path, 0, sample_rows)
+    with tempfile.TemporaryDirectory() as folder:
+        results = generate_csv_from_products(
+            products, folder, max(max_bytes, 1 << 40), delimiter, "en"
+        )
+        sizes = {
+            name.rsplit("_", 1)[0]: _file_size(os.path.join(folder, name))
+            for name in os.listdir(folder)
+        }
+    # Productos y variantes del fichero entero, por bytes del JSON
+    scale = 1.0
+    if not ended and sample_bytes:
+        scale = max(1.0, raw.size / sample_bytes)
+
+    tables = []
+    for name, columns, count, scaled in (
+        ("products", PRODUCT_COLUMNS, results[0]["products"], True),
+        ("variants", VARIANT_COLUMNS, results[0]["variants"], True),
+        ("categories", CATEGORY_COLUMNS, results[1]["rows"], False),
+    ):
+        header = delimiter.join([col for col, _ in columns]) + "\n"
+        header_bytes = len(header.encode("utf-8"))
+        body = sizes.get(name, 0) - header_bytes - len(codecs.BOM_UTF8)
+        row_bytes = body / count if count else None
+        total = round(count * scale) if scaled else count
+        output, files = (
+            estimate_splits(total, row_bytes, header_bytes, max_bytes)
+            if count
+            else (0, 0)
+        )
+        tables.append(
+            {
+                "table": name,
+                "columns": len(columns),
+                "rows": total,
+                "rows_exact": ended,
+                "sampled_rows": count,
+                "row_bytes": round(row_bytes, 1) if row_bytes else None,
+                "output_bytes": output,
+                "files": files,
+            }
+        )
+    return tables
+
+
+# ------------------------------------------------------------
+#  DETECCIÓN DE FORMATO + LÓGICA PRINCIPAL
+# ------------------------------------------------------------
+def process_json_file(
     json_path,
     log_fn=None,
     ui_update_fn=None,
@@ -649,74 +4560,887 @@ def process_json_file(
     lang="es",
     progress_set_total=None,
     progress_step=None,
+    output_dir=None,
+    workers=1,
+    csv_writer=False,
+    incremental=False,
+    delta=False,
+    output_format="csv",
+    compression=None,
+    compressed_limit=False,
+    pipelined_writes=False,
+    tables=None,
+    exclude_tables=None,
+    columns=None,
+    exclude_columns=None,
+    languages=None,
+    language_layout=None,
+    flatten_tables=False,
+    dedupe=None,
+    checkpoint=False,
+    resume=False,
+    assets_manifest=False,
+    run_report=True,
+):
+    """
+    Convierte un JSON (simple o Sales Layer) en CSV divididos por tamaño.
+    Los CSV se guardan en output_dir o, si no se indica, junto al JSON.
+    workers > 1 exporta las tablas de Sales Layer en paralelo (procesos).
+    csv_writer=True escribe las filas de Sales Layer con el csv.writer en C.
+    incremental / delta: ver export_saleslayer_tables (solo formato Sales Layer).
+    output_format: "csv" (por defecto), "parquet" o "arrow" (requiere pyarrow).
+    compression: None, "gzip" o "zstd" (requiere zstandard); con
+    compressed_limit=True max_bytes se aplica al tamaño comprimido.
+    pipelined_writes=True solapa la escritura a disco con el formateo de
+    filas (un hilo de escritura por fichero abierto, ver PipelinedFileIO).
+    tables / exclude_tables / columns / exclude_columns / languages:
+    selección de tablas y columnas, ver export_saleslayer_tables (solo
+    formato Sales Layer).
+    language_layout: None, "split" o "long" (campos multi-idioma, solo
+    formato Sales Layer).
+    flatten_tables=True: campos de tipo table en <tabla>__<campo>_X.csv
+    (solo formato Sales Layer).
+    dedupe: None, "first" o "last" (productos repetidos por sku / id, solo
+    formato simple; ver generate_csv_from_products).
+    checkpoint / resume: avance por tabla para reanudar una conversión
+    cortada (solo formato Sales Layer; ver export_saleslayer_tables).
+    assets_manifest=True: assets_X.csv con los assets distintos de las
+    columnas image / file (solo formato Sales Layer).
+    No muestra diálogos: la GUI / CLI informan del resultado.
+    Devuelve el informe de ejecución (tiempos, filas, bytes y memoria por
+    fase y tabla), que con run_report=True se guarda además como
+    conversion_report.json en la carpeta de salida.
+    """
+    base_path = output_dir or os.path.dirname(json_path) or "."
+    texts = TEXTS.get(lang, TEXTS["es"])
+    os.makedirs(base_path, exist_ok=True)
+    report = RunReport(
+        json_path,
+        base_path,
+        {
+            "max_bytes": max_bytes,
+            "delimiter": delimiter,
+            "workers": workers,
+            "csv_writer": csv_writer,
+            "incremental": incremental,
+            "delta": delta,
+            "output_format": output_format,
+            "compression": compression,
+            "compressed_limit": compressed_limit,
+            "pipelined_writes": pipelined_writes,
+            "tables": tables,
+            "exclude_tables": exclude_tables,
+            "columns": columns,
+            "exclude_columns": exclude_columns,
+            "languages": languages,
+            "language_layout": language_layout,
+            "flatten_tables": flatten_tables,
+            "dedupe": dedupe,
+            "checkpoint": checkpoint,
+            "resume": resume,
+            "assets_manifest": assets_manifest,
+        },
+    )
+
+    def save_report():
+        if not run_report:
+            return
+        try:
+            path = report.save()
+        except OSError as e:
+            if log_fn:
+                log_fn(texts["log_report_failed"].format(error=e))
+        else:
+            if log_fn:
+                log_fn(texts["log_report_saved"].format(path=path))
+
+    try:
+        _convert_json_file(
+            json_path,
+            base_path,
+            report,
+            log_fn,
+            ui_update_fn,
+            max_bytes,
+            delimiter,
+            lang,
+            progress_set_total,
+            progress_step,
+            workers=workers,
+            csv_writer=csv_writer,
+            incremental=incremental,
+            delta=delta,
+            output_format=output_format,
+            compression=compression,
+            compressed_limit=compressed_limit,
+            pipelined_writes=pipelined_writes,
+            tables=tables,
+            exclude_tables=exclude_tables,
+            columns=columns,
+            exclude_columns=exclude_columns,
+            languages=languages,
+            language_layout=language_layout,
+            flatten_tables=flatten_tables,
+            dedupe=dedupe,
+            checkpoint=checkpoint,
+            resume=resume,
+            assets_manifest=assets_manifest,
+        )
+    except ConversionCancelled:
+        report.finish("cancelled")
+        save_report()
+        raise
+    except Exception as e:
+        report.finish("error", str(e))
+        save_report()
+        raise
+
+    data = report.finish()
+    save_report()
+    if log_fn:
+        log_fn(texts["log_finished"])
+    return data
+
+
+def _convert_json_file(
+    json_path,
+    base_path,
+    report,
+    log_fn,
+    ui_update_fn,
+    max_bytes,
+    delimiter,
+    lang,
+    progress_set_total,
+    progress_step,
+    **options,
 ):
-    base_path = os.path.dirname(json_path) or "."
+    """Cuerpo de process_json_file: detecta el formato y exporta."""
     texts = TEXTS.get(lang, TEXTS["es"])
+    sales_layer_only = (
+        "workers",
+        "csv_writer",
+        "incremental",
+        "delta",
+        "tables",
+        "exclude_tables",
+        "columns",
+        "exclude_columns",
+        "languages",
+        "language_layout",
+        "flatten_tables",
+        "checkpoint",
+        "resume",
+        "assets_manifest",
+    )
+    simple_only = ("dedupe",)
+    simple_options = {k: v for k, v in options.items() if k not in sales_layer_only}
+    options = {k: v for k, v in options.items() if k not in simple_only}
+
+    if log_fn:
+        log_fn(texts["log_opening"].format(path=json_path))
+
+    try:
+        # Solo se lee la cabecera: las filas se recorren en streaming
+        with report.phase("open"):
+            raw = open_json_export(json_path)
+    except Exception as e:
+        if log_fn:
+            log_fn(texts["log_error_read_json"].format(error=e))
+        # Propagamos para que select_file lo capture y genere el TXT
+        raise Exception(texts["err_json_invalid"].format(error=e))
+
+    try:
+        # Caso 1: array simple de productos
+        if isinstance(raw, ProductArrayStream):
+            if log_fn:
+                log_fn(texts["log_simple_detected"])
+            report.data["format"] = "simple"
+            with report.phase("export"):
+                results = generate_csv_from_products(
+                    raw,
+                    base_path,
+                    max_bytes,
+                    delimiter,
+                    lang,
+                    log_fn,
+                    ui_update_fn,
+                    progress_set_total,
+                    progress_step,
+                    **simple_options,
+                )
+
+        # Caso 2: JSON de Sales Layer (data_schema + data)
+        elif isinstance(raw, SalesLayerJsonStream):
+            if log_fn:
+                log_fn(texts["log_saleslayer_detected"])
+            report.data["format"] = "saleslayer"
+            with report.phase("export"):
+                results = export_saleslayer_tables(
+                    raw,
+                    base_path,
+                    max_bytes,
+                    delimiter,
+                    lang,
+                    log_fn,
+                    ui_update_fn,
+                    progress_set_total,
+                    progress_step,
+                    report=report,
+                    **options,
+                )
+
+        else:
+            if log_fn:
+                log_fn(texts["log_error_format"])
+            # Lanzamos excepción para que la GUI genere el log TXT
+            raise Exception(texts["err_json_format"])
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        # Error de sintaxis encontrado a mitad de fichero
+        if log_fn:
+            log_fn(texts["log_error_read_json"].format(error=e))
+        raise Exception(texts["err_json_invalid"].format(error=e))
+
+    report.add_tables(results)
+
+
+# ------------------------------------------------------------
+#  CONVERSIÓN POR LOTES (varios JSON en paralelo)
+# ------------------------------------------------------------
+# Memoria estimada de cada JSON en run_batch: base + fracción del tamaño
+# (índice de filas, tablas repartidas por rangos, buffers de escritura)
+BATCH_JOB_BASE_MEMORY = 128 * 1024 * 1024
+BATCH_MEMORY_PER_INPUT_BYTE = 0.5
+
+
+def estimate_job_memory(size):
+    """Memoria (bytes) que se reserva en run_batch para un JSON de size bytes."""
+    return BATCH_JOB_BASE_MEMORY + int(size * BATCH_MEMORY_PER_INPUT_BYTE)
 
-    if log_fn:
-        log_fn(texts["log_opening"].format(path=json_path))
 
+def read_batch_manifest(path):
+    """
+    Lista de JSON de un manifiesto de lote: una ruta o patrón glob por línea,
+    relativa a la carpeta del manifiesto; se ignoran las vacías y las que
+    empiezan por #.
+    """
+    folder = os.path.dirname(path)
+    patterns = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                patterns.append(os.path.join(folder, os.path.expanduser(line)))
+    return patterns
+
+
+def batch_output_dirs(json_paths, output_dir=None):
+    """
+    Carpeta de salida de cada JSON de un lote: <output_dir>/<nombre>/ o, sin
+    output_dir, <carpeta del JSON>/<nombre>/. Los nombres repetidos reciben
+    _2, _3…
+    """
+    dirs = []
+    used = set()
+    for json_path in json_paths:
+        stem = os.path.splitext(os.path.basename(json_path))[0]
+        parent = output_dir or os.path.dirname(json_path) or "."
+        folder = os.path.join(parent, stem)
+        n = 1
+        while os.path.normcase(os.path.abspath(folder)) in used:
+            n += 1
+            folder = os.path.join(parent, f"{stem}_{n}")
+        used.add(os.path.normcase(os.path.abspath(folder)))
+        dirs.append(folder)
+    return dirs
+
+
+def run_batch_job(job):
+    """
+    Convierte un JSON del lote e imprime su log (con [nombre] delante si
+    job["name"]). Nunca lanza: un fallo deja conversion_error_log.txt en
+    job["error_dir"] (o junto al JSON) y se devuelve en el resultado.
+    """
+    texts = TEXTS[job["lang"]]
+    json_path = job["json_path"]
+    prefix = f"[{job['name']}] " if job.get("name") else ""
+    log_lines = []
+
+    def log(msg):
+        log_lines.append(msg)
+        if not job["quiet"]:
+            print(prefix + msg, flush=True)
+
+    started = time.perf_counter()
+    log(texts["log_start"].format(mb=job["max_mb"], delim=job["delimiter_label"]))
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            raw = json.load(f)
+        process_json_file(
+            json_path,
+            log_fn=log,
+            lang=job["lang"],
+            output_dir=job["output_dir"],
+            **job["options"],
+        )
     except Exception as e:
-        if log_fn:
-            log_fn(texts["log_error_read_json"].format(error=e))
-        # Propagamos para que select_file lo capture y genere el TXT
-        raise Exception(texts["err_json_invalid"].format(error=e))
+        print(
+            prefix + texts["cli_failed"].format(path=json_path, error=e),
+            file=sys.stderr,
+            flush=True,
+        )
+        saved = save_error_log(
+            "\n".join(log_lines) + "\n",
+            str(e),
+            json_path,
+            job["lang"],
+            base_path=job.get("error_dir"),
+        )
+        if saved:
+            print(prefix + saved, file=sys.stderr, flush=True)
+        return dict(
+            path=json_path,
+            ok=False,
+            error=str(e),
+            seconds=time.perf_counter() - started,
+        )
 
-    # Caso 1: array simple de productos
-    if isinstance(raw, list):
-        if log_fn:
-            log_fn(texts["log_simple_detected"])
-        generate_csv_from_products(
-            raw,
-            base_path,
-            max_bytes,
-            delimiter,
-            lang,
-            log_fn,
-            ui_update_fn,
-            progress_set_total,
-            progress_step,
+    if not job["quiet"]:
+        folder = job["output_dir"] or os.path.dirname(json_path) or "."
+        print(
+            prefix
+            + texts["done_msg"].format(mb=job["max_mb"], folder=os.path.abspath(folder)),
+            flush=True,
         )
+    return dict(path=json_path, ok=True, seconds=time.perf_counter() - started)
 
-    # Caso 2: JSON de Sales Layer (data_schema + data)
-    elif isinstance(raw, dict) and "data_schema" in raw and "data" in raw:
-        if log_fn:
-            log_fn(texts["log_saleslayer_detected"])
-        export_saleslayer_tables(
-            raw,
-            base_path,
-            max_bytes,
-            delimiter,
-            lang,
-            log_fn,
-            ui_update_fn,
-            progress_set_total,
-            progress_step,
+
+def _init_batch_worker(output_slots):
+    global _output_slots
+    _output_slots = output_slots
+
+
+def _batch_job_lost(job, error):
+    """Resultado de un JSON cuyo proceso murió (p. ej. sin memoria)."""
+    texts = TEXTS[job["lang"]]
+    message = texts["cli_job_crashed"].format(error=error)
+    print(
+        texts["cli_failed"].format(path=job["json_path"], error=message),
+        file=sys.stderr,
+        flush=True,
+    )
+    save_error_log("", message, job["json_path"], job["lang"], job.get("error_dir"))
+    return dict(path=job["json_path"], ok=False, error=message, seconds=None)
+
+
+def run_batch(jobs, max_jobs=1, memory_limit=None, io_slots=None):
+    """
+    Convierte los JSON del lote (dicts de run_batch_job con además "size")
+    en un pool de max_jobs procesos, los más grandes primero. Cada JSON
+    reserva estimate_job_memory(size) de memory_limit (bytes; None = sin
+    límite): si el siguiente no cabe se adelanta uno más pequeño que quepa,
+    y uno mayor que el límite se convierte solo. io_slots limita las
+    escrituras a disco simultáneas de todos los procesos (ver open_output).
+    Si un proceso muere rompe el pool y con él los JSON en marcha: se repiten
+    uno a uno en un pool nuevo y solo el que vuelve a romperlo se da por
+    fallido (_batch_job_lost).
+    Con max_jobs=1 y sin io_slots los JSON se convierten en este proceso en
+    el orden recibido.
+    Devuelve los resultados de run_batch_job en el orden de jobs.
+    """
+    if max_jobs <= 1 and not io_slots:
+        return [run_batch_job(job) for job in jobs]
+
+    order = {id(job): i for i, job in enumerate(jobs)}
+    pending = sorted(jobs, key=lambda j: j["size"], reverse=True)
+    output_slots = multiprocessing.Semaphore(io_slots) if io_slots else None
+    results = []
+    running = {}
+    reserved = 0
+    # JSON en marcha cuando murió un proceso: se repiten de uno en uno
+    suspects = []
+    retrying = False
+
+    def new_pool():
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, max_jobs),
+            initializer=_init_batch_worker,
+            initargs=(output_slots,),
         )
 
-    else:
-        if log_fn:
-            log_fn(texts["log_error_format"])
-        # Lanzamos excepción para que la GUI genere el log TXT
-        raise Exception(texts["err_json_format"])
+    pool = new_pool()
+    try:
+        while pending or running or suspects:
+            if suspects and not running:
+                job = suspects.pop(0)
+                texts = TEXTS[job["lang"]]
+                print(
+                    texts["cli_job_retry"].format(path=job["json_path"]),
+                    file=sys.stderr,
+                    flush=True,
+                )
+                reserved += estimate_job_memory(job["size"])
+                running[pool.submit(run_batch_job, job)] = job
+                retrying = True
+            while pending and not retrying and len(running) < max_jobs:
+                job = next(
+                    (
+                        j
+                        for j in pending
+                        if not memory_limit
+                        or reserved + estimate_job_memory(j["size"]) <= memory_limit
+                    ),
+                    None,
+                )
+                if job is None:
+                    if running:
+                        break
+                    job = pending[0]
+                pending.remove(job)
+                reserved += estimate_job_memory(job["size"])
+                running[pool.submit(run_batch_job, job)] = job
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            crashed = []
+            retrying = False
+            for future in done:
+                job = running.pop(future)
+                reserved -= estimate_job_memory(job["size"])
+                try:
+                    results.append((job, future.result()))
+                except concurrent.futures.process.BrokenProcessPool as e:
+                    crashed.append((job, e))
+            if crashed:
+                # Un proceso muerto rompe el pool: no se sabe cuál de los
+                # JSON en marcha lo mató, salvo que fuera el único
+                crashed += [(job, "BrokenProcessPool") for job in running.values()]
+                running.clear()
+                reserved = 0
+                pool.shutdown(wait=True)
+                pool = new_pool()
+                if len(crashed) == 1:
+                    job, error = crashed[0]
+                    results.append((job, _batch_job_lost(job, error)))
+                else:
+                    suspects += [job for job, _ in crashed]
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown(wait=True)
+
+    results.sort(key=lambda item: order[id(item[0])])
+    return [result for _, result in results]
+
+
+# ------------------------------------------------------------
+#  LÍNEA DE COMANDOS (sin tkinter)
+# ------------------------------------------------------------
+DELIMITERS = {",": ",", ";": ";", "|": "|", "TAB": "\t"}
+
+
+def _positive_mb(value):
+    try:
+        mb = float(value.replace(",", "."))
+        if mb <= 0:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(TEXTS["en"]["err_size_msg"])
+    return mb
+
+
+def _patterns(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
 
-    mb_value = max_bytes // (1024 * 1024)
-    messagebox.showinfo(
-        texts["done_title"],
-        texts["done_msg"].format(
-            mb=mb_value, folder=os.path.abspath(base_path)
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="json_to_csv_saleslayer_gui",
+        description=(
+            "Sales Layer JSON → CSV converter. "
+            "Without arguments it opens the graphical interface."
         ),
     )
-    if log_fn:
-        log_fn(texts["log_finished"])
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        metavar="JSON",
+        help="JSON files, folders or glob patterns (e.g. 'exports/*.json')",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help=(
+            "output folder (default: next to each JSON; "
+            "one subfolder per JSON when several are given)"
+        ),
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=_positive_mb,
+        default=DEFAULT_MAX_MB,
+        help=f"max size of each CSV in MB (default: {DEFAULT_MAX_MB})",
+    )
+    parser.add_argument(
+        "--delimiter",
+        choices=list(DELIMITERS),
+        default=",",
+        help="CSV delimiter (default: ',')",
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help=(
+            "output format: split CSV (default) or typed Parquet / Arrow IPC "
+            "files split by the same --max-mb (requires pyarrow)"
+        ),
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSIONS),
+        help="compress each CSV while writing it (.csv.gz / .csv.zst)",
+    )
+    parser.add_argument(
+        "--limit-compressed",
+        action="store_true",
+        help=(
+            "with --compress, --max-mb limits the compressed file size "
+            "instead of the CSV size"
+        ),
+    )
+    parser.add_argument(
+        "--pipelined-writes",
+        action="store_true",
+        help=(
+            "write output files from background threads while rows are being "
+            "formatted (helps on network shares; same output)"
+        ),
+    )
+    parser.add_argument(
+        "--lang",
+        choices=["es", "en"],
+        default="en",
+        help="language of the log messages (default: en)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "processes used to export Sales Layer tables in parallel "
+            "(0 = one per CPU; default: 1)"
+        ),
+    )
+    parser.add_argument(
+        "--csv-writer",
+        action="store_true",
+        help="write Sales Layer rows through Python's C csv.writer (same output)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "keep a manifest in the output folder and skip Sales Layer tables "
+            "that have not changed since the previous run"
+        ),
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help=(
+            "with --incremental, also write <table>_delta_N.csv "
+            "with the new or changed rows"
+        ),
+    )
+    parser.add_argument(
+        "--tables",
+        type=_patterns,
+        help=(
+            "comma-separated Sales Layer tables to export, glob patterns allowed "
+            "(e.g. 'products,mat_*'); the rest are skipped without decoding them"
+        ),
+    )
+    parser.add_argument(
+        "--exclude-tables",
+        type=_patterns,
+        help="comma-separated tables (glob patterns) not to export",
+    )
+    parser.add_argument(
+        "--columns",
+        type=_patterns,
+        help=(
+            "comma-separated columns to export, as 'field' or 'table.field' "
+            "glob patterns (e.g. 'ID,name_*,products.price')"
+        ),
+    )
+    parser.add_argument(
+        "--exclude-columns",
+        type=_patterns,
+        help="comma-separated columns ('field' or 'table.field' patterns) to drop",
+    )
+    parser.add_argument(
+        "--languages",
+        type=_patterns,
+        help=(
+            "keep only these languages of multilingual fields, e.g. 'en' or "
+            "'en,es' (fields without a language are always kept)"
+        ),
+    )
+    parser.add_argument(
+        "--language-layout",
+        choices=LANGUAGE_LAYOUTS,
+        help=(
+            "multilingual fields (name_en, name_es…): 'split' writes one "
+            "<table>_<lang>_N.csv per language, 'long' writes "
+            "<table>_languages_N.csv with ID, field, language, value rows"
+        ),
+    )
+    parser.add_argument(
+        "--flatten-tables",
+        action="store_true",
+        help=(
+            "write embedded 'table' fields to <table>__<field>_N.csv (one row "
+            "per item, with the parent ID) instead of JSON in the cell"
+        ),
+    )
+    parser.add_argument(
+        "--assets-manifest",
+        action="store_true",
+        help=(
+            "also write assets_N.csv: each distinct image / file URL once, "
+            "with its asset ID, status and the tables that use it"
+        ),
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=DEDUPE_POLICIES,
+        help=(
+            "simple JSON: write each product reference (sku/id) once, keeping "
+            "its first or last occurrence"
+        ),
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help=(
+            "do not convert: print as JSON the tables, columns and estimated "
+            "rows, bytes and number of split files of each input"
+        ),
+    )
+    parser.add_argument(
+        "--exact-rows",
+        action="store_true",
+        help="with --preview, count rows exactly (reads the whole file)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help=(
+            "record each Sales Layer table's progress (split files written, "
+            "with checksums) in conversion_checkpoint/ so --resume can continue"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "continue an interrupted run (implies --checkpoint): skip finished "
+            "tables and continue the others after their last verified file"
+        ),
+    )
+    parser.add_argument(
+        "--manifest",
+        action="append",
+        metavar="FILE",
+        help=(
+            "text file listing JSON files or glob patterns to convert, one per "
+            "line, relative to the file (may be repeated)"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "JSON files converted at the same time, largest first, each in its "
+            "own process (0 = one per CPU; default: 1)"
+        ),
+    )
+    parser.add_argument(
+        "--max-memory-mb",
+        type=_positive_mb,
+        help=(
+            "with --jobs, estimated memory budget for the files converted at "
+            "the same time; smaller files go first when a large one does not fit"
+        ),
+    )
+    parser.add_argument(
+        "--io-slots",
+        type=int,
+        help="with --jobs, max output writes to disk at the same time",
+    )
+    parser.add_argument(
+        "--no-report",
+        dest="run_report",
+        action="store_false",
+        help=f"do not write {RUN_REPORT_NAME} (timings per phase and table)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only print errors"
+    )
+    parser.add_argument(
+        "--gui", action="store_true", help="open the graphical interface"
+    )
+    return parser
+
+
+def expand_inputs(patterns):
+    """
+    Expande patrones glob y carpetas (sus *.json) manteniendo el orden y sin
+    duplicados. Los JSON que escribe el propio conversor (manifiesto,
+    informe) no se convierten.
+    """
+    own_files = (MANIFEST_NAME, RUN_REPORT_NAME)
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(glob.escape(pattern), "*.json")
+        found = sorted(glob.glob(pattern))
+        matches = [p for p in found if os.path.basename(p) not in own_files]
+        for path in matches if found else [pattern]:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _input_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def run_preview(args, json_paths):
+    """--preview: una vista previa (JSON) por fichero en stdout."""
+    texts = TEXTS[args.lang]
+    previews = []
+    failed = 0
+    for json_path in json_paths:
+        try:
+            previews.append(
+                preview_json_file(
+                    json_path,
+                    max_bytes=int(args.max_mb * 1024 * 1024),
+                    delimiter=DELIMITERS[args.delimiter],
+                    exact=args.exact_rows,
+                    tables=args.tables,
+                    exclude_tables=args.exclude_tables,
+                    columns=args.columns,
+                    exclude_columns=args.exclude_columns,
+                    languages=args.languages,
+                    lang=args.lang,
+                )
+            )
+        except Exception as e:
+            failed += 1
+            print(
+                texts["cli_failed"].format(path=json_path, error=e),
+                file=sys.stderr,
+            )
+    json.dump(previews, sys.stdout, ensure_ascii=False, indent=1)
+    print()
+    return 1 if failed else 0
+
+
+def run_cli(args):
+    """Convierte todos los JSON indicados. Devuelve el código de salida."""
+    texts = TEXTS[args.lang]
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    max_jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    patterns = list(args.inputs)
+    for manifest in args.manifest or []:
+        patterns.extend(read_batch_manifest(manifest))
+    json_paths = expand_inputs(patterns)
+    if args.preview:
+        return run_preview(args, json_paths)
+    max_jobs = max(1, min(max_jobs, len(json_paths)))
+
+    # Un JSON: output_dir tal cual. Varios: una subcarpeta por JSON dentro de
+    # output_dir o, en paralelo y sin output_dir, junto a cada JSON
+    output_dirs = [args.output_dir] * len(json_paths)
+    if len(json_paths) > 1 and (args.output_dir or max_jobs > 1):
+        output_dirs = batch_output_dirs(json_paths, args.output_dir)
+
+    options = dict(
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        delimiter=DELIMITERS[args.delimiter],
+        workers=workers,
+        csv_writer=args.csv_writer,
+        incremental=args.incremental,
+        delta=args.delta,
+        output_format=args.output_format,
+        compression=args.compress,
+        compressed_limit=args.limit_compressed,
+        pipelined_writes=args.pipelined_writes,
+        tables=args.tables,
+        exclude_tables=args.exclude_tables,
+        columns=args.columns,
+        exclude_columns=args.exclude_columns,
+        languages=args.languages,
+        language_layout=args.language_layout,
+        flatten_tables=args.flatten_tables,
+        assets_manifest=args.assets_manifest,
+        dedupe=args.dedupe,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        run_report=args.run_report,
+    )
+    jobs = [
+        dict(
+            json_path=json_path,
+            output_dir=output_dir,
+            # En paralelo cada JSON guarda su log de error en su carpeta
+            error_dir=output_dir if max_jobs > 1 else None,
+            name=(
+                os.path.basename(output_dir or json_path) if max_jobs > 1 else None
+            ),
+            size=_input_size(json_path),
+            lang=args.lang,
+            quiet=args.quiet,
+            max_mb=args.max_mb,
+            delimiter_label=args.delimiter,
+            options=options,
+        )
+        for json_path, output_dir in zip(json_paths, output_dirs)
+    ]
+
+    if max_jobs > 1 and not args.quiet:
+        print(texts["cli_batch_start"].format(n=len(jobs), jobs=max_jobs), flush=True)
+    memory_limit = int(args.max_memory_mb * 1024 * 1024) if args.max_memory_mb else None
+    results = run_batch(jobs, max_jobs, memory_limit, args.io_slots)
+    failed = sum(1 for result in results if not result["ok"])
+
+    if len(json_paths) > 1:
+        print(
+            texts["cli_summary"].format(
+                ok=len(json_paths) - failed, failed=failed
+            ),
+            file=sys.stderr if failed else sys.stdout,
+        )
+    return 1 if failed else 0
 
 
 # ------------------------------------------------------------
 #  INTERFAZ GRÁFICA
 # ------------------------------------------------------------
+def _load_tk():
+    """Importa tkinter bajo demanda (solo al abrir la interfaz gráfica)."""
+    global tk, ttk, filedialog, messagebox
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+
+
 class JsonToCsvApp:
     def __init__(self, root):
         self.root = root
@@ -736,12 +5460,31 @@ class JsonToCsvApp:
         )
         self.label_description.pack(side="left", padx=5)
 
+        self.cancel_btn = tk.Button(
+            top_frame,
+            command=self.cancel_conversion,
+            state="disabled",
+        )
+        self.cancel_btn.pack(side="right", padx=5)
+
         self.btn = tk.Button(
             top_frame,
             command=self.select_file,
         )
         self.btn.pack(side="right", padx=5)
 
+        self.preview_btn = tk.Button(
+            top_frame,
+            command=self.preview_file,
+        )
+        self.preview_btn.pack(side="right", padx=5)
+
+        # Conversión en segundo plano: el hilo publica eventos en la cola y
+        # la GUI los recoge cada UI_POLL_MS con after()
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+
         # Frame de opciones (tamaño + delimitador + idioma)
         options_frame = tk.Frame(root)
         options_frame.pack(padx=10, pady=(0, 5), fill="x")
@@ -766,6 +5509,110 @@ class JsonToCsvApp:
         )
         self.delim_menu.pack(side="left", padx=5)
 
+        # Segunda fila: formato de salida + compresión
+        output_frame = tk.Frame(root)
+        output_frame.pack(padx=10, pady=(0, 5), fill="x")
+
+        # Formato de salida (Parquet / Arrow necesitan pyarrow)
+        self.format_label = tk.Label(output_frame)
+        self.format_label.pack(side="left")
+        self.format_var = tk.StringVar(value="CSV")
+        self.format_menu = ttk.Combobox(
+            output_frame,
+            textvariable=self.format_var,
+            width=8,
+            state="readonly",
+            values=["CSV", "Parquet", "Arrow"],
+        )
+        self.format_menu.pack(side="left", padx=5)
+
+        # Compresión de los CSV (zstd necesita zstandard)
+        self.compress_label = tk.Label(output_frame)
+        self.compress_label.pack(side="left", padx=(20, 0))
+        self.compress_var = tk.StringVar(value="-")
+        self.compress_menu = ttk.Combobox(
+            output_frame,
+            textvariable=self.compress_var,
+            width=6,
+            state="readonly",
+            values=["-"] + list(COMPRESSIONS),
+        )
+        self.compress_menu.pack(side="left", padx=5)
+        self.compressed_limit_var = tk.BooleanVar(value=False)
+        self.compressed_limit_check = tk.Checkbutton(
+            output_frame, variable=self.compressed_limit_var
+        )
+        self.compressed_limit_check.pack(side="left", padx=5)
+
+        # Campos de tipo table en CSV aparte (<tabla>__<campo>_X.csv)
+        self.flatten_tables_var = tk.BooleanVar(value=False)
+        self.flatten_tables_check = tk.Checkbutton(
+            output_frame, variable=self.flatten_tables_var
+        )
+        self.flatten_tables_check.pack(side="left", padx=(20, 0))
+
+        # assets_X.csv con las URLs distintas de imágenes / ficheros
+        self.assets_manifest_var = tk.BooleanVar(value=False)
+        self.assets_manifest_check = tk.Checkbutton(
+            output_frame, variable=self.assets_manifest_var
+        )
+        self.assets_manifest_check.pack(side="left", padx=5)
+
+        # Productos repetidos por sku / id (solo JSON simple)
+        self.dedupe_label = tk.Label(output_frame)
+        self.dedupe_label.pack(side="left", padx=(20, 0))
+        self.dedupe_var = tk.StringVar(value="-")
+        self.dedupe_menu = ttk.Combobox(
+            output_frame,
+            textvariable=self.dedupe_var,
+            width=6,
+            state="readonly",
+            values=["-"] + list(DEDUPE_POLICIES),
+        )
+        self.dedupe_menu.pack(side="left", padx=5)
+
+        # Tercera fila: selección de tablas / columnas (solo Sales Layer).
+        # Patrones separados por comas; con ! delante se excluyen.
+        filter_frame = tk.Frame(root)
+        filter_frame.pack(padx=10, pady=(0, 5), fill="x")
+
+        self.tables_label = tk.Label(filter_frame)
+        self.tables_label.pack(side="left")
+        self.tables_var = tk.StringVar(value="")
+        self.tables_entry = tk.Entry(
+            filter_frame, textvariable=self.tables_var, width=22
+        )
+        self.tables_entry.pack(side="left", padx=5)
+
+        self.columns_label = tk.Label(filter_frame)
+        self.columns_label.pack(side="left", padx=(20, 0))
+        self.columns_var = tk.StringVar(value="")
+        self.columns_entry = tk.Entry(
+            filter_frame, textvariable=self.columns_var, width=22
+        )
+        self.columns_entry.pack(side="left", padx=5)
+
+        self.languages_label = tk.Label(filter_frame)
+        self.languages_label.pack(side="left", padx=(20, 0))
+        self.languages_var = tk.StringVar(value="")
+        self.languages_entry = tk.Entry(
+            filter_frame, textvariable=self.languages_var, width=8
+        )
+        self.languages_entry.pack(side="left", padx=5)
+
+        # Campos multi-idioma: columnas (-), un CSV por idioma o formato largo
+        self.language_layout_label = tk.Label(filter_frame)
+        self.language_layout_label.pack(side="left", padx=(20, 0))
+        self.language_layout_var = tk.StringVar(value="-")
+        self.language_layout_menu = ttk.Combobox(
+            filter_frame,
+            textvariable=self.language_layout_var,
+            width=6,
+            state="readonly",
+            values=["-"] + list(LANGUAGE_LAYOUTS),
+        )
+        self.language_layout_menu.pack(side="left", padx=5)
+
         # Idioma
         self.lang_label = tk.Label(options_frame)
         self.lang_label.pack(side="left", padx=(20, 0))
@@ -816,8 +5663,20 @@ class JsonToCsvApp:
         self.root.title(texts["window_title"])
         self.label_description.config(text=texts["description"])
         self.btn.config(text=texts["button"])
+        self.preview_btn.config(text=texts["preview_button"])
+        self.cancel_btn.config(text=texts["cancel_button"])
         self.size_label.config(text=texts["size_label"])
         self.delim_label.config(text=texts["delim_label"])
+        self.format_label.config(text=texts["format_label"])
+        self.compress_label.config(text=texts["compress_label"])
+        self.compressed_limit_check.config(text=texts["compressed_limit_label"])
+        self.flatten_tables_check.config(text=texts["flatten_tables_label"])
+        self.assets_manifest_check.config(text=texts["assets_manifest_label"])
+        self.dedupe_label.config(text=texts["dedupe_label"])
+        self.tables_label.config(text=texts["tables_label"])
+        self.columns_label.config(text=texts["columns_label"])
+        self.languages_label.config(text=texts["languages_label"])
+        self.language_layout_label.config(text=texts["language_layout_label"])
         self.lang_label.config(text=texts["lang_label"])
         self.progress_label.config(text=texts["progress_label"])
         self.log_label.config(text=texts["log_label"])
@@ -835,57 +5694,241 @@ class JsonToCsvApp:
     def get_full_log(self):
         return self.log_text.get("1.0", "end")
 
-    def ui_pump(self):
-        self.root.update_idletasks()
-        self.root.update()
+    def apply_progress(self, total=None, step=0):
+        """Actualiza la barra de progreso (solo desde el hilo de la GUI)."""
+        if total is not None:
+            self.progress["maximum"] = max(int(total), 1)
+            self.progress["value"] = 0
+        if step:
+            self.progress["value"] = min(
+                self.progress["value"] + step, self.progress["maximum"]
+            )
 
-    def set_progress_total(self, total):
-        """Configura el máximo de la barra de progreso."""
-        total = max(int(total), 1)
-        self.progress["maximum"] = total
-        self.progress["value"] = 0
-        self.ui_pump()
+    # ---- hilo de conversión ----
+    def run_conversion(
+        self,
+        file_path,
+        max_bytes,
+        delimiter,
+        lang,
+        output_format,
+        compression,
+        compressed_limit,
+        selection,
+    ):
+        """
+        Se ejecuta en el hilo de trabajo: nunca toca widgets de Tk.
+        selection: tablas / columnas / idiomas (ver process_json_file).
+        """
+        post = self.events.put
 
-    def progress_step(self, step=1):
-        """Avanza la barra de progreso."""
-        self.progress.step(step)
-        self.ui_pump()
+        def check_cancel():
+            if self.cancel_event.is_set():
+                raise ConversionCancelled()
 
-    # ---- flujo principal ----
-    def select_file(self):
-        lang = self.get_lang_code()
-        texts = TEXTS.get(lang, TEXTS["es"])
+        try:
+            process_json_file(
+                file_path,
+                log_fn=lambda msg: post(("log", msg)),
+                ui_update_fn=check_cancel,
+                max_bytes=max_bytes,
+                delimiter=delimiter,
+                lang=lang,
+                progress_set_total=lambda total: post(("total", total)),
+                progress_step=lambda step=1: post(("step", step)),
+                output_format=output_format,
+                compression=compression,
+                compressed_limit=compressed_limit,
+                **selection,
+            )
+        except ConversionCancelled:
+            post(("cancelled", None))
+        except Exception as e:
+            post(("error", str(e)))
+        else:
+            post(("done", None))
+
+    def poll_events(self):
+        """Recoge los eventos pendientes y repinta una sola vez."""
+        lines = []
+        step = 0
+        finished = None
+        while finished is None:
+            try:
+                kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                lines.append(value)
+            elif kind == "total":
+                self.apply_progress(total=value)
+                step = 0
+            elif kind == "step":
+                step += value
+            else:
+                finished = (kind, value)
+
+        if lines:
+            self.log("\n".join(lines))
+        self.apply_progress(step=step)
 
-        file_path = filedialog.askopenfilename(
+        if finished is None:
+            self.root.after(UI_POLL_MS, self.poll_events)
+        else:
+            self.finish_conversion(*finished)
+
+    def cancel_conversion(self):
+        self.cancel_event.set()
+        self.cancel_btn.config(state="disabled")
+
+    # ---- flujo principal ----
+    def ask_json_path(self, lang):
+        return filedialog.askopenfilename(
             title="Selecciona un archivo JSON"
             if lang == "es"
             else "Select a JSON file",
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
         )
-        if not file_path:
-            return
 
-        # Leer tamaño máximo en MB
+    def read_max_mb(self, texts):
+        """Tamaño máximo en MB o None (tras avisar) si no es válido."""
         try:
             mb = float(self.size_var.get().replace(",", "."))
             if mb <= 0:
                 raise ValueError
-            max_bytes = int(mb * 1024 * 1024)
         except Exception:
             messagebox.showerror(
                 texts["err_size_title"],
                 texts["err_size_msg"],
             )
+            return None
+        return mb
+
+    def read_delimiter(self):
+        delim_choice = self.delim_var.get()
+        return "\t" if delim_choice == "TAB" else delim_choice
+
+    def preview_file(self):
+        """Vista previa (tablas, filas y ficheros estimados) sin convertir."""
+        lang = self.get_lang_code()
+        texts = TEXTS.get(lang, TEXTS["es"])
+
+        file_path = self.ask_json_path(lang)
+        if not file_path:
+            return
+        mb = self.read_max_mb(texts)
+        if mb is None:
+            return
+        tables, exclude_tables = parse_patterns(self.tables_var.get())
+        columns, exclude_columns = parse_patterns(self.columns_var.get())
+        languages, _ = parse_patterns(self.languages_var.get())
+
+        self.btn.config(state="disabled")
+        self.preview_btn.config(state="disabled")
+        self.log(texts["log_preview"].format(path=file_path))
+        post = self.events.put
+
+        def run():
+            try:
+                preview = preview_json_file(
+                    file_path,
+                    max_bytes=int(mb * 1024 * 1024),
+                    delimiter=self.read_delimiter(),
+                    tables=tables,
+                    exclude_tables=exclude_tables,
+                    columns=columns,
+                    exclude_columns=exclude_columns,
+                    languages=languages,
+                    lang=lang,
+                )
+            except Exception as e:
+                post(("preview_error", str(e)))
+            else:
+                post(("preview", preview))
+
+        self.conversion = (file_path, int(mb * 1024 * 1024), lang)
+        self.worker = threading.Thread(target=run, daemon=True)
+        self.worker.start()
+        self.root.after(UI_POLL_MS, self.poll_events)
+
+    def show_preview(self, preview, texts):
+        """Ventana con una fila por tabla: columnas, filas, MB y ficheros."""
+        window = tk.Toplevel(self.root)
+        window.title(
+            texts["preview_title"].format(name=os.path.basename(preview["input"]))
+        )
+        headings = texts["preview_columns"]
+        tree = ttk.Treeview(
+            window, columns=list(range(len(headings))), show="headings", height=15
+        )
+        for idx, heading in enumerate(headings):
+            tree.heading(idx, text=heading)
+            tree.column(idx, anchor="w" if idx == 0 else "e", width=110)
+        for table in preview["tables"]:
+            rows = f"{table['rows']:,}" if table["rows_exact"] else f"~{table['rows']:,}"
+            tree.insert(
+                "",
+                "end",
+                values=(
+                    table["table"],
+                    table["columns"],
+                    rows,
+                    f"{table['output_bytes'] / (1024 * 1024):.1f}",
+                    table["files"],
+                ),
+            )
+        tree.pack(padx=10, pady=10, fill="both", expand=True)
+        tk.Label(
+            window,
+            text=texts["preview_summary"].format(
+                tables=len(preview["tables"]),
+                files=sum(t["files"] for t in preview["tables"]),
+                seconds=preview["seconds"],
+            ),
+        ).pack(padx=10, pady=(0, 10), anchor="w")
+
+    def select_file(self):
+        lang = self.get_lang_code()
+        texts = TEXTS.get(lang, TEXTS["es"])
+
+        file_path = self.ask_json_path(lang)
+        if not file_path:
             return
 
+        # Leer tamaño máximo en MB
+        mb = self.read_max_mb(texts)
+        if mb is None:
+            return
+        max_bytes = int(mb * 1024 * 1024)
+
         # Leer delimitador
         delim_choice = self.delim_var.get()
-        if delim_choice == "TAB":
-            delimiter = "\t"
-        else:
-            delimiter = delim_choice
+        delimiter = self.read_delimiter()
+        output_format = self.format_var.get().lower()
+        compression = self.compress_var.get()
+        if compression not in COMPRESSIONS:
+            compression = None
+        compressed_limit = self.compressed_limit_var.get()
+        tables, exclude_tables = parse_patterns(self.tables_var.get())
+        columns, exclude_columns = parse_patterns(self.columns_var.get())
+        languages, _ = parse_patterns(self.languages_var.get())
+        selection = {
+            "tables": tables,
+            "exclude_tables": exclude_tables,
+            "columns": columns,
+            "exclude_columns": exclude_columns,
+            "languages": languages,
+            "flatten_tables": self.flatten_tables_var.get(),
+            "assets_manifest": self.assets_manifest_var.get(),
+        }
+        if self.language_layout_var.get() in LANGUAGE_LAYOUTS:
+            selection["language_layout"] = self.language_layout_var.get()
+        if self.dedupe_var.get() in DEDUPE_POLICIES:
+            selection["dedupe"] = self.dedupe_var.get()
 
         self.btn.config(state="disabled")
+        self.preview_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
         self.progress["value"] = 0  # resetear barra
         self.log_text.config(state="normal")
         self.log_text.delete("1.0", "end")
@@ -894,19 +5937,41 @@ class JsonToCsvApp:
             texts["log_start"].format(mb=mb, delim=delim_choice)
         )
 
-        try:
-            process_json_file(
+        self.conversion = (file_path, max_bytes, lang)
+        self.cancel_event.clear()
+        self.worker = threading.Thread(
+            target=self.run_conversion,
+            args=(
                 file_path,
-                log_fn=self.log,
-                ui_update_fn=self.ui_pump,
-                max_bytes=max_bytes,
-                delimiter=delimiter,
-                lang=lang,
-                progress_set_total=self.set_progress_total,
-                progress_step=self.progress_step,
-            )
-        except Exception as e:
-            error_msg = str(e)
+                max_bytes,
+                delimiter,
+                lang,
+                output_format,
+                compression,
+                compressed_limit,
+                selection,
+            ),
+            daemon=True,
+        )
+        self.worker.start()
+        self.root.after(UI_POLL_MS, self.poll_events)
+
+    def finish_conversion(self, kind, value):
+        file_path, max_bytes, lang = self.conversion
+        texts = TEXTS.get(lang, TEXTS["es"])
+        self.worker = None
+        self.btn.config(state="normal")
+        self.preview_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+
+        if kind == "preview":
+            self.show_preview(value, texts)
+        elif kind == "preview_error":
+            messagebox.showerror(texts["err_convert_title"], value)
+        elif kind == "cancelled":
+            self.log(texts["log_cancelled"])
+        elif kind == "error":
+            error_msg = value
             full_log = self.get_full_log()
             saved = save_error_log(full_log, error_msg, file_path, lang)
 
@@ -920,15 +5985,34 @@ class JsonToCsvApp:
                     texts["err_convert_title"],
                     texts["err_convert_nosave"],
                 )
-        finally:
-            self.btn.config(state="normal")
+        else:
+            mb_value = max_bytes // (1024 * 1024)
+            messagebox.showinfo(
+                texts["done_title"],
+                texts["done_msg"].format(
+                    mb=mb_value,
+                    folder=os.path.abspath(os.path.dirname(file_path) or "."),
+                ),
+            )
 
 
-def main():
+def run_gui():
+    _load_tk()
     root = tk.Tk()
     app = JsonToCsvApp(root)
     root.mainloop()
 
 
+def main(argv=None):
+    """Sin argumentos abre la GUI; con ficheros JSON convierte por consola."""
+    args = build_arg_parser().parse_args(argv)
+    if args.gui or not (args.inputs or args.manifest):
+        run_gui()
+        return 0
+    return run_cli(args)
+
+
 if __name__ == "__main__":
-    main()
+    # Necesario para el pool de procesos en los ejecutables de PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
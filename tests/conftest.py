@@ -0,0 +1,54 @@
+"""
+Configuración común de los tests: el conversor es un script suelto en la
+raíz del repositorio, así que se añade al path como en benchmarks/cases.py.
+"""
+
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import pytest  # noqa: E402
+
+from benchmarks.generator import generate_saleslayer_export  # noqa: E402
+
+
+def read_outputs(path, suffixes=(".csv",)):
+    """{nombre: bytes} de los ficheros de salida de una carpeta."""
+    return {
+        name: open(os.path.join(path, name), "rb").read()
+        for name in sorted(os.listdir(path))
+        if name.endswith(suffixes)
+    }
+
+
+@pytest.fixture(scope="session")
+def saleslayer_export(tmp_path_factory):
+    """Export de Sales Layer sintético (3 tablas, todos los tipos de campo)."""
+    path = tmp_path_factory.mktemp("export") / "export.json"
+    generate_saleslayer_export(
+        str(path),
+        tables=3,
+        rows=1500,
+        columns=14,
+        type_mix={
+            "string": 4,
+            "numeric": 2,
+            "boolean": 1,
+            "list": 1,
+            "image": 1,
+            "file": 1,
+            "table": 1,
+        },
+        seed=7,
+    )
+    return str(path)
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return str(path)
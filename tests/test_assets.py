@@ -0,0 +1,121 @@
+"""
+Columnas image / file: la caché de celdas de AssetExtractor da lo mismo que
+convert_assets, y --assets-manifest escribe cada URL una vez con las tablas
+que la usan.
+"""
+
+import csv
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs, write_json
+
+
+def image(url, asset_id=1, status="ok"):
+    return [status, asset_id, url]
+
+
+def convert_all(cells, collect=False, finish=conv.escape_csv):
+    extractor = conv.AssetExtractor(finish, collect=collect)
+    convert = extractor.converter()
+    return [convert(cell) for cell in cells], extractor
+
+
+def test_cached_cells_match_convert_assets():
+    shared = [image("a.jpg"), image("b.jpg", 2)]
+    cells = [shared, None, [], "x", [image('c "1".jpg'), ["short"]]] * 50
+    cells += [[image(f"u{n}.jpg")] for n in range(100)]
+    got, _ = convert_all(cells)
+    assert got == [conv.convert_assets(cell) for cell in cells]
+
+
+def test_repeated_lists_are_joined_once():
+    calls = []
+
+    def finish(text):
+        calls.append(text)
+        return conv.escape_csv(text)
+
+    shared = [image("a.jpg"), image("b.jpg", 2)]
+    got, _ = convert_all([shared, [image("c.jpg")]] * 100, finish=finish)
+    assert got[:2] == ['"a.jpg | b.jpg"', '"c.jpg"']
+    assert calls == ["", "a.jpg | b.jpg", "c.jpg"]
+
+
+@pytest.mark.parametrize("cached", [True, False], ids=["cached", "uncached"])
+def test_urls_are_keyed_as_text(monkeypatch, cached):
+    if not cached:
+        monkeypatch.setattr(conv, "ASSET_CACHE_PROBE", 1)
+        monkeypatch.setattr(conv, "ASSET_CACHE_MIN_HITS", 1)
+    cells = [
+        [image("warmup")],
+        [image(5, asset_id=10)],
+        [image("5", asset_id=11)],
+        [image(1, asset_id=12)],
+        [image(True, asset_id=13)],
+        [image(1.0, asset_id=14)],
+        [image(["x"], asset_id=15)],
+        [image(5, asset_id=16)],
+    ]
+    got, extractor = convert_all(cells, collect=True)
+    assert got == [conv.convert_assets(cell) for cell in cells]
+    assert extractor.asset_list() == [
+        ["warmup", 1, "ok"],
+        ["5", 10, "ok"],
+        ["1", 12, "ok"],
+        ["True", 13, "ok"],
+        ["1.0", 14, "ok"],
+        ["['x']", 15, "ok"],
+    ]
+
+
+def sample_export():
+    return {
+        "data_schema_info": {
+            "products": {"ID": {"type": "numeric"}, "images": {"type": "image"}},
+            "variants": {"ID": {"type": "numeric"}, "files": {"type": "file"}},
+        },
+        "data_schema": {
+            "products": ["ID", "images"],
+            "variants": ["ID", "files"],
+        },
+        "data": {
+            "products": [
+                [1, [image("a.jpg", 100), image("b.jpg", 101, "new")]],
+                [2, [image("a.jpg", 100)]],
+                [3, None],
+            ],
+            "variants": [
+                [1, [image("b.jpg", 201), image("c.pdf", 202)]],
+                [2, [image(7, 203)]],
+            ],
+        },
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_assets_manifest(tmp_path, workers):
+    json_path = write_json(tmp_path / "export.json", sample_export())
+    out = tmp_path / "out"
+    report = conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        assets_manifest=True,
+        workers=workers,
+    )
+    with open(out / "assets_1.csv", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ["asset_id", "status", "url", "tables"],
+        ["100", "ok", "a.jpg", "products"],
+        ["101", "new", "b.jpg", "products,variants"],
+        ["202", "ok", "c.pdf", "variants"],
+        ["203", "ok", "7", "variants"],
+    ]
+    counts = {table["table"]: table.get("assets") for table in report["tables"]}
+    assert counts["products"] == 2 and counts["variants"] == 3
+    assert "assets_1.csv" in read_outputs(out)
@@ -0,0 +1,72 @@
+"""
+Conversión por lotes: un proceso que muere rompe el pool, pero solo el JSON
+que lo mató se da por fallido; los que estaban en marcha se repiten.
+"""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs, write_json
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="el proceso del pool hereda process_json_file parcheado",
+)
+
+
+def batch_jobs(tmp_path, names):
+    products = [{"id": n, "sku": f"S{n}", "name": f"Producto {n}"} for n in range(50)]
+    jobs = []
+    for name in names:
+        json_path = write_json(tmp_path / f"{name}.json", products)
+        jobs.append(
+            dict(
+                json_path=json_path,
+                output_dir=str(tmp_path / name),
+                error_dir=str(tmp_path / name),
+                name=name,
+                size=os.path.getsize(json_path),
+                lang="en",
+                quiet=True,
+                max_mb=1,
+                delimiter_label=",",
+                options=dict(max_bytes=1024 * 1024, run_report=False),
+            )
+        )
+    return jobs
+
+
+def test_crashed_worker_fails_only_its_job(tmp_path, monkeypatch):
+    convert = conv.process_json_file
+    calls = tmp_path / "calls.txt"
+
+    def crashing(json_path, **kwargs):
+        name = os.path.basename(json_path)
+        with open(calls, "a") as f:
+            f.write(name + "\n")
+        if name == "crash.json":
+            # Muere mientras los demás JSON siguen en marcha
+            time.sleep(0.2)
+            os._exit(1)
+        time.sleep(0.5)
+        return convert(json_path, **kwargs)
+
+    monkeypatch.setattr(conv, "process_json_file", crashing)
+    jobs = batch_jobs(tmp_path, ["a", "crash", "b"])
+    results = conv.run_batch(jobs, max_jobs=3)
+
+    assert [result["ok"] for result in results] == [True, False, True]
+    assert "terminated abruptly" in results[1]["error"]
+    for name in ("a", "b"):
+        assert list(read_outputs(tmp_path / name)) == ["products_1.csv"]
+    assert os.path.exists(tmp_path / "crash" / "conversion_error_log.txt")
+
+    # Primera vuelta los tres a la vez; luego cada uno por separado
+    started = calls.read_text().split()
+    assert sorted(started[:3]) == ["a.json", "b.json", "crash.json"]
+    assert sorted(started[3:]) == ["a.json", "b.json", "crash.json"]
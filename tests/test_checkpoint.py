@@ -0,0 +1,70 @@
+"""
+Checkpoint / reanudación: una conversión cortada a mitad de tabla y
+reanudada con resume=True deja los mismos ficheros que una sin cortes.
+"""
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs
+
+SPLIT_BYTES = 20 * 1024
+
+
+def convert(json_path, out, **options):
+    return conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        max_bytes=SPLIT_BYTES,
+        run_report=False,
+        **options,
+    )
+
+
+@pytest.fixture(scope="module")
+def clean_output(saleslayer_export, tmp_path_factory):
+    out = tmp_path_factory.mktemp("clean")
+    convert(saleslayer_export, out)
+    return read_outputs(out)
+
+
+class DiskFull(OSError):
+    pass
+
+
+@pytest.mark.parametrize("options", [{}, {"workers": 2}], ids=["serial", "ranges"])
+# Escrituras de filas: a mitad de la 1.ª y de la 2.ª tabla (1500 filas cada
+# una) y en la primera fila de la 3.ª
+@pytest.mark.parametrize("fail_at", [700, 2300, 3001])
+def test_resume_after_crash_matches_clean_run(
+    saleslayer_export, clean_output, tmp_path, monkeypatch, options, fail_at
+):
+    if options.get("workers"):
+        # Rangos de filas: las filas se escriben desde este proceso
+        monkeypatch.setattr(conv, "ROW_RANGE_BYTES", 64 * 1024)
+    write_bytes = conv.RollingCsvSink.write_bytes
+    written = 0
+
+    def failing(self, data):
+        nonlocal written
+        written += 1
+        if written == fail_at:
+            raise DiskFull("no space left on device")
+        return write_bytes(self, data)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(conv.RollingCsvSink, "write_bytes", failing)
+        with pytest.raises(DiskFull):
+            convert(saleslayer_export, tmp_path, checkpoint=True, **options)
+
+    # Sin ficheros a medias: lo que queda son ficheros completos
+    partial = read_outputs(tmp_path)
+    assert partial and len(partial) < len(clean_output)
+    assert all(clean_output[name] == data for name, data in partial.items())
+
+    report = convert(saleslayer_export, tmp_path, resume=True, **options)
+    resumed = sum(t.get("resumed_rows", 0) for t in report["tables"])
+    assert resumed == 0 if fail_at % 1500 == 1 else resumed > 0
+    assert read_outputs(tmp_path) == clean_output
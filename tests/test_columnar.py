@@ -0,0 +1,138 @@
+"""
+Salida columnar (Parquet / Arrow IPC): mismas filas que el CSV, con
+numeric como float64 y boolean como bool, y dividida por max_bytes.
+"""
+
+import csv
+import io
+import os
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs, write_json
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("pyarrow.parquet")
+import pyarrow.parquet as pq  # noqa: E402
+
+
+def convert(json_path, out, **options):
+    options.setdefault("max_bytes", 1024 * 1024 * 1024)
+    return conv.process_json_file(
+        json_path, output_dir=str(out), lang="en", run_report=False, **options
+    )
+
+
+def read_table(path, output_format):
+    if output_format == "parquet":
+        return pq.read_table(path)
+    with pa.OSFile(str(path), "rb") as f:
+        return pa.ipc.open_file(f).read_all()
+
+
+def columnar_tables(out, output_format):
+    """{tabla: pyarrow.Table} uniendo las partes en orden."""
+    parts = {}
+    for name in os.listdir(out):
+        if name.endswith("." + output_format):
+            base, _, index = name[: -len(output_format) - 1].rpartition("_")
+            parts.setdefault(base, []).append((int(index), out / name))
+    return {
+        base: pa.concat_tables(
+            [read_table(path, output_format) for _, path in sorted(files)]
+        )
+        for base, files in parts.items()
+    }
+
+
+def csv_tables(out):
+    tables = {}
+    for name, data in read_outputs(out).items():
+        base = name[: -len(".csv")].rpartition("_")[0]
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+        header, body = rows[0], rows[1:]
+        if base in tables:
+            tables[base][1].extend(body)
+        else:
+            tables[base] = (header, body)
+    return tables
+
+
+@pytest.fixture(scope="module")
+def csv_output(saleslayer_export, tmp_path_factory):
+    out = tmp_path_factory.mktemp("csv")
+    convert(saleslayer_export, out)
+    return csv_tables(out)
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_matches_csv(
+    saleslayer_export, csv_output, tmp_path, output_format
+):
+    convert(saleslayer_export, tmp_path, output_format=output_format)
+    tables = columnar_tables(tmp_path, output_format)
+    assert set(tables) == set(csv_output)
+    info = conv.open_json_export(saleslayer_export).data_schema_info
+    for name, table in tables.items():
+        header, rows = csv_output[name]
+        assert table.column_names == header
+        assert table.num_rows == len(rows)
+        for idx, field in enumerate(table.schema):
+            kind = info[name].get(field.name, {}).get("type")
+            values = table.column(idx).to_pylist()
+            cells = [row[idx] for row in rows]
+            if kind == "numeric":
+                assert field.type == pa.float64()
+                assert values == [conv.columnar_number(cell) for cell in cells]
+            elif kind == "boolean":
+                assert field.type == pa.bool_()
+                assert values == [conv.columnar_bool(cell) for cell in cells]
+            else:
+                assert field.type == pa.string()
+                assert values == cells
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_splits_by_max_bytes(saleslayer_export, tmp_path, output_format):
+    max_bytes = 64 * 1024
+    convert(
+        saleslayer_export, tmp_path, output_format=output_format, max_bytes=max_bytes
+    )
+    whole = tmp_path / "whole"
+    convert(saleslayer_export, whole, output_format=output_format)
+    files = [name for name in os.listdir(tmp_path) if name.endswith(output_format)]
+    assert len(files) > len(columnar_tables(whole, output_format))
+    for name in files:
+        # El pie del fichero no entra en la estimación: límite aproximado
+        assert os.path.getsize(tmp_path / name) <= max_bytes * 1.05
+    split = columnar_tables(tmp_path, output_format)
+    for name, table in columnar_tables(whole, output_format).items():
+        assert split[name].equals(table)
+
+
+def test_simple_mode_parquet_types(tmp_path):
+    products = [
+        {
+            "id": 1,
+            "sku": "A",
+            "name": "Camiseta",
+            "price": "19.95",
+            "weight": 0.2,
+            "variants": [{"sku": "A-M", "price": 21, "inventory_level": "7"}],
+            "categories": ["Ropa"],
+        },
+        {"id": 2, "sku": "B", "name": "Sin precio", "price": ""},
+    ]
+    json_path = write_json(tmp_path / "products.json", products)
+    convert(json_path, tmp_path / "out", output_format="parquet")
+    tables = columnar_tables(tmp_path / "out", "parquet")
+    products_table = tables["products"]
+    assert products_table.schema.field("price").type == pa.float64()
+    assert products_table.column("price").to_pylist() == [19.95, None]
+    assert products_table.column("reference").to_pylist() == ["A", "B"]
+    variants = tables["variants"].to_pylist()
+    assert variants[0]["inventory_level"] == 7.0
+    assert variants[0]["product_reference"] == "A"
+    assert tables["categories"].column("category_name").to_pylist() == ["Ropa"]
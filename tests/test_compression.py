@@ -0,0 +1,113 @@
+"""
+CSV comprimidos (gzip / zstd): al descomprimirlos salen los mismos bytes que
+el CSV plano y, con compressed_limit, max_bytes limita el tamaño en disco.
+"""
+
+import gzip
+import io
+import os
+import sys
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs
+
+
+def convert(json_path, out, max_bytes, **options):
+    return conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        max_bytes=max_bytes,
+        **options,
+    )
+
+
+def decompress(path):
+    data = path.read_bytes()
+    if path.suffix == ".gz":
+        return gzip.decompress(data)
+    import zstandard
+
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        io.BytesIO(data), read_across_frames=True
+    )
+    return reader.read()
+
+
+def decompressed_outputs(out, suffix):
+    return {
+        name[: -len(suffix)]: decompress(out / name)
+        for name in sorted(os.listdir(out))
+        if name.endswith(suffix)
+    }
+
+
+def table_rows(outputs):
+    """{tabla: (cabecera, filas)} uniendo las partes _N en orden."""
+    tables = {}
+    for name in sorted(outputs, key=lambda n: int(n[:-4].rpartition("_")[2])):
+        lines = outputs[name].splitlines(keepends=True)
+        base = name[:-4].rpartition("_")[0]
+        header, rows = tables.setdefault(base, (lines[0], []))
+        assert lines[0] == header
+        rows.extend(lines[1:])
+    return tables
+
+
+@pytest.mark.parametrize("compression, suffix", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_compressed_files_match_plain_csv(
+    saleslayer_export, tmp_path, compression, suffix
+):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    max_bytes = 256 * 1024
+    convert(saleslayer_export, tmp_path / "plain", max_bytes)
+    convert(
+        saleslayer_export, tmp_path / "packed", max_bytes, compression=compression
+    )
+    plain = read_outputs(tmp_path / "plain")
+    assert len(plain) > 3
+    assert decompressed_outputs(tmp_path / "packed", suffix) == plain
+
+
+@pytest.mark.parametrize("compression, suffix", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_compressed_limit_caps_file_size(
+    saleslayer_export, tmp_path, compression, suffix
+):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    max_bytes = 48 * 1024
+    convert(saleslayer_export, tmp_path / "plain", max_bytes)
+    convert(
+        saleslayer_export,
+        tmp_path / "packed",
+        max_bytes,
+        compression=compression,
+        compressed_limit=True,
+    )
+    packed = tmp_path / "packed"
+    sizes = {
+        name: os.path.getsize(packed / name)
+        for name in os.listdir(packed)
+        if name.endswith(suffix)
+    }
+    assert all(size <= max_bytes for size in sizes.values())
+
+    plain = read_outputs(tmp_path / "plain")
+    outputs = decompressed_outputs(packed, suffix)
+    # Más filas por fichero que en CSV plano: menos ficheros, y los CSV
+    # descomprimidos superan max_bytes
+    assert len(outputs) < len(plain)
+    assert max(len(data) for data in outputs.values()) > max_bytes
+    assert table_rows(outputs) == table_rows(plain)
+
+
+def test_zstd_missing_reports_install_hint(saleslayer_export, tmp_path, monkeypatch):
+    monkeypatch.setattr(conv, "zstandard", None)
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(Exception, match="pip install zstandard"):
+        convert(saleslayer_export, tmp_path, 1024 * 1024, compression="zstd")
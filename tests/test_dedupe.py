@@ -0,0 +1,98 @@
+"""
+Deduplicación del JSON simple por referencia (sku / id): primera o última
+aparición, productos y variantes por separado, y filas sin referencia que
+se escriben siempre.
+"""
+
+import csv
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import write_json
+
+
+def product(name, sku=None, pid=None, variants=()):
+    return {"id": pid, "sku": sku, "name": name, "variants": list(variants)}
+
+
+def variant(sku=None, vid=None, price=1):
+    return {"id": vid, "sku": sku, "price": price}
+
+
+def convert(tmp_path, products, dedupe):
+    json_path = write_json(tmp_path / "products.json", products)
+    out = tmp_path / "out"
+    report = conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        max_bytes=10 * 1024 * 1024,
+        run_report=False,
+        dedupe=dedupe,
+    )
+
+    def rows(table, *columns):
+        with open(out / f"{table}_1.csv", encoding="utf-8-sig", newline="") as f:
+            return [tuple(r[c] for c in columns) for r in csv.DictReader(f)]
+
+    return report["tables"][0], rows
+
+
+CATALOGUE = [
+    product("A uno", sku="A", variants=[variant("A-1"), variant("A-2")]),
+    product("B", sku="B", variants=[variant("A-1", price=2)]),
+    product("A dos", sku="A", variants=[variant("A-3")]),
+    product("Solo id", pid=7),
+    product("Id repetido", pid=7),
+]
+
+
+@pytest.mark.parametrize(
+    "dedupe, expected",
+    [
+        ("first", [("A", "A uno"), ("B", "B"), ("7", "Solo id")]),
+        ("last", [("B", "B"), ("A", "A dos"), ("7", "Id repetido")]),
+    ],
+)
+def test_products_keep_first_or_last(tmp_path, dedupe, expected):
+    result, rows = convert(tmp_path, CATALOGUE, dedupe)
+    assert rows("products", "reference", "name") == expected
+    assert result["duplicates"] == 2
+
+
+@pytest.mark.parametrize("dedupe", ["first", "last"])
+def test_variants_deduplicated_apart_from_products(tmp_path, dedupe):
+    products = [
+        product("P1", sku="X", variants=[variant("X"), variant("V1")]),
+        product("P2", sku="V1", variants=[variant("V1", price=5), variant("V2")]),
+    ]
+    result, rows = convert(tmp_path, products, dedupe)
+    # Un sku de variante igual al de un producto no cuenta como duplicado
+    assert rows("products", "reference") == [("X",), ("V1",)]
+    assert rows("variants", "variant_reference", "product_reference") == [
+        ("X", "X"),
+        ("V1", "X"),
+        ("V2", "V1"),
+    ]
+    assert result["duplicates"] == 0
+    assert result["variant_duplicates"] == 1
+
+
+@pytest.mark.parametrize("dedupe", ["first", "last"])
+def test_rows_without_reference_are_always_written(tmp_path, dedupe):
+    products = [
+        product("Sin ref 1", variants=[variant(), variant(price=2)]),
+        product("Sin ref 2", sku="<!-- sku -->", variants=[variant(price=3)]),
+        product("Con ref", sku="R"),
+        product("Sin ref 3", sku=""),
+        product("Con ref repetida", sku="R"),
+    ]
+    result, rows = convert(tmp_path, products, dedupe)
+    kept = "Con ref" if dedupe == "first" else "Con ref repetida"
+    names = [name for (name,) in rows("products", "name")]
+    assert sorted(names) == sorted(["Sin ref 1", "Sin ref 2", "Sin ref 3", kept])
+    assert rows("variants", "price") == [("1",), ("2",), ("3",)]
+    assert result["duplicates"] == 1
+    assert result["variant_duplicates"] == 0
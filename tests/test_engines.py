@@ -0,0 +1,186 @@
+"""
+Los distintos motores dan los mismos ficheros: procesos, rangos de filas,
+escritura en segundo plano, csv.writer y compresión frente a la conversión
+en serie; y cada fichero dividido respeta max_bytes.
+"""
+
+import codecs
+import gzip
+import os
+import random
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+from benchmarks.cases import reference_split_by_size
+from benchmarks.generator import MULTIBYTE_WORDS, _Text, generate_simple_export
+
+from conftest import read_outputs, write_json
+
+SPLIT_BYTES = 200 * 1024
+
+
+def convert(json_path, out, **options):
+    options.setdefault("max_bytes", SPLIT_BYTES)
+    return conv.process_json_file(
+        json_path, output_dir=str(out), lang="en", run_report=False, **options
+    )
+
+
+@pytest.fixture(scope="module")
+def serial_output(saleslayer_export, tmp_path_factory):
+    out = tmp_path_factory.mktemp("serial")
+    convert(saleslayer_export, out)
+    return read_outputs(out)
+
+
+@pytest.fixture(scope="module")
+def simple_export(tmp_path_factory):
+    path = tmp_path_factory.mktemp("simple") / "products.json"
+    generate_simple_export(str(path), products=2000, seed=3)
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"workers": 2},
+        {"pipelined_writes": True},
+        {"workers": 2, "pipelined_writes": True},
+        {"csv_writer": True},
+        {"workers": 2, "csv_writer": True},
+    ],
+    ids=lambda options: "-".join(options),
+)
+def test_engines_match_serial(saleslayer_export, serial_output, tmp_path, options):
+    convert(saleslayer_export, tmp_path, **options)
+    assert read_outputs(tmp_path) == serial_output
+
+
+def test_row_ranges_match_serial(
+    saleslayer_export, serial_output, tmp_path, monkeypatch
+):
+    # Rangos pequeños: cada tabla se reparte entre los procesos por filas
+    monkeypatch.setattr(conv, "ROW_RANGE_BYTES", 64 * 1024)
+    calls = []
+    export_ranges = conv._export_table_ranges
+
+    def counting(pool, task, *args, **kwargs):
+        calls.append(len(task["ranges"]))
+        return export_ranges(pool, task, *args, **kwargs)
+
+    monkeypatch.setattr(conv, "_export_table_ranges", counting)
+    report = convert(saleslayer_export, tmp_path, workers=3)
+    assert len(calls) == 3 and min(calls) > 2
+    assert read_outputs(tmp_path) == serial_output
+
+    # Lectura y conversión medidas en el pool; la espera, aparte
+    for table in report["tables"]:
+        assert table["parse_seconds"] > 0 and table["convert_seconds"] > 0
+        assert "wait_seconds" in table
+    assert report["stages"]["wait"] == sum(t["wait_seconds"] for t in report["tables"])
+
+
+def test_gzip_matches_plain(saleslayer_export, serial_output, tmp_path):
+    convert(saleslayer_export, tmp_path, compression="gzip")
+    files = read_outputs(tmp_path, suffixes=(".csv.gz",))
+    assert {
+        name[: -len(".gz")]: gzip.decompress(data) for name, data in files.items()
+    } == serial_output
+
+
+def check_splits(path, max_bytes):
+    """Cada fichero cabe en max_bytes y las partes juntas son la tabla entera."""
+    tables = {}
+    for name, data in read_outputs(path).items():
+        base, _, index = name[: -len(".csv")].rpartition("_")
+        tables.setdefault(base, []).append((int(index), data))
+    for base, parts in tables.items():
+        parts.sort()
+        assert [index for index, _ in parts] == list(range(1, len(parts) + 1))
+        headers = set()
+        rows = []
+        for _, data in parts:
+            assert data.startswith(codecs.BOM_UTF8)
+            lines = data[len(codecs.BOM_UTF8):].split(b"\n")
+            assert lines[-1] == b""
+            headers.add(lines[0])
+            rows += lines[1:-1]
+            # Solo una fila más grande que el límite puede pasarse
+            assert len(data) - len(codecs.BOM_UTF8) <= max_bytes or len(lines) == 3
+        assert len(headers) == 1
+        tables[base] = rows
+    return tables
+
+
+@pytest.mark.parametrize("max_bytes", [20 * 1024, SPLIT_BYTES])
+def test_saleslayer_splits_respect_max_bytes(saleslayer_export, tmp_path, max_bytes):
+    split = tmp_path / "split"
+    whole = tmp_path / "whole"
+    convert(saleslayer_export, split, max_bytes=max_bytes)
+    convert(saleslayer_export, whole, max_bytes=1024 * 1024 * 1024)
+    split_tables = check_splits(split, max_bytes)
+    assert len(read_outputs(split)) > len(read_outputs(whole))
+    assert split_tables == check_splits(whole, 1024 * 1024 * 1024)
+
+
+def test_simple_splits_and_pipelined_writes(simple_export, tmp_path):
+    plain = tmp_path / "plain"
+    pipelined = tmp_path / "pipelined"
+    whole = tmp_path / "whole"
+    convert(simple_export, plain, max_bytes=50 * 1024)
+    convert(simple_export, pipelined, max_bytes=50 * 1024, pipelined_writes=True)
+    convert(simple_export, whole, max_bytes=1024 * 1024 * 1024)
+    assert read_outputs(plain) == read_outputs(pipelined)
+    assert check_splits(plain, 50 * 1024) == check_splits(whole, 1024 * 1024 * 1024)
+    assert {"products", "variants", "categories"} <= set(check_splits(plain, 50 * 1024))
+
+
+@pytest.mark.parametrize("max_bytes", [300, 4 * 1024])
+def test_split_by_size_matches_original(tmp_path, max_bytes):
+    text = _Text(random.Random(3), vocabulary=MULTIBYTE_WORDS)
+    rows = [",".join(conv.escape_csv(text()) for _ in range(4)) for _ in range(500)]
+    # Una fila mayor que el límite va sola en su fichero
+    rows.insert(200, conv.escape_csv("ñ" * 400))
+    header = '"a","b","c","d"\n'
+    (tmp_path / "new").mkdir()
+    (tmp_path / "old").mkdir()
+    conv.split_by_size(str(tmp_path / "new"), "t", header, rows, max_bytes, "en")
+    reference_split_by_size(str(tmp_path / "old"), "t", header, rows, max_bytes, "en")
+    new = read_outputs(tmp_path / "new")
+    assert len(new) > 2
+    assert new == read_outputs(tmp_path / "old")
+
+
+def test_largest_table_ranges_are_queued_first(tmp_path, monkeypatch):
+    # Dos tablas pequeñas antes de la grande en el fichero
+    schema = ["ID", "name"]
+    info = {"ID": {"type": "numeric"}, "name": {"type": "string"}}
+    export = {
+        "data_schema_info": {name: info for name in ("small_a", "small_b", "big")},
+        "data_schema": {name: schema for name in ("small_a", "small_b", "big")},
+        "data": {
+            "small_a": [[n, "a"] for n in range(50)],
+            "small_b": [[n, "b" * 2] for n in range(50)],
+            "big": [[n, f"Producto {n} " * 4] for n in range(4000)],
+        },
+    }
+    json_path = write_json(tmp_path / "export.json", export)
+    monkeypatch.setattr(conv, "ROW_RANGE_BYTES", 16 * 1024)
+
+    submitted = []
+    pool_class = conv.concurrent.futures.ProcessPoolExecutor
+
+    class RecordingPool(pool_class):
+        def submit(self, fn, *args, **kwargs):
+            if fn is conv._export_table_task:
+                submitted.append(args[0]["table"])
+            else:
+                submitted.append("range")
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(conv.concurrent.futures, "ProcessPoolExecutor", RecordingPool)
+    convert(json_path, tmp_path / "out", workers=2)
+    ranges = submitted.count("range")
+    assert ranges > 4
+    assert submitted == ["range"] * ranges + ["small_b", "small_a"]
@@ -0,0 +1,125 @@
+"""
+escape_csv y el backend csv.writer (normalize_csv_text + QUOTE_ALL) dan
+byte a byte lo mismo que el escape_csv original (cadena de replace).
+"""
+
+import csv
+import io
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+
+def original_escape_csv(value):
+    """escape_csv de la versión inicial del conversor."""
+    if value is None:
+        return '""'
+    s = str(value)
+    s = s.replace("\r\n", " ")
+    s = s.replace("\n", " ")
+    s = s.replace("\r", " ")
+    s = s.replace("\t", " ")
+    s = s.strip()
+    s = s.replace('"', '""')
+    return f'"{s}"'
+
+
+# Valores tal como llegan en campos de Sales Layer: descripciones HTML,
+# textos multilínea de Windows / Mac antiguo / Unix, comillas, espacios
+# extremos y texto fuera del plano básico
+FIELD_VALUES = [
+    None,
+    "",
+    0,
+    -12,
+    10**20,
+    19.95,
+    1e-07,
+    float("inf"),
+    True,
+    "Camiseta básica",
+    '<p class="intro">Algodón 100%</p>\r\n<ul>\r\n\t<li>Talla "M"</li>\r\n</ul>',
+    "Línea 1\nLínea 2\n\nLínea 4",
+    "Mac antiguo\rsegunda línea\r",
+    "\r\n\r\n",
+    "\r\r\n\n\r",
+    "col1\tcol2\t\tcol4",
+    '  "Edición" limitada  ',
+    '"',
+    '""',
+    'Pulgadas: 27" y 32"',
+    "\t  espacios y tabulador al principio",
+    "al final \n",
+    "\u00a0no-break\u00a0",
+    "separador\u2028de línea\u2029",
+    "emoji 😀 y clave de sol 𝄞",
+    "中文描述\r\n第二行",
+    "<!-- comentario --><div>\n  <b>HTML</b>\n</div>",
+    "x" * 5000 + '\r\n"' + "y" * 5000,
+]
+
+
+@pytest.mark.parametrize("value", FIELD_VALUES)
+def test_escape_csv_matches_original(value):
+    assert conv.escape_csv(value) == original_escape_csv(value)
+
+
+@pytest.mark.parametrize("value", FIELD_VALUES)
+def test_normalize_csv_text_matches_unquoted_original(value):
+    quoted = original_escape_csv(value)
+    assert conv.normalize_csv_text(value).replace('"', '""') == quoted[1:-1]
+
+
+@pytest.mark.parametrize("delimiter", [",", ";", "|", "\t"])
+def test_csv_writer_row_matches_escape_csv_row(delimiter):
+    out = io.StringIO()
+    writer = csv.writer(
+        out, delimiter=delimiter, quoting=csv.QUOTE_ALL, lineterminator="\n"
+    )
+    writer.writerow([conv.normalize_csv_text(value) for value in FIELD_VALUES])
+    expected = delimiter.join([original_escape_csv(v) for v in FIELD_VALUES]) + "\n"
+    assert out.getvalue() == expected
+
+
+def test_export_table_backends_write_identical_files(tmp_path):
+    schema = ["ID", "name", "description", "price", {"images": ["THM"]}, "tags"]
+    info = {
+        "ID": {"type": "numeric"},
+        "name": {"type": "string"},
+        "description": {"type": "string"},
+        "price": {"type": "numeric"},
+        "images": {"type": "image"},
+        "tags": {"type": "list"},
+    }
+    rows = [
+        [
+            n,
+            FIELD_VALUES[n % len(FIELD_VALUES)],
+            FIELD_VALUES[(n * 7) % len(FIELD_VALUES)],
+            FIELD_VALUES[(n * 3) % len(FIELD_VALUES)],
+            [["U", n, f"https://img.example.com/{n}.jpg"]],
+            ["a\tb", 'c"d'],
+        ]
+        for n in range(300)
+    ]
+    outputs = []
+    for csv_writer in (False, True):
+        out = tmp_path / str(csv_writer)
+        out.mkdir()
+        conv.export_table(
+            "products",
+            schema,
+            info,
+            rows,
+            str(out),
+            64 * 1024,
+            ";",
+            "en",
+            csv_writer=csv_writer,
+        )
+        outputs.append(
+            {p.name: p.read_bytes() for p in sorted(out.iterdir())}
+        )
+    assert len(outputs[0]) > 1
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,144 @@
+"""
+Tablas embebidas (--flatten-tables): cada campo de tipo table va a su propio
+<tabla>__<campo>_N.csv con parent_ID, position, una columna por subcampo y
+_extra para lo inesperado, y sale del CSV de la tabla padre.
+"""
+
+import csv
+import os
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs, write_json
+
+
+def sample_export():
+    return {
+        "data_schema_info": {
+            "products": {
+                "ID": {"type": "numeric"},
+                "equiv": {"type": "table"},
+                "specs": {"type": "table"},
+            }
+        },
+        "data_schema": {
+            "products": ["ID", "name", {"equiv": ["code", "qty"]}, "specs"]
+        },
+        "data": {
+            "products": [
+                [
+                    1,
+                    "A",
+                    [{"code": "X1", "qty": 2}, {"code": "X2", "qty": 1, "note": "n"}],
+                    [{"k": "color", "v": "red"}],
+                ],
+                [
+                    2,
+                    "B",
+                    [],
+                    [
+                        {"k": "size", "v": "M"},
+                        {"v": "S", "k": "size2", "extra": [1]},
+                        "raw",
+                    ],
+                ],
+                [3, "C", None, None],
+            ]
+        },
+    }
+
+
+def convert(tmp_path, **options):
+    json_path = write_json(tmp_path / "export.json", sample_export())
+    out = tmp_path / "out"
+    conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        **options,
+    )
+    tables = {}
+    for name in sorted(os.listdir(out)):
+        with open(out / name, encoding="utf-8-sig", newline="") as f:
+            tables[name] = list(csv.reader(f))
+    return out, tables
+
+
+def test_embedded_tables_get_their_own_files(tmp_path):
+    _, tables = convert(tmp_path, flatten_tables=True)
+    assert sorted(tables) == [
+        "products_1.csv",
+        "products__equiv_1.csv",
+        "products__specs_1.csv",
+    ]
+    assert tables["products_1.csv"] == [
+        ["ID", "name"],
+        ["1", "A"],
+        ["2", "B"],
+        ["3", "C"],
+    ]
+    # Subcampos de data_schema; los que sobran van a _extra
+    assert tables["products__equiv_1.csv"] == [
+        ["parent_ID", "position", "code", "qty", "_extra"],
+        ["1", "1", "X1", "2", ""],
+        ["1", "2", "X2", "1", '{"note": "n"}'],
+    ]
+    # Sin subcampos en data_schema: los del primer elemento con datos
+    assert tables["products__specs_1.csv"] == [
+        ["parent_ID", "position", "k", "v", "_extra"],
+        ["1", "1", "color", "red", ""],
+        ["2", "1", "size", "M", ""],
+        ["2", "2", "size2", "S", '{"extra": [1]}'],
+        ["2", "3", "", "", "raw"],
+    ]
+
+
+def test_without_flatten_tables_fields_stay_in_parent(tmp_path):
+    _, tables = convert(tmp_path)
+    assert sorted(tables) == ["products_1.csv"]
+    assert tables["products_1.csv"][0] == ["ID", "name", "equiv", "specs"]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [dict(csv_writer=True), dict(workers=2), dict(pipelined_writes=True)],
+    ids=["csv_writer", "workers", "pipelined"],
+)
+def test_flatten_engines_match(tmp_path, options):
+    (tmp_path / "serial").mkdir()
+    (tmp_path / "other").mkdir()
+    serial, _ = convert(tmp_path / "serial", flatten_tables=True)
+    other, _ = convert(tmp_path / "other", flatten_tables=True, **options)
+    assert read_outputs(other) == read_outputs(serial)
+
+
+def test_embedded_table_splits_by_max_bytes(tmp_path):
+    export = sample_export()
+    item = {"code": "X" * 40, "qty": 1}
+    export["data"]["products"] = [
+        [n, f"P{n}", [item] * 5, None] for n in range(1, 201)
+    ]
+    json_path = write_json(tmp_path / "export.json", export)
+    out = tmp_path / "out"
+    conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        max_bytes=8 * 1024,
+        flatten_tables=True,
+    )
+    files = [name for name in read_outputs(out) if "__equiv_" in name]
+    assert len(files) > 1
+    rows = 0
+    for name in files:
+        # max_bytes no cuenta el BOM
+        assert os.path.getsize(out / name) <= 8 * 1024 + 3
+        with open(out / name, encoding="utf-8-sig", newline="") as f:
+            header, *body = csv.reader(f)
+        assert header == ["parent_ID", "position", "code", "qty", "_extra"]
+        rows += len(body)
+    assert rows == 200 * 5
@@ -0,0 +1,167 @@
+"""
+Modo incremental / delta: huella de las filas decodificadas, delta solo a
+partir de la segunda ejecución y limpieza de ficheros que ya no se generan.
+"""
+
+import json
+import os
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import read_outputs
+
+
+def make_export(products, formats):
+    return {
+        "data_schema_info": {
+            "products": {
+                "ID": {"type": "numeric"},
+                "name": {"type": "string"},
+                "price": {"type": "numeric"},
+            },
+            "formats": {"ID": {"type": "numeric"}, "color": {"type": "string"}},
+        },
+        "data_schema": {
+            "products": ["ID", "name", "price"],
+            "formats": ["ID", "color"],
+        },
+        "data": {"products": products, "formats": formats},
+    }
+
+
+def sample_export():
+    products = [[n, f"Producto {n}", n * 1.5] for n in range(1, 61)]
+    formats = [[n, ("rojo", "azul", "verde")[n % 3]] for n in range(1, 31)]
+    return make_export(products, formats)
+
+
+def write(path, data, **dump_options):
+    dump_options.setdefault("ensure_ascii", False)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_options)
+
+
+def convert(json_path, out, **options):
+    options.setdefault("max_bytes", 10 * 1024 * 1024)
+    return conv.process_json_file(
+        str(json_path), output_dir=str(out), lang="en", run_report=False, **options
+    )
+
+
+def exported_tables(report):
+    return sorted(table["table"] for table in report["tables"])
+
+
+def test_reformatted_json_is_unchanged(tmp_path):
+    json_path = tmp_path / "export.json"
+    out = tmp_path / "out"
+    data = sample_export()
+    write(json_path, data, separators=(",", ":"))
+    assert exported_tables(convert(json_path, out, incremental=True)) == [
+        "formats",
+        "products",
+    ]
+    first = read_outputs(out)
+
+    # Mismas filas con otro formato: sangría, espacios y escapes \uXXXX.
+    # Se exportan una vez (la huella sale de esa pasada) y quedan igual
+    write(json_path, data, indent=2, ensure_ascii=True)
+    report = convert(json_path, out, incremental=True)
+    assert exported_tables(report) == ["formats", "products"]
+    assert all(table["unchanged"] for table in report["tables"])
+    assert read_outputs(out) == first
+
+    # Mismos bytes: ni se decodifican
+    assert exported_tables(convert(json_path, out, incremental=True)) == []
+    assert read_outputs(out) == first
+
+
+def test_changed_table_is_decoded_once(tmp_path, monkeypatch):
+    json_path = tmp_path / "export.json"
+    out = tmp_path / "out"
+    data = sample_export()
+    write(json_path, data)
+    convert(json_path, out, incremental=True)
+
+    decoded = []
+    read_value = conv.JsonStreamReader.read_value
+
+    def counting(self):
+        value = read_value(self)
+        decoded.append(value)
+        return value
+
+    monkeypatch.setattr(conv.JsonStreamReader, "read_value", counting)
+    data["data"]["products"][0][1] = "Producto cambiado"
+    write(json_path, data)
+    report = convert(json_path, out, incremental=True)
+    assert exported_tables(report) == ["products"]
+    assert not report["tables"][0].get("unchanged")
+    rows = [value for value in decoded if isinstance(value, list)]
+    assert len(rows) == len(data["data"]["products"])
+
+
+def test_changed_rows_are_exported_again(tmp_path):
+    json_path = tmp_path / "export.json"
+    out = tmp_path / "out"
+    data = sample_export()
+    write(json_path, data)
+    convert(json_path, out, incremental=True)
+
+    data["data"]["formats"][0][1] = "negro"
+    write(json_path, data)
+    assert exported_tables(convert(json_path, out, incremental=True)) == ["formats"]
+    assert "negro" in (out / "formats_1.csv").read_text(encoding="utf-8-sig")
+
+
+def test_first_delta_run_writes_no_delta(tmp_path):
+    json_path = tmp_path / "export.json"
+    out = tmp_path / "out"
+    data = sample_export()
+    write(json_path, data)
+    report = convert(json_path, out, delta=True)
+    assert not [name for name in os.listdir(out) if "_delta_" in name]
+    assert all(table["delta_files"] == [] for table in report["tables"])
+
+    data["data"]["products"][4][1] = "Producto cambiado"
+    data["data"]["products"].append([61, "Producto nuevo", 3.0])
+    write(json_path, data)
+    report = convert(json_path, out, delta=True)
+    assert exported_tables(report) == ["products"]
+    delta = (out / "products_delta_1.csv").read_text(encoding="utf-8-sig")
+    assert delta.splitlines()[1:] == [
+        '"5","Producto cambiado","7.5"',
+        '"61","Producto nuevo","3.0"',
+    ]
+
+    # Sin cambios: el delta anterior se borra y no se escribe otro
+    convert(json_path, out, delta=True)
+    assert not [name for name in os.listdir(out) if "_delta_" in name]
+
+
+def test_changed_options_remove_stale_files(tmp_path):
+    json_path = tmp_path / "export.json"
+    out = tmp_path / "out"
+    write(json_path, sample_export())
+    convert(json_path, out, incremental=True, max_bytes=400)
+    assert len([n for n in os.listdir(out) if n.startswith("products_")]) > 3
+
+    report = convert(json_path, out, incremental=True, delimiter=";")
+    assert exported_tables(report) == ["formats", "products"]
+    assert sorted(read_outputs(out)) == ["formats_1.csv", "products_1.csv"]
+    assert (out / "products_1.csv").read_text(encoding="utf-8-sig").startswith(
+        '"ID";"name";"price"'
+    )
+
+
+def test_excluded_table_files_are_removed(tmp_path):
+    json_path = tmp_path / "export.json"
+    out = tmp_path / "out"
+    write(json_path, sample_export())
+    convert(json_path, out, delta=True)
+    assert (out / "formats_1.csv").exists()
+
+    report = convert(json_path, out, delta=True, exclude_tables=["formats"])
+    assert exported_tables(report) == []
+    assert sorted(read_outputs(out)) == ["products_1.csv"]
+    assert not os.path.exists(conv.row_digests_path(str(out), "formats"))
@@ -0,0 +1,151 @@
+"""
+Lectura en streaming del JSON: los errores indican la misma posición que
+json.loads aunque el fichero se lea por bloques, y como json.load no se
+acepta nada detrás del valor raíz.
+"""
+
+import io
+import json
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import write_json
+
+
+def sales_layer_text():
+    export = {
+        "data_schema_info": {"products": {"ID": {"type": "numeric"}}},
+        "data_schema": {"products": ["ID", "name"]},
+        "data": {"products": [[n, f"línea\n{n}"] for n in range(2000)]},
+    }
+    return json.dumps(export, ensure_ascii=False, indent=1)
+
+
+def read_all(reader):
+    """Recorre una exportación con el lector como lo hace iter_tables."""
+    for key in reader.iter_object():
+        if key != "data":
+            reader.skip_value()
+            continue
+        for _ in reader.iter_object():
+            for _ in reader.iter_array():
+                pass
+    reader.expect_end()
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ('"línea\\n0"', '"línea\\n0" 1'),
+        ('"línea\\n1999"', '"línea\\n1999",,'),
+        ('"línea\\n1500"', '"línea\\n1500"]]'),
+        ('"línea\\n700"', '"línea\\n700'),
+    ],
+    ids=["start", "near-end", "extra-bracket", "unterminated-string"],
+)
+def test_errors_report_file_positions(old, new):
+    text = sales_layer_text().replace(old, new, 1)
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(text)
+    reader = conv.JsonStreamReader(io.BytesIO(text.encode("utf-8")), chunk_size=512)
+    with pytest.raises(json.JSONDecodeError) as got:
+        read_all(reader)
+    assert str(got.value) == str(expected.value)
+    assert (got.value.lineno, got.value.colno) == (
+        expected.value.lineno,
+        expected.value.colno,
+    )
+
+
+def test_error_after_offset_reports_byte():
+    data = b'{"a": [1, 2, 3 4]}'
+    f = io.BytesIO(data)
+    f.seek(6)
+    reader = conv.JsonStreamReader(f)
+    with pytest.raises(json.JSONDecodeError) as got:
+        list(reader.iter_array())
+    assert got.value.pos == data.index(b"4")
+    assert str(got.value) == f"Expecting ',' delimiter: byte {got.value.pos}"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("trailing", ["{}", "]", "x", '{"data": {}}'])
+def test_trailing_data_is_rejected(tmp_path, workers, trailing):
+    json_path = tmp_path / "export.json"
+    json_path.write_text(sales_layer_text() + "\n" + trailing, encoding="utf-8")
+    with pytest.raises(Exception, match="Extra data"):
+        conv.process_json_file(
+            str(json_path),
+            output_dir=str(tmp_path / "out"),
+            lang="en",
+            run_report=False,
+            workers=workers,
+        )
+
+
+def test_trailing_data_after_product_array_is_rejected(tmp_path):
+    json_path = tmp_path / "products.json"
+    write_json(json_path, [{"id": 1, "sku": "A", "name": "Producto"}])
+    with open(json_path, "a", encoding="utf-8") as f:
+        f.write(' [{"id": 2}]')
+    with pytest.raises(Exception, match="Extra data"):
+        conv.process_json_file(
+            str(json_path), output_dir=str(tmp_path / "out"), lang="en"
+        )
+
+
+def test_trailing_whitespace_is_accepted(tmp_path):
+    json_path = tmp_path / "export.json"
+    json_path.write_text(sales_layer_text() + " \r\n\t\n", encoding="utf-8")
+    report = conv.process_json_file(
+        str(json_path), output_dir=str(tmp_path / "out"), lang="en", run_report=False
+    )
+    assert report["tables"][0]["rows"] == 2000
+
+
+def test_empty_file_is_invalid_json(tmp_path):
+    json_path = tmp_path / "empty.json"
+    json_path.write_bytes(b"")
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads("")
+    for read in (
+        lambda: conv.JsonTableIndex(str(json_path)),
+        lambda: conv.locate_tables(str(json_path), ["products"]),
+    ):
+        with pytest.raises(json.JSONDecodeError) as got:
+            read()
+        assert str(got.value) == str(expected.value)
+
+
+def test_index_errors_report_byte(tmp_path):
+    text = sales_layer_text().replace('"línea\\n1500"', '"línea\\n1500"]', 1)
+    json_path = tmp_path / "export.json"
+    json_path.write_text(text, encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError) as got:
+        conv.JsonTableIndex(str(json_path))
+    # Tras cerrar la tabla data espera otra clave y encuentra la fila 1501
+    data = text.encode("utf-8")
+    assert got.value.pos == data.rindex(b"[", 0, data.index(b"1501,"))
+    assert str(got.value) == (
+        f"Expecting property name enclosed in double quotes: byte {got.value.pos}"
+    )
+
+
+def test_index_row_ranges_cover_every_row(tmp_path):
+    json_path = tmp_path / "export.json"
+    json_path.write_text(sales_layer_text(), encoding="utf-8")
+    data = json_path.read_bytes()
+    with conv.JsonTableIndex(str(json_path)) as index:
+        assert index.row_count("products") == 2000
+        starts = index.row_starts("products")
+        ranges = index.row_ranges("products", 4096)
+    assert len(ranges) > 1
+    assert [r[0] for r in ranges] == [0] + [r[1] for r in ranges[:-1]]
+    assert ranges[-1][1] == 2000
+    rows = []
+    for first, stop, start, end in ranges:
+        assert start == starts[first]
+        rows.extend(json.loads(b"[" + data[start:end] + b"]"))
+    assert rows == json.loads(data)["data"]["products"]
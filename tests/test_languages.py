@@ -0,0 +1,117 @@
+"""
+Campos multi-idioma (--language-layout split / long): solo los sufijos que
+son idiomas (declarados con language_code o ISO 639-1) se separan; size_xl,
+size_xs o product_id siguen siendo columnas comunes.
+"""
+
+import csv
+import os
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import write_json
+
+KEYS = [
+    "ID",
+    "product_id",
+    "name_en",
+    "name_es",
+    "size_xl",
+    "size_xs",
+    "desc_en",
+    "desc_es",
+]
+ROWS = [
+    [1, "P1", "Shirt", "Camisa", "XL1", "XS1", "Nice", ""],
+    [2, "P2", "Hat", "Gorro", "XL2", "XS2", "", "Bonito"],
+]
+
+
+def sample_export(declared):
+    info = {"ID": {"type": "numeric"}}
+    if declared:
+        for key in KEYS:
+            if key.endswith(("_en", "_es")):
+                info[key] = {"type": "string", "language_code": key[-2:].upper()}
+    return {
+        "data_schema_info": {"products": info},
+        "data_schema": {"products": KEYS},
+        "data": {"products": ROWS},
+    }
+
+
+def convert(tmp_path, declared, layout):
+    json_path = write_json(tmp_path / "export.json", sample_export(declared))
+    out = tmp_path / "out"
+    conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        language_layout=layout,
+    )
+    tables = {}
+    for name in sorted(os.listdir(out)):
+        with open(out / name, encoding="utf-8-sig", newline="") as f:
+            tables[name] = list(csv.reader(f))
+    return tables
+
+
+def test_column_languages_only_takes_language_suffixes():
+    keys = KEYS + ["label_de", "label_fr"]
+    assert conv.column_languages(keys, {}) == {
+        "name_en": "en",
+        "name_es": "es",
+        "desc_en": "en",
+        "desc_es": "es",
+        "label_de": "de",
+        "label_fr": "fr",
+    }
+    # Si la tabla declara idiomas, solo esos
+    info = {"name_en": {"language_code": "en"}, "name_es": {"language_code": "es"}}
+    assert conv.column_languages(keys, info) == {
+        "name_en": "en",
+        "name_es": "es",
+        "desc_en": "en",
+        "desc_es": "es",
+    }
+
+
+@pytest.mark.parametrize("declared", [True, False], ids=["declared", "suffix"])
+def test_split_layout_keeps_non_language_fields_common(tmp_path, declared):
+    tables = convert(tmp_path, declared, "split")
+    assert sorted(tables) == ["products_en_1.csv", "products_es_1.csv"]
+    header = ["ID", "product_id", "name", "size_xl", "size_xs", "desc"]
+    assert tables["products_en_1.csv"] == [
+        header,
+        ["1", "P1", "Shirt", "XL1", "XS1", "Nice"],
+        ["2", "P2", "Hat", "XL2", "XS2", ""],
+    ]
+    assert tables["products_es_1.csv"] == [
+        header,
+        ["1", "P1", "Camisa", "XL1", "XS1", ""],
+        ["2", "P2", "Gorro", "XL2", "XS2", "Bonito"],
+    ]
+
+
+@pytest.mark.parametrize("declared", [True, False], ids=["declared", "suffix"])
+def test_long_layout_keeps_non_language_fields_common(tmp_path, declared):
+    tables = convert(tmp_path, declared, "long")
+    assert sorted(tables) == ["products_1.csv", "products_languages_1.csv"]
+    assert tables["products_1.csv"] == [
+        ["ID", "product_id", "size_xl", "size_xs"],
+        ["1", "P1", "XL1", "XS1"],
+        ["2", "P2", "XL2", "XS2"],
+    ]
+    translations = tables["products_languages_1.csv"]
+    assert translations[0] == ["ID", "field", "language", "value"]
+    assert sorted(translations[1:]) == [
+        ["1", "desc", "en", "Nice"],
+        ["1", "name", "en", "Shirt"],
+        ["1", "name", "es", "Camisa"],
+        ["2", "desc", "es", "Bonito"],
+        ["2", "name", "en", "Hat"],
+        ["2", "name", "es", "Gorro"],
+    ]
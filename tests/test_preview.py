@@ -0,0 +1,113 @@
+"""
+Vista previa (--preview): filas, bytes y ficheros _N.csv estimados sin
+escribir nada, comparados con los de una conversión real.
+"""
+
+import os
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+from benchmarks.generator import generate_simple_export
+
+from conftest import write_json
+
+MAX_BYTES = 100 * 1024
+
+
+def converted(json_path, out, **options):
+    """{tabla: (filas, bytes, ficheros)} de una conversión real."""
+    report = conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        max_bytes=MAX_BYTES,
+        **options,
+    )
+    rows = {table["table"]: table["rows"] for table in report["tables"]}
+    tables = {}
+    for name in sorted(os.listdir(out)):
+        base = name[: -len(".csv")].rpartition("_")[0]
+        _, size, files = tables.get(base, (None, 0, 0))
+        tables[base] = (rows.get(base), size + os.path.getsize(out / name), files + 1)
+    return tables
+
+
+def test_estimate_splits():
+    assert conv.estimate_splits(0, 10, 10, 110) == (0, 0)
+    # 10 filas por fichero: 10 ficheros, cada uno con cabecera y BOM
+    assert conv.estimate_splits(100, 10, 10, 110) == (1000 + 10 * 13, 10)
+    assert conv.estimate_splits(101, 10, 10, 110) == (1010 + 11 * 13, 11)
+    # Una fila mayor que el límite va sola en su fichero
+    assert conv.estimate_splits(3, 500, 10, 110) == (1500 + 3 * 13, 3)
+
+
+def test_exact_preview_matches_conversion(saleslayer_export, tmp_path):
+    preview = conv.preview_json_file(
+        saleslayer_export, max_bytes=MAX_BYTES, sample_rows=10_000, exact=True
+    )
+    assert preview["format"] == "saleslayer"
+    actual = converted(saleslayer_export, tmp_path)
+    assert sorted(table["table"] for table in preview["tables"]) == sorted(actual)
+    for table in preview["tables"]:
+        rows, size, files = actual[table["table"]]
+        assert table["rows_exact"] and table["rows"] == rows
+        assert table["sampled_rows"] == rows
+        assert abs(table["files"] - files) <= 1
+        assert table["output_bytes"] == pytest.approx(size, rel=0.01)
+
+
+def test_sampled_preview_estimates_rows(saleslayer_export, tmp_path):
+    preview = conv.preview_json_file(
+        saleslayer_export, max_bytes=MAX_BYTES, sample_rows=300
+    )
+    actual = converted(saleslayer_export, tmp_path)
+    for table in preview["tables"]:
+        rows, size, _ = actual[table["table"]]
+        assert table["sampled_rows"] == 300
+        assert not table["rows_exact"]
+        assert table["rows"] == pytest.approx(rows, rel=0.15)
+        assert table["output_bytes"] == pytest.approx(size, rel=0.2)
+
+
+def test_preview_applies_selection_and_writes_nothing(saleslayer_export, tmp_path):
+    before = sorted(os.listdir(os.path.dirname(saleslayer_export)))
+    full = conv.preview_json_file(saleslayer_export, max_bytes=MAX_BYTES)
+    names = [table["table"] for table in full["tables"]]
+    preview = conv.preview_json_file(
+        saleslayer_export,
+        max_bytes=MAX_BYTES,
+        tables=[names[0], names[1]],
+        exclude_columns=["ID"],
+    )
+    assert [table["table"] for table in preview["tables"]] == names[:2]
+    for table, whole in zip(preview["tables"], full["tables"]):
+        assert table["columns"] == whole["columns"] - 1
+        assert table["output_bytes"] < whole["output_bytes"]
+    assert sorted(os.listdir(os.path.dirname(saleslayer_export))) == before
+
+
+def test_simple_preview(tmp_path):
+    json_path = str(tmp_path / "products.json")
+    generate_simple_export(json_path, products=600, seed=5)
+    actual = converted(json_path, tmp_path / "out")
+    exact = conv.preview_json_file(json_path, max_bytes=MAX_BYTES, sample_rows=1000)
+    sampled = conv.preview_json_file(json_path, max_bytes=MAX_BYTES, sample_rows=100)
+    assert exact["format"] == sampled["format"] == "simple"
+    counts = {table["table"]: table for table in exact["tables"]}
+    assert counts["products"]["rows_exact"]
+    assert counts["products"]["rows"] == 600
+    for name in ("products", "variants", "categories"):
+        _, size, files = actual[name]
+        assert counts[name]["output_bytes"] == pytest.approx(size, rel=0.01)
+        assert abs(counts[name]["files"] - files) <= 1
+    products = sampled["tables"][0]
+    assert not products["rows_exact"]
+    assert products["rows"] == pytest.approx(600, rel=0.15)
+
+
+def test_preview_rejects_unknown_format(tmp_path):
+    json_path = write_json(tmp_path / "other.json", {"items": [1, 2]})
+    with pytest.raises(Exception):
+        conv.preview_json_file(json_path)
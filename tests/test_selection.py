@@ -0,0 +1,135 @@
+"""
+Selección de tablas y columnas (--tables / --exclude-tables, --columns /
+--exclude-columns, --languages): solo se escriben las elegidas y las tablas
+omitidas no se decodifican.
+"""
+
+import csv
+import os
+
+import pytest
+
+import json_to_csv_saleslayer_gui as conv
+
+from conftest import write_json
+
+
+def sample_export():
+    return {
+        "data_schema_info": {
+            "products": {
+                "ID": {"type": "numeric"},
+                "name_en": {"type": "string", "language_code": "en"},
+                "name_es": {"type": "string", "language_code": "es"},
+                "price": {"type": "numeric"},
+            }
+        },
+        "data_schema": {
+            "products": ["ID", "name_en", "name_es", "price", "notes"],
+            "mat_colors": ["ID", "color", "notes"],
+            "mat_tmp": ["ID", "value"],
+        },
+        "data": {
+            "products": [
+                [n, f"Shirt {n}", f"Camisa {n}", n + 0.5, "nota"] for n in range(40)
+            ],
+            "mat_colors": [[n, f"color {n}", ""] for n in range(30)],
+            "mat_tmp": [[n, "tmp"] for n in range(20)],
+        },
+    }
+
+
+def convert(tmp_path, **options):
+    json_path = write_json(tmp_path / "export.json", sample_export())
+    out = tmp_path / "out"
+    logs = []
+    report = conv.process_json_file(
+        json_path,
+        output_dir=str(out),
+        lang="en",
+        run_report=False,
+        log_fn=logs.append,
+        **options,
+    )
+
+    def header(table):
+        with open(out / f"{table}_1.csv", encoding="utf-8-sig", newline="") as f:
+            return next(csv.reader(f))
+
+    return report, sorted(os.listdir(out)), header, logs
+
+
+def test_parse_patterns():
+    assert conv.parse_patterns(" products, mat_*, !mat_tmp ,, ! ") == (
+        ["products", "mat_*"],
+        ["mat_tmp"],
+    )
+
+
+@pytest.mark.parametrize(
+    "tables, exclude_tables, expected",
+    [
+        (["mat_*"], None, ["mat_colors", "mat_tmp"]),
+        (None, ["mat_*"], ["products"]),
+        (["products", "mat_*"], ["mat_tmp"], ["products", "mat_colors"]),
+        (["Products"], None, []),
+    ],
+)
+def test_tables_by_name_or_pattern(tmp_path, tables, exclude_tables, expected):
+    report, files, _, _ = convert(
+        tmp_path, tables=tables, exclude_tables=exclude_tables
+    )
+    assert [table["table"] for table in report["tables"]] == expected
+    assert files == sorted(f"{name}_1.csv" for name in expected)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_skipped_tables_are_not_decoded(tmp_path, monkeypatch, workers):
+    decoded = []
+    read_value = conv.JsonStreamReader.read_value
+
+    def counting(self):
+        value = read_value(self)
+        decoded.append(value)
+        return value
+
+    monkeypatch.setattr(conv.JsonStreamReader, "read_value", counting)
+    convert(tmp_path, tables=["mat_colors"], workers=workers)
+    rows = [value for value in decoded if isinstance(value, list)]
+    # Con procesos las filas se decodifican en los del pool, no en este
+    expected = [[n, f"color {n}", ""] for n in range(30)] if workers == 1 else []
+    assert [row for row in rows if row and isinstance(row[0], int)] == expected
+
+
+def test_columns_by_field_or_table_field(tmp_path):
+    _, _, header, _ = convert(
+        tmp_path,
+        columns=["ID", "name_*", "mat_colors.*"],
+        exclude_columns=["notes"],
+    )
+    assert header("products") == ["ID", "name_en", "name_es"]
+    assert header("mat_colors") == ["ID", "color"]
+    assert header("mat_tmp") == ["ID"]
+
+
+def test_excluded_columns_are_not_written(tmp_path):
+    _, _, header, _ = convert(tmp_path, exclude_columns=["products.notes", "price"])
+    assert header("products") == ["ID", "name_en", "name_es"]
+    assert header("mat_colors") == ["ID", "color", "notes"]
+    with open(tmp_path / "out" / "products_1.csv", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert rows[1] == ["0", "Shirt 0", "Camisa 0"]
+
+
+def test_languages_keep_only_chosen_translations(tmp_path):
+    _, _, header, _ = convert(tmp_path, languages=["en"])
+    assert header("products") == ["ID", "name_en", "price", "notes"]
+    # Los campos sin idioma se conservan siempre
+    assert header("mat_colors") == ["ID", "color", "notes"]
+
+
+def test_table_without_columns_is_skipped(tmp_path):
+    report, files, _, logs = convert(tmp_path, columns=["color"])
+    assert [table["table"] for table in report["tables"]] == ["mat_colors"]
+    assert files == ["mat_colors_1.csv"]
+    assert any("products" in line for line in logs)
@@ -0,0 +1,14 @@
+"""
+Modo simple (array de productos en la raíz): products / variants /
+categories y el log de la conversión.
+"""
+
+import json_to_csv_saleslayer_gui as conv
+
+
+def test_empty_product_list_logs_zero_products(tmp_path):
+    logs = []
+    conv.generate_csv_from_products(
+        [], str(tmp_path), 1024 * 1024, ",", "en", log_fn=logs.append
+    )
+    assert "Processing 0 products to generate CSV (simple mode)…" in logs